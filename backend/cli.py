@@ -0,0 +1,160 @@
+"""
+NeuroPathX backend command line tools.
+
+Usage (from the project root):
+    python -m backend.cli compare --student artifacts/classification/student.keras
+    python -m backend.cli build-index
+    python -m backend.cli bench-tta
+    python -m backend.cli export-reports --results predictions.ndjson --output reports.zip
+    python -m backend.cli autotune --max_p99_ms 500
+    python -m backend.cli evaluate --data_dir data/classification_samples --output_dir evaluation
+    python -m backend.cli export-snapshot
+    python -m backend.cli audit --limit 20 --since 2026-10-01
+    python -m backend.cli calibrate-cascade --screener artifacts/classification/screener.keras --write
+"""
+import argparse
+import logging
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="NeuroPathX Backend CLI")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # compare: distilled student vs. teacher on the sample set
+    compare = subparsers.add_parser("compare", help="Compare a student model against the served teacher model")
+    compare.add_argument("--student", required=True, help="Path to the student .keras model")
+    compare.add_argument("--teacher", default=None, help="Teacher model path (defaults to config.MODEL_PATH)")
+    compare.add_argument("--samples_dir", default=None, help="Class-folder directory (defaults to config.SAMPLES_DIR)")
+    compare.add_argument("--limit", type=int, default=None, help="Only use the first N samples")
+    compare.add_argument("--output", default=None, help="Optional JSON report path")
+
+    # build-index: reference-set embeddings for /similar_cases
+    build_index = subparsers.add_parser("build-index", help="Precompute the similar-case embedding index")
+    build_index.add_argument("--samples_dir", default=None, help="Class-folder reference set (defaults to config.SAMPLES_DIR)")
+    build_index.add_argument("--index_dir", default=None, help="Output directory (defaults to SIMILAR_CASES_INDEX_DIR)")
+    build_index.add_argument("--model_path", default=None, help="Classifier model (defaults to config.MODEL_PATH)")
+    build_index.add_argument("--batch_size", type=int, default=32)
+
+    # bench-tta: latency of the batched TTA mode vs. the default single view
+    bench_tta = subparsers.add_parser("bench-tta", help="Benchmark test-time augmentation against the default path")
+    bench_tta.add_argument("--model_path", default=None, help="Classifier model (defaults to config.MODEL_PATH)")
+    bench_tta.add_argument("--samples_dir", default=None, help="Class-folder directory (defaults to config.SAMPLES_DIR)")
+    bench_tta.add_argument("--limit", type=int, default=None, help="Only use the first N samples")
+    bench_tta.add_argument("--repeats", type=int, default=3)
+    bench_tta.add_argument("--output", default=None, help="Optional JSON report path")
+
+    # export-reports: bulk PDF rendering from a batch-prediction result file
+    export_reports = subparsers.add_parser("export-reports", help="Render the PDF reports of a batch-prediction result file into a zip")
+    export_reports.add_argument("--results", required=True, help="JSON list/object or NDJSON of prediction results")
+    export_reports.add_argument("--output", required=True, help="Zip archive to write")
+    export_reports.add_argument("--workers", type=int, default=None, help="Rendering processes (defaults to NPX_REPORT_WORKERS / core count)")
+
+    # autotune: TensorFlow threads / workers / batch size for this host
+    autotune = subparsers.add_parser("autotune", help="Benchmark thread, worker and batch settings and write the host runtime profile")
+    autotune.add_argument("--model_path", default=None, help="Classifier model (defaults to config.MODEL_PATH)")
+    autotune.add_argument("--samples_dir", default=None, help="Class-folder directory (defaults to config.SAMPLES_DIR)")
+    autotune.add_argument("--limit", type=int, default=None, help="Only use the first N samples")
+    autotune.add_argument("--repeats", type=int, default=3)
+    autotune.add_argument("--intra_op_threads", default=None, help="Comma-separated values (default: around the core count)")
+    autotune.add_argument("--inter_op_threads", default=None, help="Comma-separated values")
+    autotune.add_argument("--workers", default=None, help="Comma-separated concurrent worker counts")
+    autotune.add_argument("--batch_size", default=None, help="Comma-separated batch sizes")
+    autotune.add_argument("--max_p99_ms", type=float, default=None, help="Only pick configurations whose batch p99 is within this budget")
+    autotune.add_argument("--profile_path", default=None, help="Output profile (defaults to artifacts/runtime_profile.json)")
+
+    # evaluate: offline scoring of a class-folder directory
+    evaluate = subparsers.add_parser("evaluate", help="Score the classifier on a class-folder directory")
+    evaluate.add_argument("--model_path", default=None, help="Classifier model (defaults to config.MODEL_PATH)")
+    evaluate.add_argument("--data_dir", default=None, help="Class-folder directory (defaults to config.SAMPLES_DIR)")
+    evaluate.add_argument("--output_dir", default="evaluation", help="Where predictions.csv, confusion_matrix.csv and metrics.json go")
+    evaluate.add_argument("--batch_size", type=int, default=32)
+    evaluate.add_argument("--workers", type=int, default=None, help="Decode threads (defaults to min(8, cores))")
+    evaluate.add_argument("--limit", type=int, default=None, help="Only use the first N images")
+    evaluate.add_argument("--drift_samples", type=int, default=32, help="Images compared against the training loader (0 disables)")
+
+    # export-snapshot: precompiled SavedModel next to the artifact, preferred by KerasClassifier
+    snapshot = subparsers.add_parser("export-snapshot", help="Export a precompiled serving snapshot and compare load times")
+    snapshot.add_argument("--model_path", default=None, help="Classifier model (defaults to config.MODEL_PATH)")
+    snapshot.add_argument("--snapshot_dir", default=None, help="Output directory (defaults to <model>.snapshot next to it)")
+    snapshot.add_argument("--no_measure", action="store_true", help="Skip the cold-start load time comparison")
+
+    # audit: recent records of the prediction audit trail
+    audit = subparsers.add_parser("audit", help="Print recent prediction audit records as JSON lines")
+    audit.add_argument("--audit_dir", default=None, help="Audit directory (defaults to NPX_AUDIT_DIR / artifacts/audit)")
+    audit.add_argument("--limit", type=int, default=20)
+    audit.add_argument("--since", default=None, help="Only records at or after this ISO timestamp/date")
+    audit.add_argument("--model_version", default=None, help="Only records from this model version")
+
+    # calibrate-cascade: screener threshold of the screening cascade
+    calibrate = subparsers.add_parser("calibrate-cascade", help="Pick the cascade screener threshold on the sample set")
+    calibrate.add_argument("--screener", required=True, help="Path to the screening .keras model")
+    calibrate.add_argument("--model_path", default=None, help="Full model (defaults to config.MODEL_PATH)")
+    calibrate.add_argument("--samples_dir", default=None, help="Class-folder directory (defaults to config.SAMPLES_DIR)")
+    calibrate.add_argument("--limit", type=int, default=None, help="Only use the first N samples")
+    calibrate.add_argument("--min_agreement", type=float, default=0.99, help="Minimum agreement of the cascade with the full model")
+    calibrate.add_argument("--output", default=None, help="Optional JSON report path")
+    calibrate.add_argument("--write", action="store_true", help="Store the threshold in the screener's metadata sidecar")
+
+    return parser.parse_args()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+
+    if args.command == "compare":
+        from backend.tools.compare import run_compare
+        run_compare(args.student, args.teacher, args.samples_dir, args.limit, args.output)
+
+    elif args.command == "build-index":
+        from backend.models.classification import KerasClassifier
+        from backend.models.retrieval import build_index
+        summary = build_index(KerasClassifier(model_path=args.model_path), args.samples_dir, args.index_dir, args.batch_size)
+        print(f"Indexed {summary['count']} reference images (dim={summary['embedding_dim']}).")
+
+    elif args.command == "bench-tta":
+        from backend.tools.tta_benchmark import run_tta_benchmark
+        run_tta_benchmark(args.model_path, args.samples_dir, args.limit, args.repeats, args.output)
+
+    elif args.command == "autotune":
+        from backend.tools.autotune import default_grid, run_autotune
+        grid = default_grid()
+        for key in grid:
+            if getattr(args, key):
+                grid[key] = [int(v) for v in getattr(args, key).split(",")]
+        run_autotune(args.model_path, args.samples_dir, args.limit, args.repeats, grid, args.max_p99_ms, args.profile_path)
+
+    elif args.command == "evaluate":
+        from backend.tools.evaluate import run_evaluate
+        run_evaluate(args.model_path, args.data_dir, args.output_dir, args.batch_size, args.workers, args.limit, args.drift_samples)
+
+    elif args.command == "export-snapshot":
+        from backend.tools.export_snapshot import run_export_snapshot
+        run_export_snapshot(args.model_path, args.snapshot_dir, measure=not args.no_measure)
+
+    elif args.command == "audit":
+        import json
+        from backend.models.audit_log import read_audit_records
+        for record in read_audit_records(args.audit_dir, args.limit, args.since, args.model_version):
+            print(json.dumps(record, default=str))
+
+    elif args.command == "calibrate-cascade":
+        from backend.tools.calibrate_cascade import run_calibrate_cascade
+        run_calibrate_cascade(args.screener, args.model_path, args.samples_dir, args.limit, args.min_agreement,
+                              args.output, args.write)
+
+    elif args.command == "export-reports":
+        import time
+        from backend.models.report.bulk_export import iter_report_zip, load_batch_results, shutdown_report_pool
+        items = load_batch_results(args.results)
+        start = time.perf_counter()
+        with open(args.output, "wb") as f:
+            for chunk in iter_report_zip(items, workers=args.workers):
+                f.write(chunk)
+        elapsed = time.perf_counter() - start
+        shutdown_report_pool()
+        print(f"Exported {len(items)} results to {args.output} in {elapsed:.1f}s ({len(items) / elapsed:.1f} reports/sec).")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,45 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, StreamingResponse
 import logging
 import io
+import os
+import json
+import itertools
+import threading
+import tempfile
+import time
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
 from datetime import datetime
+from starlette.concurrency import run_in_threadpool
 import base64  # <--- CRITICAL FIX: Base64 is required for image encoding
 
 # Import classifier wrapper and new generator
-from backend.models.classification import KerasClassifier
+from backend.models.runtime_profile import apply_runtime_profile
+from backend.models.audit_log import AuditLog, read_audit_records
+from backend.models.registry import ModelRegistry, ArtifactWatcher
+from backend.models.classification.admission import UploadRejected, check_image_header, copy_upload, read_upload
+from backend.models.classification.config import (
+    MAX_CACHED_SESSIONS, MAX_VOLUME_BATCH_SIZE, MAX_VOLUME_UPLOAD_BYTES, VOLUME_BATCH_SIZE, VOLUME_TOP_SLICES
+)
+from backend.models.classification.volume import (
+    VOLUME_EXTENSIONS, StudyAggregator, batched, iter_volume_slices, slice_to_image
+)
+from backend.models.profiling import MEMORY_PROFILING_ENABLED, profile_prediction
 from backend.models.report.report_generator import generate_pdf_report
+from backend.models.report.bulk_export import MAX_BATCH_RESULTS_BYTES, iter_report_zip, load_batch_results
+from backend.models.retrieval import SimilarCaseIndex
+from backend.models.retrieval.config import DEFAULT_TOP_K, MAX_TOP_K
 
 app = FastAPI(title="NeuroPathX Backend", version="0.1")
 logger = logging.getLogger("uvicorn.error")
 
+# Host runtime profile (python -m backend.cli autotune): thread pools must be sized before TensorFlow
+# initializes, i.e. before the first model is loaded
+RUNTIME_PROFILE = apply_runtime_profile() or {}
+
 # --- DEBUG: Force Eager Execution ---
 # This often resolves Keras 3 graph construction issues with older or malformed models
 try:
@@ -42,17 +69,115 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Instantiate the classifier once at startup
-try:
-    classifier = KerasClassifier()
-    logger.info("Keras classifier loaded successfully.")
-except Exception as e:
-    classifier = None
-    logger.error(f"Failed to initialize classifier: {e}")
+# Model registry: models are declared in backend/models/model_registry.json, loaded lazily
+# on first use and kept resident under a memory budget (LRU unloading).
+registry = ModelRegistry.from_config()
+
+
+def _get_classifier(name: str = "classification"):
+    """Resolves a classifier from the registry, loading it if needed (503 if that fails)."""
+    try:
+        return registry.get(name)
+    except Exception as e:
+        logger.error(f"Failed to load model '{name}': {e}")
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+
+# Optional artifact watcher: NPX_MODEL_WATCH_INTERVAL=<seconds> hot-swaps the default classifier
+# whenever its file is replaced on disk.
+MODEL_WATCH_INTERVAL = float(os.environ.get("NPX_MODEL_WATCH_INTERVAL", "0"))
+if MODEL_WATCH_INTERVAL > 0:
+    ArtifactWatcher(registry, "classification", MODEL_WATCH_INTERVAL).start()
+
+# Prediction audit trail (clinical traceability): records are queued here and written in batches
+# by a background thread, so the request path only pays for a queue put. NPX_AUDIT_LOG=0 disables it.
+audit_log = AuditLog() if os.environ.get("NPX_AUDIT_LOG", "1") != "0" else None
+
+
+@app.on_event("shutdown")
+def _close_audit_log():
+    if audit_log is not None:
+        audit_log.close()
+
+
+def _audit_prediction(audit: dict, timings: dict, start: float, status: str, result: dict = None, error: str = None):
+    """Completes an audit record (outcome, class probabilities, stage timings) and enqueues it."""
+    if audit_log is None:
+        return
+    record = {**audit, "status": status, "error": error, "cascade_stage": None, "predicted_class": None,
+              "confidence": None, "class_labels": [], "probabilities": []}
+    if result is not None:
+        record.update({
+            "model_version": result.get("model_version", record["model_version"]),
+            "cascade_stage": result.get("cascade", {}).get("stage"),
+            "predicted_class": result["class"],
+            "confidence": result["confidence"],
+            "class_labels": [c["label"] for c in result["all_classes"]],
+            "probabilities": [c["confidence"] for c in result["all_classes"]],
+        })
+    for stage in ("read_ms", "predict_ms", "preprocessed_ms"):
+        record[stage] = timings.get(stage)
+    record["total_ms"] = (time.perf_counter() - start) * 1000.0
+    audit_log.record(record)
+
+
+def _sha256_hexdigest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+async def _read_image_upload(file: UploadFile) -> bytes:
+    """
+    Admission stage for image uploads: chunked read under the byte cap (413), then a header-only
+    dimension check (422) before anything is decoded. Undecodable data is a 400.
+    """
+    try:
+        contents = await read_upload(file)
+        check_image_header(contents)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    return contents
 
 # --- Temporary/Shared Cache for Prediction Result ---
-# CRITICAL: In a real app, this should be Redis/DB. For this project, a global dict is fine.
-LATEST_PREDICTION_CACHE = {}
+# CRITICAL: In a real app, this should be Redis/DB. For this project, an in-process LRU is fine.
+# session_id -> (result, (model_version, embedding)). The embedding is kept apart from the JSON-serializable
+# result and evicted with it; embeddings from different model versions are not comparable.
+# Callers choose session IDs, so the cache is capped at MAX_CACHED_SESSIONS.
+SESSION_CACHE = OrderedDict()
+_session_cache_lock = threading.Lock()
+
+
+def _cache_session(session_id: str, result: dict, embedding_entry: tuple):
+    with _session_cache_lock:
+        SESSION_CACHE[session_id] = (result, embedding_entry)
+        SESSION_CACHE.move_to_end(session_id)
+        while len(SESSION_CACHE) > MAX_CACHED_SESSIONS:
+            SESSION_CACHE.popitem(last=False)
+
+
+def _cached_session(session_id: str):
+    """(result, (model_version, embedding)) of a cached prediction, or None if unknown or evicted."""
+    with _session_cache_lock:
+        entry = SESSION_CACHE.get(session_id)
+        if entry is not None:
+            SESSION_CACHE.move_to_end(session_id)
+        return entry
+
+
+def _cached_prediction(session_id: str):
+    entry = _cached_session(session_id)
+    return entry[0] if entry is not None else None
+
+# Similar-case index (memory-mapped, loaded on first use)
+similar_case_index = None
+
+
+def _get_similar_case_index() -> SimilarCaseIndex:
+    global similar_case_index
+    if similar_case_index is None:
+        similar_case_index = SimilarCaseIndex()
+    return similar_case_index
 
 
 # ---------------------------------------------------
@@ -66,7 +191,7 @@ async def preview_report(session_id: str = "latest"):
     """Generates and serves the dynamic PDF report."""
 
     # Retrieve the last prediction result from the cache
-    cached_result = LATEST_PREDICTION_CACHE.get(session_id)
+    cached_result = _cached_prediction(session_id)
 
     if not cached_result:
         raise HTTPException(status_code=404, detail="No recent prediction found for report generation.")
@@ -90,7 +215,7 @@ async def preview_report(session_id: str = "latest"):
 async def download_report(session_id: str = "latest"):
     """Generates and serves the dynamic PDF report as an attachment."""
 
-    cached_result = LATEST_PREDICTION_CACHE.get(session_id)
+    cached_result = _cached_prediction(session_id)
 
     if not cached_result:
         raise HTTPException(status_code=404, detail="No recent prediction found for report generation.")
@@ -110,12 +235,116 @@ async def download_report(session_id: str = "latest"):
     )
 
 
+# ------------------------
+# Bulk report export (zip of PDFs rendered in the report process pool)
+# ------------------------
+@app.post("/report/bulk")
+def bulk_report_export(request: dict):
+    """
+    Renders the reports of several cached predictions ({"session_ids": [...]}) across the report
+    process pool and streams them back as a zip archive while they are produced.
+    """
+    session_ids = request.get("session_ids") or []
+    if not session_ids:
+        raise HTTPException(status_code=422, detail="session_ids must be a non-empty list")
+    items = [(s, _cached_prediction(s)) for s in session_ids]
+    missing = [s for s, result in items if result is None]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"No cached prediction for session(s): {', '.join(map(str, missing))}")
+
+    return StreamingResponse(
+        iter_report_zip(items),
+        media_type="application/zip",
+        headers={"Content-Disposition": "attachment; filename=NeuroPathX_Reports.zip"}
+    )
+
+
+@app.post("/report/bulk/upload")
+async def bulk_report_export_from_file(file: UploadFile = File(...)):
+    """Same as POST /report/bulk for a batch-prediction result file (JSON list/object or NDJSON)."""
+    # Spool the upload: FastAPI closes it before the streamed body is sent
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as results_file:
+        try:
+            await run_in_threadpool(copy_upload, file.file, results_file, MAX_BATCH_RESULTS_BYTES)
+        except UploadRejected as e:
+            results_file.close()
+            os.unlink(results_file.name)
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+    try:
+        # Parsing up to MAX_BATCH_RESULTS_BYTES of JSON is CPU work: keep it off the event loop
+        items = await run_in_threadpool(load_batch_results, results_file.name)
+    except (ValueError, AttributeError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Unable to read batch results: {e}")
+    finally:
+        os.unlink(results_file.name)
+    if not items:
+        raise HTTPException(status_code=400, detail="The batch file contains no prediction results.")
+
+    return StreamingResponse(
+        iter_report_zip(items),
+        media_type="application/zip",
+        headers={"Content-Disposition": "attachment; filename=NeuroPathX_Reports.zip"}
+    )
+
+
 # ------------------------
 # Healthcheck
 # ------------------------
 @app.get("/health")
 def health_check():
-    return {"status": "ok", "model_loaded": classifier is not None}
+    return {"status": "ok", "model_loaded": registry.is_resident("classification")}
+
+
+@app.get("/models")
+def list_models():
+    """Registered models with residency, load time, hit/miss counts and memory use."""
+    return registry.stats()
+
+
+# ------------------------
+# Admin: zero-downtime model hot-swap
+# ------------------------
+def _check_admin_token(token):
+    expected = os.environ.get("NPX_ADMIN_TOKEN")
+    if not expected or token != expected:
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+@app.post("/admin/models/{name}/reload", status_code=202)
+def reload_model(name: str, request: dict = None, x_admin_token: str = Header(None)):
+    """
+    Loads a new artifact in the background ({"model_path": ..., "version": ...}, both optional),
+    warms it up and swaps it in once validated. Requests keep being served by the current model
+    meanwhile. Poll GET on the same path for the outcome.
+    """
+    _check_admin_token(x_admin_token)
+    if not registry.has(name):
+        raise HTTPException(status_code=404, detail=f"Unknown model '{name}'")
+
+    request = request or {}
+    return registry.reload_async(name, model_path=request.get("model_path"), version=request.get("version"))
+
+
+@app.get("/admin/models/{name}/reload")
+def reload_model_status(name: str, x_admin_token: str = Header(None)):
+    _check_admin_token(x_admin_token)
+    if not registry.has(name):
+        raise HTTPException(status_code=404, detail=f"Unknown model '{name}'")
+    return registry.reload_status(name)
+
+
+@app.get("/admin/audit/recent")
+def recent_audit_records(limit: int = 100, since: str = None, model_version: str = None,
+                         x_admin_token: str = Header(None)):
+    """Most recent prediction audit records (newest first), optionally since an ISO timestamp."""
+    _check_admin_token(x_admin_token)
+    if audit_log is None:
+        raise HTTPException(status_code=404, detail="Audit logging is disabled")
+    # Include what is still buffered
+    audit_log.flush()
+    records = read_audit_records(str(audit_log.directory), limit=min(limit, 1000), since=since,
+                                 model_version=model_version)
+    return {"stats": audit_log.stats(), "records": records}
 
 
 @app.get("/")
@@ -127,41 +356,208 @@ def read_root():
 # Prediction Endpoint (classification) - FULLY UPDATED FOR REPORT DATA
 # ------------------------
 @app.post("/mri_prediction")
-async def mri_prediction(file: UploadFile = File(...)):
-    if not file.content_type or not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=415, detail="Unsupported file type")
-    contents = await file.read()
-    if classifier is None:
-        raise HTTPException(status_code=503, detail="Model not loaded")
+async def mri_prediction(file: UploadFile = File(...), tta: bool = False, session_id: str = "latest"):
+    start = time.perf_counter()
+    timings = {}
+    audit = {"endpoint": "/mri_prediction", "session_id": session_id, "tta": tta, "input_sha256": None,
+             "input_bytes": None, "model_name": "classification", "model_version": None}
+
+    # Admission: rejected uploads (415/413/422/400) and an unavailable model are audited too
+    try:
+        if not file.content_type or not file.content_type.startswith("image/"):
+            raise HTTPException(status_code=415, detail="Unsupported file type")
+        contents = await _read_image_upload(file)
+        timings["read_ms"] = (time.perf_counter() - start) * 1000.0
+        audit["input_bytes"] = len(contents)
+        # Hashing an upload of up to MAX_UPLOAD_BYTES is CPU work: keep it off the event loop
+        audit["input_sha256"] = await run_in_threadpool(_sha256_hexdigest, contents)
+        classifier = _get_classifier()
+        audit["model_version"] = classifier.model_version
+    except HTTPException as e:
+        _audit_prediction(audit, timings, start, status="rejected" if e.status_code < 500 else "error", error=str(e.detail))
+        raise
 
     try:
         # 1. Run prediction and generate Grad-CAM
         # (Assumes predict_with_gradcam is now implemented in KerasClassifier)
-        result = classifier.predict_with_gradcam(contents)
+        # tta=true aggregates flipped/brightness-shifted views in one batched forward pass
+        t = time.perf_counter()
+        result = classifier.predict_with_gradcam(contents, include_embedding=True, tta=tta)
+        embedding = result.pop("embedding")
+        timings["predict_ms"] = (time.perf_counter() - t) * 1000.0
 
         # 2. Get the Preprocessed Image for the Report (Requires new KerasClassifier method)
+        t = time.perf_counter()
         preprocessed_bytes = classifier.get_preprocessed_image_bytes(contents)
         result["preprocessed_b64"] = base64.b64encode(preprocessed_bytes).decode("utf-8")
+        timings["preprocessed_ms"] = (time.perf_counter() - t) * 1000.0
 
         # 3. Add necessary context for the report and cache
-        session_id = "latest"  # Hardcoded session ID for simplicity
+        # Session ID for the report endpoints ("latest" unless the caller names the case)
         result["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         result["session_id"] = session_id
 
-        # Store the full result in the cache
-        LATEST_PREDICTION_CACHE[session_id] = result
+        # Store the full result in the cache, with the version of the model that answered
+        # (the screener's, when a cascade answered early) next to its embedding
+        _cache_session(session_id, result, (result["model_version"], embedding))
 
     except ValueError as ve:
+        _audit_prediction(audit, timings, start, status="rejected", error=str(ve))
         return JSONResponse(status_code=400, content={"detail": str(ve)})
     except Exception as e:
         logger.exception("Prediction failed")
+        _audit_prediction(audit, timings, start, status="error", error=str(e))
         # Return the actual error message to the client for debugging
         return JSONResponse(status_code=500, content={"detail": f"Internal Server Error: {str(e)}"})
 
+    _audit_prediction(audit, timings, start, status="ok", result=result)
+
     # Frontend expects keys: class, confidence, note, all_classes, gradcam_b64, preprocessed_b64
     return JSONResponse(content=result)
 
 
+# ------------------------
+# Volume endpoint (multi-slice studies, streamed per-slice results)
+# ------------------------
+# Slices per batch unless the request asks otherwise: the tuned batch size of this host, if any
+DEFAULT_VOLUME_BATCH_SIZE = min(RUNTIME_PROFILE.get("batch_size", VOLUME_BATCH_SIZE), MAX_VOLUME_BATCH_SIZE)
+
+
+@app.post("/mri_volume_prediction")
+async def mri_volume_prediction(file: UploadFile = File(...),
+                                batch_size: int = Query(DEFAULT_VOLUME_BATCH_SIZE, ge=1, le=MAX_VOLUME_BATCH_SIZE)):
+    """
+    Accepts a multi-frame TIFF or a .npy/.npz slice stack and streams NDJSON: one line per slice
+    as soon as its batch is predicted, then a final study-level summary (class vote, mean
+    probabilities, most suspicious slices). Slices are decoded lazily, so memory is bounded by
+    batch_size rather than by the volume depth. Raw slices skip the photo-vs-MRI heuristics.
+    """
+    filename = file.filename or ""
+    if Path(filename).suffix.lower() not in VOLUME_EXTENSIONS:
+        raise HTTPException(status_code=415, detail="Unsupported volume type (use .tif/.tiff, .npy or .npz)")
+    classifier = _get_classifier()
+
+    # FastAPI closes the upload before a streamed body is sent, so stream it into a private temp file
+    volume_file = tempfile.TemporaryFile()
+    try:
+        await run_in_threadpool(copy_upload, file.file, volume_file, MAX_VOLUME_UPLOAD_BYTES)
+    except UploadRejected as e:
+        volume_file.close()
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    volume_file.seek(0)
+
+    # Decode the first slice up front so that malformed uploads get a proper 400
+    slices = iter_volume_slices(volume_file, filename)
+    try:
+        first = await run_in_threadpool(next, slices, None)
+    except UploadRejected as e:
+        volume_file.close()
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except ValueError as ve:
+        volume_file.close()
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        volume_file.close()
+        logger.exception("Volume decoding failed")
+        raise HTTPException(status_code=400, detail=f"Unable to read volume: {e}")
+    if first is None:
+        volume_file.close()
+        raise HTTPException(status_code=400, detail="The volume contains no slices.")
+
+    def _stream():
+        # Sync generator: Starlette runs each step in its threadpool, keeping inference off the event loop
+        aggregator = StudyAggregator(classifier.class_labels, top_k=VOLUME_TOP_SLICES)
+        index = 0
+        try:
+            images = (slice_to_image(s) for s in itertools.chain([first], slices))
+            for batch in batched(images, batch_size):
+                for result in classifier.predict_images(batch):
+                    aggregator.add(index, result)
+                    yield json.dumps({"type": "slice", "index": index, **result}) + "\n"
+                    index += 1
+            yield json.dumps(aggregator.summary()) + "\n"
+        except Exception as e:
+            logger.exception("Volume prediction failed")
+            yield json.dumps({"type": "error", "index": index, "detail": str(e)}) + "\n"
+        finally:
+            volume_file.close()
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
+
+
+# ------------------------
+# Similar-case retrieval
+# ------------------------
+def _similar_cases_response(embedding, k: int, model_version: str) -> JSONResponse:
+    try:
+        index = _get_similar_case_index()
+    except FileNotFoundError as e:
+        logger.error(str(e))
+        raise HTTPException(status_code=503, detail="Similar-case index not built")
+
+    # Distances are only meaningful within a single model's embedding space
+    if index.model_version and index.model_version != model_version:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Similar-case index was built with model {index.model_version}, not {model_version}. Rebuild it."
+        )
+
+    return JSONResponse(content={"k": k, "reference_count": len(index), "matches": index.query(embedding, k)})
+
+
+@app.post("/similar_cases")
+async def similar_cases(file: UploadFile = File(...), k: int = Query(DEFAULT_TOP_K, ge=1, le=MAX_TOP_K)):
+    """Returns the top-k reference scans closest to the uploaded slice in the model's embedding space."""
+    if not file.content_type or not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=415, detail="Unsupported file type")
+    contents = await _read_image_upload(file)
+    classifier = _get_classifier()
+
+    try:
+        _, embedding = classifier.predict_with_embedding(contents)
+    except ValueError as ve:
+        return JSONResponse(status_code=400, content={"detail": str(ve)})
+
+    return _similar_cases_response(embedding, k, classifier.model_version)
+
+
+@app.get("/similar_cases")
+async def similar_cases_for_session(session_id: str = "latest", k: int = Query(DEFAULT_TOP_K, ge=1, le=MAX_TOP_K)):
+    """Same as POST /similar_cases, reusing the embedding of a cached prediction (no extra forward pass)."""
+    cached = _cached_session(session_id)
+    if cached is None:
+        raise HTTPException(status_code=404, detail="No recent prediction found for similar-case retrieval.")
+    result, (model_version, embedding) = cached
+
+    if result.get("cascade", {}).get("stage") == "screener":
+        # Screener embeddings live in another space than the index's; the image has to be re-embedded
+        raise HTTPException(status_code=409, detail="This prediction was answered by the screening model; "
+                                                    "upload the image to POST /similar_cases instead.")
+
+    return _similar_cases_response(embedding, k, model_version)
+
+
+# ------------------------
+# Debug: per-stage peak memory of the prediction path (NPX_MEMORY_PROFILING=1)
+# ------------------------
+@app.post("/debug/memory_profile")
+async def memory_profile(file: UploadFile = File(...), tta: bool = False):
+    """
+    Runs prediction, report-image encoding and PDF rendering for the upload under tracemalloc and
+    RSS sampling, and returns the peak memory attributed to each stage. Profiled runs are serialized.
+    """
+    if not MEMORY_PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    contents = await _read_image_upload(file)
+    classifier = _get_classifier()
+
+    try:
+        report = await run_in_threadpool(profile_prediction, classifier, contents, tta)
+    except ValueError as ve:
+        return JSONResponse(status_code=400, content={"detail": str(ve)})
+    return JSONResponse(content=report)
+
+
 # ------------------------
 # Segmentation endpoint (still placeholder)
 # ------------------------
@@ -169,7 +565,7 @@ async def mri_prediction(file: UploadFile = File(...)):
 async def mri_segmentation(file: UploadFile = File(...)):
     if not file.content_type or not file.content_type.startswith("image/"):
         raise HTTPException(status_code=415, detail="Unsupported file type")
-    _ = await file.read()
+    _ = await _read_image_upload(file)
     return {
         "mask_url": "https://dummy.com/mask.png",
         "dice_coefficient": 0.87,
@@ -0,0 +1,217 @@
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from backend.models.classification.keras_classifier import _resolve_model_path
+
+logger = logging.getLogger(__name__)
+
+# Parquet needs pyarrow (listed in requirements.txt); on a host without it records go to gzip-compressed JSONL
+try:
+    import numpy as np
+    import pandas as pd
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+AUDIT_LOG_DIR = "artifacts/audit"
+# Records waiting to be written; when full, new records are dropped (and counted) rather than blocking a request
+AUDIT_QUEUE_SIZE = 10000
+# A batch is written when it reaches this many records or this age, whichever comes first
+AUDIT_FLUSH_RECORDS = 256
+AUDIT_FLUSH_SECONDS = 5.0
+# JSONL files are rotated past this size; Parquet files hold one flushed batch each
+AUDIT_ROTATE_BYTES = 64 * 1024 * 1024
+# Day directories older than this are deleted (None keeps everything)
+AUDIT_RETENTION_DAYS = None
+
+_STOP = object()
+
+
+class AuditLog:
+    """
+    Append-only prediction audit trail. record() only enqueues, so the request path never waits
+    on disk; a background thread batches records and writes them under <directory>/<YYYY-MM-DD>/,
+    as one Parquet file per batch or appended gzip members of a rotating JSONL file.
+    """
+
+    def __init__(self, directory: str = None, queue_size: int = AUDIT_QUEUE_SIZE,
+                 flush_records: int = AUDIT_FLUSH_RECORDS, flush_seconds: float = AUDIT_FLUSH_SECONDS,
+                 rotate_bytes: int = AUDIT_ROTATE_BYTES, retention_days: Optional[int] = AUDIT_RETENTION_DAYS,
+                 use_parquet: bool = None):
+        self.directory = Path(_resolve_model_path(directory or os.environ.get("NPX_AUDIT_DIR", AUDIT_LOG_DIR)))
+        self.flush_records = flush_records
+        self.flush_seconds = flush_seconds
+        self.rotate_bytes = rotate_bytes
+        self.retention_days = retention_days
+        self.use_parquet = PARQUET_AVAILABLE if use_parquet is None else use_parquet and PARQUET_AVAILABLE
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._sequence = 0
+        self._thread = threading.Thread(target=self._run, name="audit-log", daemon=True)
+        self._thread.start()
+
+    # --- Request side ---
+    def record(self, entry: Dict[str, Any]):
+        """Enqueues a record without blocking. Returns False if the buffer was full and it was dropped."""
+        entry.setdefault("timestamp", datetime.now().isoformat())
+        try:
+            self._queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Blocks until everything enqueued so far is on disk."""
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 10.0):
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"directory": str(self.directory), "format": "parquet" if self.use_parquet else "jsonl.gz",
+                "pending": self._queue.qsize(), "written": self.written, "dropped": self.dropped, "failed": self.failed}
+
+    # --- Writer thread ---
+    def _run(self):
+        batch, deadline = [], None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            waiters = []
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not None and item is not _STOP:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_seconds
+
+            due = item is None or item is _STOP or waiters or len(batch) >= self.flush_records
+            if batch and due:
+                self._write(batch)
+                batch, deadline = [], None
+            elif not batch:
+                deadline = None
+            for waiter in waiters:
+                waiter.set()
+            if item is _STOP:
+                return
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        day_dir = self.directory / datetime.now().strftime("%Y-%m-%d")
+        try:
+            day_dir.mkdir(parents=True, exist_ok=True)
+            if self.use_parquet:
+                self._sequence += 1
+                path = day_dir / f"audit-{datetime.now().strftime('%H%M%S')}-{os.getpid()}-{self._sequence:06d}.parquet"
+                pd.DataFrame.from_records(batch).to_parquet(path, index=False)
+            else:
+                path = self._current_jsonl(day_dir)
+                # Each flush appends one gzip member; concatenated members read back as one stream
+                with gzip.open(path, "at", encoding="utf-8") as f:
+                    f.writelines(json.dumps(entry, default=str) + "\n" for entry in batch)
+            self.written += len(batch)
+            self._apply_retention()
+        except Exception:
+            self.failed += len(batch)
+            logger.exception(f"Failed to write {len(batch)} audit records")
+
+    def _current_jsonl(self, day_dir: Path) -> Path:
+        """Newest JSONL file of this process for the day, or a new one once it passed rotate_bytes."""
+        prefix = f"audit-{os.getpid()}-"
+        existing = sorted(day_dir.glob(f"{prefix}*.jsonl.gz"))
+        if existing and existing[-1].stat().st_size < self.rotate_bytes:
+            return existing[-1]
+        index = int(existing[-1].name[len(prefix):].split(".")[0]) + 1 if existing else 0
+        return day_dir / f"{prefix}{index:04d}.jsonl.gz"
+
+    def _apply_retention(self):
+        if self.retention_days is None:
+            return
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).strftime("%Y-%m-%d")
+        for day_dir in self.directory.iterdir():
+            if day_dir.is_dir() and day_dir.name < cutoff:
+                shutil.rmtree(day_dir, ignore_errors=True)
+
+
+def _parquet_rows(path: Path) -> List[Dict[str, Any]]:
+    """Rows of a Parquet batch as plain records: list columns back to lists, missing values to None."""
+    df = pd.read_parquet(path)
+    rows = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+    return [{k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in row.items()} for row in rows]
+
+
+def _tail_rows(path: Path, keep, limit: int) -> List[Dict[str, Any]]:
+    """The last `limit` rows of one audit file accepted by `keep` (rows are appended oldest first)."""
+    if path.name.endswith(".parquet"):
+        return list(deque(filter(keep, _parquet_rows(path)), maxlen=limit))
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return list(deque(filter(keep, (json.loads(line) for line in f if line.strip())), maxlen=limit))
+
+
+def read_audit_records(directory: str = None, limit: int = 100, since: str = None,
+                       model_version: str = None) -> List[Dict[str, Any]]:
+    """
+    Reads the most recent audit records (newest first), optionally only those at or after the ISO
+    timestamp `since` and/or from one model version. Reads both Parquet and JSONL files, most
+    recently written first. A record is never newer than the last write of its file, so reading
+    stops once `limit` records newer than every remaining file are collected; at most `limit`
+    rows of each file are kept.
+    """
+    root = Path(_resolve_model_path(directory or os.environ.get("NPX_AUDIT_DIR", AUDIT_LOG_DIR)))
+    if limit <= 0 or not root.is_dir():
+        return []
+
+    def keep(r):
+        return (not since or r["timestamp"] >= since) and (not model_version or r.get("model_version") == model_version)
+
+    files = []
+    for path in root.glob("*/audit-*"):
+        if path.name.endswith(".jsonl.gz") or (path.name.endswith(".parquet") and PARQUET_AVAILABLE):
+            try:
+                files.append((path.stat().st_mtime, path.name, path))
+            except OSError:
+                # Removed by retention in the meantime
+                continue
+    files.sort(reverse=True)
+
+    records: List[Dict[str, Any]] = []
+    for mtime, _, path in files:
+        # Newest record the remaining files can hold
+        newest = datetime.fromtimestamp(mtime).isoformat()
+        if (since and newest < since) or (len(records) >= limit and records[-1]["timestamp"] >= newest):
+            break
+        try:
+            records.extend(_tail_rows(path, keep, limit))
+        except FileNotFoundError:
+            continue
+        # Files interleave (several workers, batches), so the order comes from the timestamps
+        records.sort(key=lambda r: r["timestamp"], reverse=True)
+        del records[limit:]
+    return records
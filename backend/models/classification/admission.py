@@ -0,0 +1,90 @@
+import io
+import os
+from typing import BinaryIO, Tuple
+
+from PIL import Image
+
+from .config import MAX_IMAGE_PIXELS, MAX_IMAGE_SIDE, MAX_UPLOAD_BYTES
+
+# Chunk size used when reading uploads
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# Same pixel budget for both decoders. PIL raises DecompressionBombError beyond twice this value and warns
+# above it; OpenCV refuses to decode beyond it (read lazily on its first decode, so this must run before).
+Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+os.environ.setdefault("OPENCV_IO_MAX_IMAGE_PIXELS", str(MAX_IMAGE_PIXELS))
+
+
+class UploadRejected(ValueError):
+    """An upload refused by the admission checks. `status_code` is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def check_dimensions(width: int, height: int):
+    """Raises UploadRejected (422) if an image of this size is over the side or pixel-count limit."""
+    if width <= 0 or height <= 0:
+        raise UploadRejected(f"Invalid image dimensions {width}x{height}.", 422)
+    if max(width, height) > MAX_IMAGE_SIDE:
+        raise UploadRejected(f"Image is {width}x{height}; the largest accepted side is {MAX_IMAGE_SIDE} px.", 422)
+    if width * height > MAX_IMAGE_PIXELS:
+        raise UploadRejected(
+            f"Image is {width}x{height} ({width * height} px); at most {MAX_IMAGE_PIXELS} px are accepted.", 422
+        )
+
+
+def check_image_header(data: bytes) -> Tuple[str, Tuple[int, int]]:
+    """
+    Parses only the image header (PIL opens lazily: no pixel data is decoded) and checks the
+    dimensions of every frame. Returns (format, (width, height)).
+    Raises ValueError for undecodable data and UploadRejected (422) for oversized images.
+    """
+    try:
+        img = Image.open(io.BytesIO(data))
+    except Image.DecompressionBombError as e:
+        raise UploadRejected(str(e), 422) from e
+    except Exception as e:
+        raise ValueError(f"Unable to open image: {e}") from e
+
+    with img:
+        check_dimensions(*img.size)
+        # Multi-frame containers (GIF, TIFF) could hide a larger frame behind a small first one
+        for frame in range(1, getattr(img, "n_frames", 1)):
+            img.seek(frame)
+            check_dimensions(*img.size)
+        return img.format, img.size
+
+
+async def read_upload(file, max_bytes: int = MAX_UPLOAD_BYTES, chunk_size: int = UPLOAD_CHUNK_BYTES) -> bytes:
+    """
+    Reads an UploadFile in chunks, refusing (413) as soon as more than max_bytes have been read,
+    so an oversized upload never sits in memory whole.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise UploadRejected(f"Upload is {file.size} bytes; the limit is {max_bytes}.", 413)
+
+    chunks, total = [], 0
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadRejected(f"Upload exceeds the {max_bytes} byte limit.", 413)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def copy_upload(source: BinaryIO, destination: BinaryIO, max_bytes: int, chunk_size: int = UPLOAD_CHUNK_BYTES) -> int:
+    """Copies an upload stream to a file in chunks, refusing (413) once more than max_bytes were copied."""
+    total = 0
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            return total
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadRejected(f"Upload exceeds the {max_bytes} byte limit.", 413)
+        destination.write(chunk)
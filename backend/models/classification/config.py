@@ -6,3 +6,45 @@ MODEL_PATH = "artifacts/classification/brain_tumor_xception_model.keras"
 
 # Class labels in the order determined by the Keras generator during training.
 CLASS_LABELS = ["Glioma Tumor", "Meningioma Tumor", "No Tumor", "Pituitary Tumor"]
+
+# Name of the nested backbone used as the Grad-CAM feature layer (overridden by the model's metadata sidecar).
+GRADCAM_LAYER = "xception"
+
+# Labelled sample scans (one folder per class) used by the offline tools.
+SAMPLES_DIR = "frontend/assets/samples"
+
+# Sample folders whose name differs from the class label they hold.
+SAMPLE_FOLDER_ALIASES = {"Healthy Control": "No Tumor"}
+
+# Test-time augmentation: horizontal flip x brightness factors (inside the training brightness_range of (0.8, 1.2)).
+TTA_BRIGHTNESS_FACTORS = (1.0, 0.9, 1.1)
+
+# Multi-slice volumes: slices per inference batch (a request may ask for up to MAX_VOLUME_BATCH_SIZE),
+# and how many suspicious slices the study summary lists.
+VOLUME_BATCH_SIZE = 8
+MAX_VOLUME_BATCH_SIZE = 64
+VOLUME_TOP_SLICES = 5
+
+# Predictions kept for the report and similar-case endpoints (keyed by the caller's session_id);
+# the least recently used session is evicted past this count.
+MAX_CACHED_SESSIONS = 256
+
+# Upload admission limits: bytes read per upload, and the largest image accepted for decoding
+# (checked from the header before any pixel is decoded; also enforced on the PIL and OpenCV decoders).
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+MAX_VOLUME_UPLOAD_BYTES = 512 * 1024 * 1024
+MAX_IMAGE_SIDE = 8192
+MAX_IMAGE_PIXELS = 25_000_000
+# Raw volume stacks (.npy/.npz): grayscale, RGB or RGBA slices of numeric data of at most 8 bytes, and this many
+# bytes per slice. Any volume (including multi-frame TIFFs) holds at most MAX_VOLUME_SLICES slices.
+VOLUME_CHANNELS = (1, 3, 4)
+MAX_VOLUME_SLICE_BYTES = 64 * 1024 * 1024
+MAX_VOLUME_SLICES = 1024
+
+# Screening cascade (a KerasClassifier with a `screener`): the small model answers on its own when its top
+# probability reaches CASCADE_THRESHOLD (a screener's metadata sidecar may carry a calibrated "cascade_threshold").
+# A "No Tumor" answer also needs CASCADE_SAFETY_THRESHOLD, since a missed tumor is the costly error.
+# Everything else escalates to the full model.
+CASCADE_THRESHOLD = 0.9
+CASCADE_SAFETY_LABEL = "No Tumor"
+CASCADE_SAFETY_THRESHOLD = 0.98
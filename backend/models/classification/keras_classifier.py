@@ -1,7 +1,10 @@
 import io
 import os
 from pathlib import Path
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, List, Optional, Tuple
+import json
+import threading
+import time
 import base64  # <-- NEW IMPORT for Grad-CAM
 import cv2  # <-- NEW IMPORT for Grad-CAM image processing
 from matplotlib import cm  # <-- NEW IMPORT for Grad-CAM color map
@@ -13,15 +16,25 @@ import logging
 # --- CRITICAL CHANGE: Direct Import of Local Config ---
 # We now import configuration variables directly from the new config.py in the same package
 try:
-    from .config import IMAGE_SIZE, MODEL_PATH, CLASS_LABELS
+    from .config import IMAGE_SIZE, MODEL_PATH, CLASS_LABELS, GRADCAM_LAYER, TTA_BRIGHTNESS_FACTORS
+    from .config import CASCADE_THRESHOLD, CASCADE_SAFETY_LABEL, CASCADE_SAFETY_THRESHOLD
 except ImportError:
     # Define fallback defaults if config is missing (for robust startup)
     IMAGE_SIZE = 299
     MODEL_PATH = "artifacts/classification/brain_tumor_xception_model.keras"  # Assume new location
     CLASS_LABELS = ["glioma", "meningioma", "notumor", "pituitary"]
+    GRADCAM_LAYER = "xception"
+    TTA_BRIGHTNESS_FACTORS = (1.0, 0.9, 1.1)
+    CASCADE_THRESHOLD = 0.9
+    CASCADE_SAFETY_LABEL = "No Tumor"
+    CASCADE_SAFETY_THRESHOLD = 0.98
     logging.warning("Failed to import config.py. Using hardcoded defaults.")
 # ------------------------------------------------------
 
+from .preprocessing import get_preprocessor
+from .snapshot import _file_digest, load_snapshot, snapshot_dir_for
+from backend.models.profiling import profile_stage
+
 logger = logging.getLogger(__name__)
 
 
@@ -45,18 +58,88 @@ def _resolve_model_path(relative_path: str) -> str:
     return str(absolute_path)
 
 
-class KerasClassifier:
-    def __init__(self, model_path: str = None, image_size: int = None, class_labels=None, device: str = None):
-        # Use imported constants as defaults
-        self.image_size = image_size or IMAGE_SIZE
-        self.class_labels = class_labels or CLASS_LABELS
+def _load_model_metadata(model_path: str) -> Dict[str, Any]:
+    """
+    Loads the serving metadata sidecar written by the training pipeline next to the model
+    (e.g. student.keras -> student.json). Returns an empty dict if there is none.
+    """
+    sidecar = Path(model_path).with_suffix(".json")
+    if not sidecar.exists():
+        return {}
+    try:
+        with open(sidecar, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable model metadata {sidecar}: {e}")
+        return {}
+
+
+def resolve_label_index(class_labels: List[str], label: str) -> Optional[int]:
+    """
+    Index of `label` among class_labels, ignoring case, spaces and punctuation, so that the display
+    names ("No Tumor") and the training folder names ("notumor") resolve to the same class.
+    """
+    def key(name):
+        return "".join(c for c in str(name).lower() if c.isalnum())
+
+    keys = [key(name) for name in class_labels]
+    return keys.index(key(label)) if key(label) in keys else None
+
+
+def cascade_escalation_reason(probs, threshold: float, safety_index: Optional[int],
+                              safety_threshold: float = CASCADE_SAFETY_THRESHOLD) -> Optional[str]:
+    """
+    Decides whether a screener prediction may stand. Returns None if it may, otherwise why the
+    request escalates to the full model: "low_confidence" (top probability below `threshold`) or
+    "safety_rule" (an answer of class `safety_index` below the stricter `safety_threshold`).
+    """
+    top_idx = int(np.argmax(probs))
+    confidence = float(probs[top_idx])
+    if confidence < threshold:
+        return "low_confidence"
+    if top_idx == safety_index and confidence < safety_threshold:
+        return "safety_rule"
+    return None
 
+
+class KerasClassifier:
+    def __init__(self, model_path: str = None, image_size: int = None, class_labels=None, device: str = None,
+                 use_snapshot: bool = True, screener: "KerasClassifier" = None, cascade_threshold: float = None):
         # Resolve path: use the user-provided path or the path from config.py
         effective_model_path = model_path or MODEL_PATH
         self.model_path = _resolve_model_path(effective_model_path)
 
+        # Explicit arguments win, then the model's own metadata, then the imported constants
+        self.metadata = _load_model_metadata(self.model_path)
+        self.image_size = image_size or self.metadata.get("image_size") or IMAGE_SIZE
+        self.class_labels = class_labels or self.metadata.get("class_labels") or CLASS_LABELS
+        self.gradcam_layer = self.metadata.get("gradcam_layer") or GRADCAM_LAYER
+
+        # Decode/resize pipeline shared with every other model of the same input size
+        self.preprocessor = get_preprocessor(self.image_size)
+
         self._model = None
+        self._embedding_model = None
+        self._gradcam_models = {}
         self._loaded = False
+        # Set on load: metadata "version" if present, else a digest of the artifact
+        self.model_version = None
+        # Prefer the precompiled snapshot (<model>.snapshot/, see snapshot.py) when it matches the artifact
+        self.use_snapshot = use_snapshot
+        self.load_source = None
+        self.load_seconds = None
+        # Optional cascade: a small screening model answers confident cases first (see _screen).
+        # The threshold comes from the argument, then the screener's metadata (calibrate-cascade), then config.
+        self.screener = screener
+        self.cascade_threshold = cascade_threshold
+        if self.cascade_threshold is None and screener is not None:
+            self.cascade_threshold = screener.metadata.get("cascade_threshold")
+        if self.cascade_threshold is None:
+            self.cascade_threshold = CASCADE_THRESHOLD
+        # Class the safety rule applies to, resolved once (warm_up fails if the labels lack it)
+        self.cascade_safety_index = resolve_label_index(self.class_labels, CASCADE_SAFETY_LABEL)
+        self.cascade_stats = {"screener": 0, "full": 0}
+        self._cascade_lock = threading.Lock()
         logger.info(f"KerasClassifier initialized. Will load model from: {self.model_path}")
 
     def _load_model(self):
@@ -64,6 +147,18 @@ class KerasClassifier:
         if self._loaded:
             return
         try:
+            start = time.perf_counter()
+            # Precompiled snapshot: no Keras deserialization, no patches, endpoints already traced
+            snapshot = load_snapshot(snapshot_dir_for(self.model_path), self.model_path, self.image_size) if self.use_snapshot else None
+            if snapshot is not None:
+                self._model = snapshot
+                self.model_version = self.metadata.get("version") or snapshot.manifest["source_sha256"][:12]
+                self._loaded = True
+                self.load_source = "snapshot"
+                self.load_seconds = time.perf_counter() - start
+                logger.info(f"Model snapshot loaded in {self.load_seconds:.2f}s.")
+                return
+
             # We delay the TF import to allow the class to be instantiated without TF being installed
             import tensorflow as tf
             import keras
@@ -103,37 +198,51 @@ class KerasClassifier:
 
             # Ensure Keras/TF knows where to load the model
             self._model = load_model(self.model_path, compile=False)
+            self.model_version = self.metadata.get("version") or _file_digest(self.model_path)[:12]
             self._loaded = True
-            logger.info("Keras model loaded successfully.")
+            self.load_source = "keras"
+            self.load_seconds = time.perf_counter() - start
+            logger.info(f"Keras model loaded successfully in {self.load_seconds:.2f}s.")
         except Exception as e:
             logger.exception("Failed to load Keras model")
             raise
 
+    def memory_bytes(self) -> int:
+        """Approximate resident size of the loaded weights (float32), used for memory budgeting."""
+        if not self._loaded:
+            return 0
+        screener_bytes = self.screener.memory_bytes() if self.screener is not None else 0
+        return int(self._model.count_params()) * 4 + screener_bytes
+
     # <--- NEW GRAD-CAM METHOD START --->
     def _get_gradcam_heatmap(self, preprocessed_input, last_conv_layer_name, pred_index=None) -> np.ndarray:
         """Generates the Grad-CAM heatmap."""
         import tensorflow as tf
 
-        # 1. Create a model that maps the input image to the activations of the last
-        #    convolutional layer and the final prediction output.
-        grad_model = tf.keras.models.Model(
-            self._model.inputs,
-            [self._model.get_layer(last_conv_layer_name).output, self._model.output]
-        )
+        if self.load_source == "snapshot":
+            # The snapshot's traced gradcam endpoint returns the feature map and its gradients
+            # (it was exported for the metadata's Grad-CAM layer)
+            if pred_index is None:
+                pred_index = int(np.argmax(self._model.predict(preprocessed_input)[0]))
+            last_conv_layer_output, grads, _ = self._model.gradcam(preprocessed_input, pred_index)
+        else:
+            # 1. A model that maps the input image to the activations of the last
+            #    convolutional layer and the final prediction output (built once per layer name).
+            grad_model = self._get_gradcam_model(last_conv_layer_name)
 
-        with tf.GradientTape() as tape:
-            last_conv_layer_output, preds = grad_model(preprocessed_input)
+            with tf.GradientTape() as tape:
+                last_conv_layer_output, preds = grad_model(preprocessed_input)
 
-            # If no specific index is passed (e.g., to explain the predicted class)
-            if pred_index is None:
-                pred_index = tf.argmax(preds[0])
+                # If no specific index is passed (e.g., to explain the predicted class)
+                if pred_index is None:
+                    pred_index = tf.argmax(preds[0])
 
-            # 2. Get the score of the predicted class
-            class_channel = preds[:, pred_index]
+                # 2. Get the score of the predicted class
+                class_channel = preds[:, pred_index]
 
-        # 3. Compute the gradient of the predicted class score with respect to
-        #    the output feature map of the last convolutional layer.
-        grads = tape.gradient(class_channel, last_conv_layer_output)
+            # 3. Compute the gradient of the predicted class score with respect to
+            #    the output feature map of the last convolutional layer.
+            grads = tape.gradient(class_channel, last_conv_layer_output)
 
         # 4. Compute the 'Global Average Pooling' (or Mean) of the gradients
         #    over the spatial dimensions (H, W) to get the 'weights'
@@ -155,60 +264,176 @@ class KerasClassifier:
 
         return heatmap
 
-    def predict_with_gradcam(self, file_bytes: bytes) -> Dict[str, Any]:
+    def _get_gradcam_model(self, layer_name: str):
+        """
+        Builds (once) a model returning [last spatial feature map, class probabilities].
+        When `layer_name` is a nested backbone (e.g. 'xception', which ends in global pooling),
+        its last 4D layer is tapped. The Sequential layers are re-applied to a fresh Input because a
+        loaded Sequential model has no symbolic outputs; weights are shared.
+        """
+        if layer_name not in self._gradcam_models:
+            import tensorflow as tf
+
+            target = self._model.get_layer(layer_name)
+            tap = None
+            if isinstance(target, tf.keras.Model):
+                feature_layer = [l for l in target.layers if len(l.output.shape) == 4][-1]
+                tap = tf.keras.models.Model(target.inputs, [feature_layer.output, target.output])
+
+            inputs = tf.keras.Input(shape=(self.image_size, self.image_size, 3))
+            h, features = inputs, None
+            for layer in self._model.layers:
+                if layer is target and tap is not None:
+                    features, h = tap(h)
+                else:
+                    h = layer(h)
+                    if layer is target:
+                        features = h
+            self._gradcam_models[layer_name] = tf.keras.models.Model(inputs, [features, h])
+        return self._gradcam_models[layer_name]
+
+    def warm_up(self, images: List[Image.Image], expected_labels: List[str] = None) -> Dict[str, Any]:
+        """
+        Loads the model and runs every serving path once (batched prediction, embedding and
+        Grad-CAM), so that graph tracing happens here rather than on the first requests.
+        Raises ValueError if the output shape or labels don't match `expected_labels`.
+        """
+        self._load_model()
+        expected = list(expected_labels) if expected_labels is not None else None
+
+        if expected is not None and list(self.class_labels) != expected:
+            raise ValueError(f"Model labels {self.class_labels} do not match the expected labels {expected}.")
+
+        embeddings, preds = self.embed_images(images)
+        if preds.ndim != 2 or preds.shape != (len(images), len(self.class_labels)):
+            raise ValueError(f"Unexpected output shape {preds.shape} for {len(images)} images "
+                             f"and {len(self.class_labels)} classes.")
+
+        # Grad-CAM is optional for serving (failures only drop the heatmap), so it doesn't fail validation
+        try:
+            self._get_gradcam_heatmap(self._preprocess(images[0]), self.gradcam_layer)
+        except Exception as e:
+            logger.warning(f"Grad-CAM warm-up failed: {e}")
+
+        # The screener answers for this model, so it has to use the same labels
+        if self.screener is not None:
+            if self.cascade_safety_index is None:
+                raise ValueError(f"Cascade safety label '{CASCADE_SAFETY_LABEL}' is not one of the labels {self.class_labels}.")
+            self.screener.warm_up(images, expected_labels=self.class_labels)
+
+        return {"model_version": self.model_version, "output_shape": list(preds.shape),
+                "embedding_dim": int(embeddings.shape[-1])}
+
+    def predict_with_gradcam(self, file_bytes: bytes, include_embedding: bool = False, tta: bool = False) -> Dict[str, Any]:
         """
         Runs prediction and generates the Grad-CAM heatmap, returning results
         and the heatmap as a Base64-encoded JPEG image string.
+        With include_embedding=True the penultimate embedding (np.ndarray) from the same forward
+        pass is added under "embedding"; callers must pop it before JSON serialization.
+        With tta=True the probabilities are aggregated over augmented views (see _predict_image).
+        With a screener, confident cases are answered by it (see _screen) and the result's "cascade"
+        records which stage answered; TTA requests always go to this model.
         """
         # 1. Prediction and Preprocessing
-        self.validate_is_mri(file_bytes)  # <--- Validation Check
+        with profile_stage("predict.validate"):
+            self.validate_is_mri(file_bytes)  # <--- Validation Check
 
-        self._load_model()
+        cascade = None
+        if self.screener is not None and not tta:
+            with profile_stage("predict.screen"):
+                screened, cascade = self._screen(file_bytes, include_embedding)
+            if screened is not None:
+                return screened
 
-        # We need the original image for the overlay later
-        img_original = Image.open(io.BytesIO(file_bytes)).convert("RGB")
+        self._load_model()
 
-        # Get preprocessed array (1, H, W, C)
-        x = self._preprocess(img_original)
+        # We need the original image for the overlay later, plus the preprocessed array (1, H, W, C)
+        with profile_stage("predict.decode"):
+            img_original, x = self.preprocessor.from_bytes(file_bytes)
 
-        # Predict to get the class index
-        preds = self._model.predict(x, verbose=0)
-        top_idx = int(np.argmax(np.squeeze(preds)))
+        # Single forward pass for the class probabilities (and embedding)
+        with profile_stage("predict.forward"):
+            results, embedding = self._predict_image(x, with_embedding=include_embedding, tta=tta)
+        top_idx = int(np.argmax([c["confidence"] for c in results["all_classes"]]))
+        if include_embedding:
+            results["embedding"] = embedding
 
-        # Get standard prediction results using the existing method (or copy logic)
-        results = self.predict_from_bytes(file_bytes)
+        self._attach_gradcam(results, img_original, x, top_idx)
+        if cascade is not None:
+            results["cascade"] = cascade
+        return results
 
+    def _screen(self, file_bytes: bytes, include_embedding: bool = False):
+        """
+        Runs the screening model on an (already validated) upload. Returns (result, cascade) when the
+        screener may answer, with its own Grad-CAM (and embedding), or (None, cascade) when the request
+        escalates. `cascade` records the stage that answers, the reason and the screener's prediction.
+        """
+        screener = self.screener
+        start = time.perf_counter()
+        screener._load_model()
+        img_original, x = screener.preprocessor.from_bytes(file_bytes)
+        results, embedding = screener._predict_image(x, with_embedding=include_embedding)
+        probs = [c["confidence"] for c in results["all_classes"]]
+        reason = cascade_escalation_reason(probs, self.cascade_threshold, self.cascade_safety_index)
+        if self.cascade_safety_index is None:
+            # Without a resolved safety class the screener could wave through a missed tumor
+            reason = reason or "safety_rule"
+
+        cascade = {
+            "stage": "full" if reason else "screener",
+            "reason": reason or "confident",
+            "threshold": self.cascade_threshold,
+            "screener_class": results["class"],
+            "screener_confidence": results["confidence"],
+            "screener_version": screener.model_version,
+            "screener_ms": (time.perf_counter() - start) * 1000.0,
+        }
+        with self._cascade_lock:
+            self.cascade_stats[cascade["stage"]] += 1
+        if reason:
+            return None, cascade
+
+        if include_embedding:
+            results["embedding"] = embedding
+        screener._attach_gradcam(results, img_original, x, int(np.argmax(probs)))
+        results["note"] += " | Answered by the screening model."
+        results["cascade"] = cascade
+        return results, cascade
+
+    def _attach_gradcam(self, results: Dict[str, Any], img_original: Image.Image, x: np.ndarray, top_idx: int):
+        """Adds the Grad-CAM overlay of the top class ("gradcam_b64") to a prediction result."""
         try:
             # 2. Grad-CAM Generation
-            # --- IMPORTANT: Find the name of your last Conv layer! ---
-            # A common name for Xception is 'block14_sepconv2_act'. Check your model summary!
-            LAST_CONV_LAYER_NAME = "xception" # This might be the name of the nested functional model if wrapping
-
-            # Try to handle potential nested model naming issues or find the real last layer
-            # For now, we attempt with the provided name, but catch errors safely.
-            heatmap = self._get_gradcam_heatmap(x, LAST_CONV_LAYER_NAME, pred_index=top_idx)
+            # The feature layer is the nested backbone ('xception' by default, or the name stored
+            # in the model's metadata sidecar for other backbones).
+            # We catch errors safely so the user still gets the text prediction.
+            with profile_stage("predict.gradcam"):
+                heatmap = self._get_gradcam_heatmap(x, self.gradcam_layer, pred_index=top_idx)
             
             # 3. Overlay and Encoding
-            # Resize heatmap to match original image size for overlay
-            heatmap_resized = cv2.resize(heatmap, (img_original.width, img_original.height))
-    
-            # Convert heatmap array to a colored image (using jet colormap)
-            cmap = cm.get_cmap("jet")
-            # Get RGB channels and convert to 0-255 range
-            heatmap_colored = cmap(heatmap_resized)[:, :, :3]
-            heatmap_colored = (heatmap_colored * 255).astype(np.uint8)
-    
-            # Convert PIL image to OpenCV BGR format (needed for weighted overlay)
-            img_cv2 = cv2.cvtColor(np.array(img_original), cv2.COLOR_RGB2BGR)
-    
-            # Create a weighted overlay (0.6 for MRI image, 0.4 for heatmap)
-            overlay = cv2.addWeighted(img_cv2, 0.6, heatmap_colored, 0.4, 0)
+            with profile_stage("predict.overlay"):
+                # Resize heatmap to match original image size for overlay
+                heatmap_resized = cv2.resize(heatmap, (img_original.width, img_original.height))
+        
+                # Convert heatmap array to a colored image (using jet colormap)
+                cmap = cm.get_cmap("jet")
+                # Get RGB channels and convert to 0-255 range
+                heatmap_colored = cmap(heatmap_resized)[:, :, :3]
+                heatmap_colored = (heatmap_colored * 255).astype(np.uint8)
+        
+                # Convert PIL image to OpenCV BGR format (needed for weighted overlay)
+                img_cv2 = cv2.cvtColor(np.array(img_original), cv2.COLOR_RGB2BGR)
+        
+                # Create a weighted overlay (0.6 for MRI image, 0.4 for heatmap)
+                overlay = cv2.addWeighted(img_cv2, 0.6, heatmap_colored, 0.4, 0)
     
             # 4. Encode the result (original + overlay) to Base64 JPEG
-            # Encode as JPEG bytes
-            _, buffer = cv2.imencode('.jpeg', overlay, [int(cv2.IMWRITE_JPEG_QUALITY), 90])
-            # Convert bytes to Base64 string for JSON transport
-            gradcam_b64 = base64.b64encode(buffer).decode("utf-8")
+            with profile_stage("predict.encode"):
+                # Encode as JPEG bytes
+                _, buffer = cv2.imencode('.jpeg', overlay, [int(cv2.IMWRITE_JPEG_QUALITY), 90])
+                # Convert bytes to Base64 string for JSON transport
+                gradcam_b64 = base64.b64encode(buffer).decode("utf-8")
     
             results["gradcam_b64"] = gradcam_b64
             results["note"] += " | Grad-CAM heatmap included."
@@ -219,34 +444,6 @@ class KerasClassifier:
             results["note"] += " | Grad-CAM skipped due to error."
             # We purposely do NOT raise here, so the user at least gets the text prediction.
 
-        return results
-
-        # 3. Overlay and Encoding
-        # Resize heatmap to match original image size for overlay
-        heatmap_resized = cv2.resize(heatmap, (img_original.width, img_original.height))
-
-        # Convert heatmap array to a colored image (using jet colormap)
-        cmap = cm.get_cmap("jet")
-        # Get RGB channels and convert to 0-255 range
-        heatmap_colored = cmap(heatmap_resized)[:, :, :3]
-        heatmap_colored = (heatmap_colored * 255).astype(np.uint8)
-
-        # Convert PIL image to OpenCV BGR format (needed for weighted overlay)
-        img_cv2 = cv2.cvtColor(np.array(img_original), cv2.COLOR_RGB2BGR)
-
-        # Create a weighted overlay (0.6 for MRI image, 0.4 for heatmap)
-        overlay = cv2.addWeighted(img_cv2, 0.6, heatmap_colored, 0.4, 0)
-
-        # 4. Encode the result (original + overlay) to Base64 JPEG
-        # Encode as JPEG bytes
-        _, buffer = cv2.imencode('.jpeg', overlay, [int(cv2.IMWRITE_JPEG_QUALITY), 90])
-        # Convert bytes to Base64 string for JSON transport
-        gradcam_b64 = base64.b64encode(buffer).decode("utf-8")
-
-        results["gradcam_b64"] = gradcam_b64
-        results["note"] += " | Grad-CAM heatmap included."
-        return results
-
     # <--- NEW GRAD-CAM METHOD END --->
 
     # <--- NEW GRAD-CAM METHOD END --->
@@ -320,57 +517,138 @@ class KerasClassifier:
             pass
 
     def _preprocess(self, pil_image: Image.Image) -> Any:
-        # ... existing _preprocess method (keep as is) ...
-        try:
-            from tensorflow.keras.preprocessing.image import img_to_array
-        except Exception as e:
-            raise RuntimeError("TensorFlow/Keras is required for preprocessing. Install tensorflow.") from e
-
-        # Ensure RGB
-        if pil_image.mode != "RGB":
-            pil_image = pil_image.convert("RGB")
+        # Resize + rescale to [0, 1] (rescale=1./255 from notebook), shared per input size
+        return self.preprocessor.preprocess(pil_image)
 
-        # Resize to target size
-        pil_image = pil_image.resize((self.image_size, self.image_size))
+    def predict_from_bytes(self, file_bytes: bytes, tta: bool = False) -> Dict[str, Any]:
+        """
+        Accept raw image bytes, run prediction, and return structured results
+        including all class probabilities for front-end analysis.
+        With tta=True, augmented views are predicted in one batch and aggregated.
+        """
+        # Validate and open image (decode/resize may come from the shared preprocessor's cache)
+        x = self.preprocessor.to_array(file_bytes)
 
-        # Convert to array (HWC)
-        arr = img_to_array(pil_image)
+        self.validate_is_mri(file_bytes)  # <--- Validation Check
+        self._load_model()
 
-        # ***CRITICAL FIX: Explicitly cast to float32 to match Keras generator output***
-        arr = arr.astype(np.float32)
+        # Predict
+        results, _ = self._predict_image(x, tta=tta)
+        return results
 
-        # Rescale to [0, 1] (rescale=1./255 from notebook)
-        arr = arr / 255.0
+    def predict_with_embedding(self, file_bytes: bytes, tta: bool = False) -> Tuple[Dict[str, Any], np.ndarray]:
+        """
+        Same as predict_from_bytes, but also returns the penultimate embedding
+        (input of the final Dense layer) computed in the same forward pass.
+        """
+        x = self.preprocessor.to_array(file_bytes)
 
-        # Add batch dimension (1,H,W,C)
-        arr = np.expand_dims(arr, axis=0)
+        self.validate_is_mri(file_bytes)
+        self._load_model()
 
-        return arr
+        return self._predict_image(x, with_embedding=True, tta=tta)
 
-    def predict_from_bytes(self, file_bytes: bytes) -> Dict[str, Any]:
+    def predict_images(self, pil_images) -> List[Dict[str, Any]]:
         """
-        Accept raw image bytes, run prediction, and return structured results
-        including all class probabilities for front-end analysis.
+        Batched forward pass over already-decoded images (no MRI validation), using the same
+        preprocessing as single-image serving. Returns one result dictionary per image.
         """
-        # ... existing predict_from_bytes method (keep as is) ...
-        # Validate and open image
-        try:
-            img = Image.open(io.BytesIO(file_bytes))
-        except Exception as e:
-            raise ValueError(f"Unable to open image: {e}") from e
+        self._load_model()
+        x = np.concatenate([self._preprocess(img) for img in pil_images], axis=0)
+        preds, _ = self._predict_array(x)
+        return [self._format_result(p) for p in preds]
 
-        self.validate_is_mri(file_bytes)  # <--- Validation Check
+    def embed_images(self, pil_images) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Batched forward pass over already-decoded images (no MRI validation).
+        Returns (embeddings (N, D), probabilities (N, C)).
+        """
         self._load_model()
-        x = self._preprocess(img)
+        x = np.concatenate([self._preprocess(img) for img in pil_images], axis=0)
+        preds, embeddings = self._predict_array(x, with_embedding=True)
+        return embeddings, preds
 
-        # Predict
+    def _get_embedding_model(self):
+        """
+        Builds (once) a model sharing the classifier's weights that outputs
+        [penultimate embedding, class probabilities]. For the Sequential head this is the
+        Dense(128) output (the trailing Dropout is an identity at inference).
+        """
+        if self._embedding_model is None:
+            import tensorflow as tf
+
+            # A loaded Sequential model has no symbolic outputs until called,
+            # so the layers are re-applied to a fresh Input (weights are shared).
+            inputs = tf.keras.Input(shape=(self.image_size, self.image_size, 3))
+            h = inputs
+            for layer in self._model.layers[:-1]:
+                h = layer(h)
+            outputs = self._model.layers[-1](h)
+            self._embedding_model = tf.keras.models.Model(inputs, [h, outputs])
+        return self._embedding_model
+
+    def _predict_array(self, x, with_embedding: bool = False):
+        """Runs the model on a preprocessed batch. Returns (preds, embeddings or None)."""
         try:
             # verbose=0 matches notebook single-image prediction style
-            preds = self._model.predict(x, verbose=0)
+            if with_embedding:
+                if self.load_source == "snapshot":
+                    embeddings, preds = self._model.serve(x)
+                else:
+                    embeddings, preds = self._get_embedding_model().predict(x, verbose=0)
+                return preds, embeddings
+            return self._model.predict(x, verbose=0), None
         except Exception as e:
             logger.exception("Model prediction failed")
             raise RuntimeError("Model prediction failed") from e
 
+    def _tta_views(self, x: np.ndarray) -> np.ndarray:
+        """
+        Stacks the test-time augmentation views of a preprocessed (1, H, W, C) image into one
+        (N, H, W, C) batch: {original, horizontal flip} x TTA_BRIGHTNESS_FACTORS.
+        The first view is always the un-augmented image.
+        """
+        image = x[0]
+        views = []
+        for base in (image, image[:, ::-1, :]):
+            for factor in TTA_BRIGHTNESS_FACTORS:
+                views.append(base if factor == 1.0 else np.clip(base * factor, 0.0, 1.0))
+        return np.stack(views).astype(np.float32)
+
+    def _predict_image(self, x: np.ndarray, with_embedding: bool = False, tta: bool = False):
+        """
+        Predicts one preprocessed image (1, H, W, C) and returns (results, embedding or None).
+        With tta=True all augmented views go through a single batched forward pass; the result holds
+        the mean probabilities plus a per-class standard deviation and a view-agreement score.
+        The embedding is always the one of the un-augmented view.
+        """
+        batch = self._tta_views(x) if tta else x
+        preds, embeddings = self._predict_array(batch, with_embedding=with_embedding)
+        embedding = embeddings[0] if with_embedding else None
+
+        if not tta:
+            return self._format_result(preds), embedding
+
+        preds = np.asarray(preds, dtype=np.float32)
+        results = self._format_result(preds.mean(axis=0))
+        std = preds.std(axis=0)
+        for i, item in enumerate(results["all_classes"]):
+            item["std"] = float(std[i])
+
+        # Fraction of views whose top class matches the aggregated top class
+        top_idx = int(np.argmax(preds.mean(axis=0)))
+        agreement = float(np.mean(np.argmax(preds, axis=1) == top_idx))
+        results["tta"] = {
+            "views": int(preds.shape[0]),
+            "agreement": agreement,
+            "disagreement": 1.0 - agreement,
+            "max_std": float(std.max()),
+        }
+        results["note"] += f" | TTA over {preds.shape[0]} views."
+        return results, embedding
+
+    def _format_result(self, preds) -> Dict[str, Any]:
+        """Turns the model output for one image into the response dictionary."""
         # Process predictions
         probs = np.squeeze(preds)
 
@@ -402,7 +680,8 @@ class KerasClassifier:
             "class": top_label,
             "confidence": top_confidence,
             "note": "Prediction successful with fixed preprocessing. Ensure model file is correct.",
-            "all_classes": full_results
+            "all_classes": full_results,
+            "model_version": self.model_version
         }
 
     def get_preprocessed_image_bytes(self, file_bytes: bytes) -> bytes:
@@ -413,20 +692,23 @@ class KerasClassifier:
         # Validate and open image
         try:
             # Note: We convert to RGB immediately, which is crucial for consistency.
-            img = Image.open(io.BytesIO(file_bytes)).convert("RGB")
+            # The resized array is shared with the prediction that just ran on the same bytes.
+            with profile_stage("preprocessed.decode"):
+                pixels = self.preprocessor.resized_from_bytes(file_bytes)
         except Exception as e:
             # Raise a specific ValueError if the image cannot be opened
             raise ValueError(f"Unable to open or process image for visualization: {e}") from e
 
-        # 1. Apply the preprocessing steps (resize/convert)
-        # We only need the PIL image output, resized to the model's required dimensions.
-        pil_image = img.resize((self.image_size, self.image_size)).convert("RGB")
+        with profile_stage("preprocessed.encode"):
+            # 1. Apply the preprocessing steps (resize/convert)
+            # We only need the PIL image output, resized to the model's required dimensions.
+            pil_image = Image.fromarray(pixels, mode="RGB")
 
-        # 2. Save the PIL image to a buffer as JPEG
-        output_buffer = io.BytesIO()
-        # Save as JPEG with high quality to minimize visual artifacts in the PDF
-        pil_image.save(output_buffer, format="JPEG", quality=95)
-        output_buffer.seek(0)
+            # 2. Save the PIL image to a buffer as JPEG
+            output_buffer = io.BytesIO()
+            # Save as JPEG with high quality to minimize visual artifacts in the PDF
+            pil_image.save(output_buffer, format="JPEG", quality=95)
+            output_buffer.seek(0)
 
         # 3. Return the raw bytes
         return output_buffer.read()
@@ -0,0 +1,125 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .admission import check_image_header
+
+# Resized pixels of recent inputs kept per preprocessor, so that several models (or endpoints) looking at the
+# same upload decode and resize it only once. Only the (H, W, 3) uint8 image at the model's input size is kept,
+# never the full-resolution decode; 0 disables the cache.
+DEFAULT_CACHE_SIZE = 4
+
+
+class ImagePreprocessor:
+    """
+    Decode -> RGB -> resize -> float32 / 255 pipeline for one input size.
+    Instances are shared (see get_preprocessor) by every model that uses that size.
+    Returned uint8 images may be cached and shared between callers: treat them as read-only.
+    """
+
+    def __init__(self, image_size: int, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.image_size = image_size
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resize(self, pil_image: Image.Image) -> np.ndarray:
+        """Turns a PIL image into an (H, W, 3) uint8 RGB array at the input size."""
+        # Ensure RGB
+        if pil_image.mode != "RGB":
+            pil_image = pil_image.convert("RGB")
+
+        # Resize to target size
+        return np.asarray(pil_image.resize((self.image_size, self.image_size)))
+
+    @staticmethod
+    def rescale(pixels: np.ndarray) -> np.ndarray:
+        """(H, W, 3) uint8 -> (1, H, W, 3) float32 batch in [0, 1] (rescale=1./255 from notebook)."""
+        # float32 to match the Keras generator output; the batch is a fresh array
+        return np.expand_dims(pixels.astype(np.float32) / 255.0, axis=0)
+
+    def preprocess(self, pil_image: Image.Image) -> np.ndarray:
+        """Turns a PIL image into a (1, H, W, C) float32 batch in [0, 1]."""
+        return self.rescale(self.resize(pil_image))
+
+    @staticmethod
+    def _decode(file_bytes: bytes) -> Image.Image:
+        # Dimensions are checked from the header before anything is decoded
+        check_image_header(file_bytes)
+        try:
+            return Image.open(io.BytesIO(file_bytes)).convert("RGB")
+        except Exception as e:
+            raise ValueError(f"Unable to open image: {e}") from e
+
+    def _cached_pixels(self, file_bytes: bytes, use_cache: bool, img: Image.Image = None) -> np.ndarray:
+        # The bytes are only hashed when the cache is used
+        key = hashlib.sha1(file_bytes).digest() if use_cache and self.cache_size > 0 else None
+        if key is not None:
+            with self._lock:
+                pixels = self._cache.get(key)
+                if pixels is not None:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return pixels
+                self.misses += 1
+
+        pixels = self.resize(img if img is not None else self._decode(file_bytes))
+        if key is not None:
+            with self._lock:
+                self._cache[key] = pixels
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return pixels
+
+    def resized_from_bytes(self, file_bytes: bytes, use_cache: bool = True) -> np.ndarray:
+        """
+        Decodes raw image bytes and resizes them to the input size: (H, W, 3) uint8, from the cache when
+        the same bytes were seen recently. Batch callers that see every input once pass use_cache=False,
+        which also skips hashing the bytes.
+        Raises ValueError if the bytes can't be decoded or the image is over the admission limits.
+        """
+        return self._cached_pixels(file_bytes, use_cache)
+
+    def to_array(self, file_bytes: bytes, use_cache: bool = True) -> np.ndarray:
+        """Same as resized_from_bytes, as the (1, H, W, C) float32 model input."""
+        return self.rescale(self._cached_pixels(file_bytes, use_cache))
+
+    def from_bytes(self, file_bytes: bytes, use_cache: bool = True) -> Tuple[Image.Image, np.ndarray]:
+        """
+        Same as to_array, for callers that also need the full-resolution decode (e.g. for the Grad-CAM
+        overlay). Returns (RGB PIL image, (1, H, W, C) batch). The image is always decoded and never cached.
+        """
+        img = self._decode(file_bytes)
+        return img, self.rescale(self._cached_pixels(file_bytes, use_cache, img))
+
+    def clear(self):
+        """Drops the cached images (e.g. so that a measurement sees a cold decode)."""
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"image_size": self.image_size, "cached": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+_PREPROCESSORS: Dict[int, ImagePreprocessor] = {}
+_PREPROCESSORS_LOCK = threading.Lock()
+
+
+def get_preprocessor(image_size: int) -> ImagePreprocessor:
+    """Returns the process-wide preprocessor for `image_size`, creating it on first use."""
+    with _PREPROCESSORS_LOCK:
+        if image_size not in _PREPROCESSORS:
+            _PREPROCESSORS[image_size] = ImagePreprocessor(image_size)
+        return _PREPROCESSORS[image_size]
+
+
+def preprocessor_stats():
+    with _PREPROCESSORS_LOCK:
+        return [p.stats() for p in _PREPROCESSORS.values()]
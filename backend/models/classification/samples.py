@@ -0,0 +1,47 @@
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .config import SAMPLES_DIR, SAMPLE_FOLDER_ALIASES
+from .keras_classifier import _resolve_model_path
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff"}
+
+
+def iter_labelled_images(root: str = None) -> Iterator[Tuple[Path, str]]:
+    """
+    Walks a class-folder directory (same layout as frontend/assets/samples) and yields
+    (image_path, class_label) pairs in a stable order. Folder names are mapped to
+    CLASS_LABELS through SAMPLE_FOLDER_ALIASES (e.g. "Healthy Control" -> "No Tumor").
+    """
+    root_path = Path(_resolve_model_path(root or SAMPLES_DIR))
+    if not root_path.is_dir():
+        raise FileNotFoundError(f"Sample directory not found at: {root_path}")
+
+    for class_dir in sorted(p for p in root_path.iterdir() if p.is_dir()):
+        label = SAMPLE_FOLDER_ALIASES.get(class_dir.name, class_dir.name)
+        for image_path in sorted(class_dir.iterdir()):
+            if image_path.suffix.lower() in IMAGE_EXTENSIONS:
+                yield image_path, label
+
+
+def list_labelled_images(root: str = None, limit: int = None) -> List[Tuple[Path, str]]:
+    """Same as iter_labelled_images, materialized (optionally capped to `limit` images)."""
+    items = list(iter_labelled_images(root))
+    return items[:limit] if limit else items
+
+
+def warm_up_images(count: int = 2, root: str = None) -> List[Image.Image]:
+    """
+    A few images for model warm-up: real samples when the sample set is available (it is not
+    shipped in the backend container), otherwise synthetic slices (bright disc on black).
+    """
+    try:
+        return [Image.open(path).convert("RGB") for path, _ in list_labelled_images(root, count)]
+    except FileNotFoundError:
+        size = 256
+        yy, xx = np.mgrid[:size, :size]
+        disc = ((yy - size / 2) ** 2 + (xx - size / 2) ** 2 < (size / 3) ** 2).astype(np.uint8) * 160
+        return [Image.fromarray(disc).convert("RGB") for _ in range(count)]
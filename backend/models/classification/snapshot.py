@@ -0,0 +1,195 @@
+import contextlib
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Snapshot directory next to the artifact: brain_tumor_xception_model.keras -> brain_tumor_xception_model.snapshot/
+SNAPSHOT_SUFFIX = ".snapshot"
+MANIFEST_FILE = "snapshot_manifest.json"
+SNAPSHOT_FORMAT = 1
+
+
+def snapshot_dir_for(model_path: str) -> str:
+    return str(Path(model_path).with_suffix(SNAPSHOT_SUFFIX))
+
+
+def _file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_stat(path: str) -> Dict[str, int]:
+    """Size and modification time of the source artifact, recorded next to its digest."""
+    stat = os.stat(path)
+    return {"source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+
+
+def export_snapshot(classifier, snapshot_dir: str = None, source_digest: str = None) -> Dict[str, Any]:
+    """
+    Exports a loaded KerasClassifier (loaded from its .keras archive) as a SavedModel with two
+    pre-traced endpoints over a (None, H, W, 3) float32 batch:
+      serve(x)                 -> {"embedding", "probabilities"}
+      gradcam(x, class_index)  -> {"features", "gradients", "probabilities"}
+    Loading it needs neither Keras deserialization nor the Flatten patches.
+    The manifest records the SHA-256 of the source artifact so that a stale snapshot is ignored,
+    plus its size and mtime, so that loading only re-hashes the artifact when those changed.
+    """
+    import tensorflow as tf
+    from keras.export import ExportArchive
+
+    snapshot_dir = snapshot_dir or snapshot_dir_for(classifier.model_path)
+    size = classifier.image_size
+    embedding_model = classifier._get_embedding_model()
+    gradcam_model = classifier._get_gradcam_model(classifier.gradcam_layer)
+    image_spec = tf.TensorSpec([None, size, size, 3], tf.float32)
+
+    def serve(x):
+        embedding, probabilities = embedding_model(x, training=False)
+        return {"embedding": embedding, "probabilities": probabilities}
+
+    def gradcam(x, class_index):
+        with tf.GradientTape() as tape:
+            features, probabilities = gradcam_model(x, training=False)
+            score = tf.gather(probabilities, class_index, axis=1)
+        return {"features": features, "gradients": tape.gradient(score, features), "probabilities": probabilities}
+
+    archive = ExportArchive()
+    archive.track(embedding_model)
+    archive.track(gradcam_model)
+    archive.add_endpoint("serve", serve, input_signature=[image_spec])
+    archive.add_endpoint("gradcam", gradcam, input_signature=[image_spec, tf.TensorSpec([], tf.int32)])
+
+    # Write next to the destination, then swap in, so a reader never sees a half-written snapshot
+    parent = os.path.dirname(os.path.abspath(snapshot_dir))
+    staging = tempfile.mkdtemp(prefix=".snapshot-", dir=parent)
+    try:
+        # write_out prints an endpoint summary; keep the command output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            archive.write_out(staging)
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "source_artifact": os.path.basename(classifier.model_path),
+            "source_sha256": source_digest or _file_digest(classifier.model_path),
+            **_source_stat(classifier.model_path),
+            "image_size": size,
+            "class_labels": list(classifier.class_labels),
+            "gradcam_layer": classifier.gradcam_layer,
+            "embedding_dim": int(embedding_model.outputs[0].shape[-1]),
+            "param_count": int(classifier._model.count_params()),
+            "tensorflow_version": tf.__version__,
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        if os.path.isdir(snapshot_dir):
+            shutil.rmtree(snapshot_dir)
+        os.replace(staging, snapshot_dir)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return manifest
+
+
+def _write_manifest(snapshot_dir: str, manifest: Dict[str, Any]):
+    path = os.path.join(snapshot_dir, MANIFEST_FILE)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def read_snapshot_manifest(snapshot_dir: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(snapshot_dir, MANIFEST_FILE)
+    if not os.path.isfile(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+class SnapshotModel:
+    """Serving-side wrapper over a loaded snapshot, exposing what KerasClassifier needs from a model."""
+
+    def __init__(self, loaded, manifest: Dict[str, Any]):
+        self._loaded = loaded
+        self.manifest = manifest
+
+    def predict(self, x, verbose: int = 0) -> np.ndarray:
+        return self.serve(x)[1]
+
+    def serve(self, x) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (embeddings, probabilities) for a preprocessed batch."""
+        out = self._loaded.serve(np.asarray(x, dtype=np.float32))
+        return out["embedding"].numpy(), out["probabilities"].numpy()
+
+    def gradcam(self, x, class_index: int):
+        """Returns (feature maps, gradients of the class score w.r.t. them, probabilities) as tensors."""
+        out = self._loaded.gradcam(np.asarray(x, dtype=np.float32), np.int32(class_index))
+        return out["features"], out["gradients"], out["probabilities"]
+
+    def count_params(self) -> int:
+        return self.manifest.get("param_count", 0)
+
+
+def _matches_source(snapshot_dir: str, manifest: Dict[str, Any], source_path: str) -> bool:
+    """
+    Whether the snapshot was exported from the artifact at source_path. The artifact is only hashed
+    when its size or mtime differ from the recorded ones; if the digest still matches (a copy or a
+    touch), the recorded size and mtime are refreshed so the next load skips the hash again.
+    A missing artifact never matches: without it there is nothing to verify the snapshot against.
+    """
+    if not os.path.isfile(source_path):
+        logger.warning(f"Source artifact {source_path} is missing; the snapshot in {snapshot_dir} cannot be verified")
+        return False
+    stat = _source_stat(source_path)
+    if all(manifest.get(key) == value for key, value in stat.items()):
+        return True
+    if manifest.get("source_sha256") != _file_digest(source_path):
+        return False
+    manifest.update(stat)
+    try:
+        _write_manifest(snapshot_dir, manifest)
+    except OSError as e:
+        logger.warning(f"Could not update the snapshot manifest in {snapshot_dir}: {e}")
+    return True
+
+
+def load_snapshot(snapshot_dir: str, source_path: str, image_size: int) -> Optional[SnapshotModel]:
+    """
+    Loads a snapshot if it exists and matches the source artifact and input size.
+    Returns None otherwise, so the caller falls back to the .keras archive.
+    """
+    manifest = read_snapshot_manifest(snapshot_dir)
+    if manifest is None:
+        return None
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        logger.warning(f"Ignoring snapshot {snapshot_dir}: unsupported format {manifest.get('format')}")
+        return None
+    if not _matches_source(snapshot_dir, manifest, source_path):
+        logger.warning(f"Ignoring stale snapshot {snapshot_dir}: it was exported from a different artifact")
+        return None
+    if manifest.get("image_size") != image_size:
+        logger.warning(f"Ignoring snapshot {snapshot_dir}: exported for {manifest.get('image_size')}px inputs")
+        return None
+
+    import tensorflow as tf
+    try:
+        loaded = tf.saved_model.load(snapshot_dir)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable snapshot {snapshot_dir}: {e}")
+        return None
+    return SnapshotModel(loaded, manifest)
@@ -0,0 +1,185 @@
+import heapq
+import zipfile
+from collections import Counter
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List
+
+import numpy as np
+from PIL import Image
+
+from .admission import UploadRejected, check_dimensions
+from .config import MAX_VOLUME_SLICE_BYTES, MAX_VOLUME_SLICES, VOLUME_CHANNELS
+
+VOLUME_EXTENSIONS = {".tif", ".tiff", ".npy", ".npz"}
+
+
+def _read_exactly(stream: BinaryIO, size: int) -> bytearray:
+    """Reads exactly `size` bytes into one preallocated buffer (zip member streams may return short reads)."""
+    buffer = bytearray(size)
+    view, filled = memoryview(buffer), 0
+    while filled < size:
+        chunk = stream.read(size - filled)
+        if not chunk:
+            raise ValueError("Volume data ended before the last slice.")
+        view[filled:filled + len(chunk)] = chunk
+        filled += len(chunk)
+    return buffer
+
+
+def _check_slice_count(count: int):
+    if count > MAX_VOLUME_SLICES:
+        raise UploadRejected(f"The volume has {count} slices; at most {MAX_VOLUME_SLICES} are accepted.", 422)
+
+
+def _iter_npy_stream(stream: BinaryIO) -> Iterator[np.ndarray]:
+    """
+    Yields the slices of a .npy array along its first axis, reading one slice at a time from the
+    stream. Only the header is parsed up front; the array itself is never materialized.
+    """
+    version = np.lib.format.read_magic(stream)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(stream)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(stream)
+
+    if len(shape) not in (3, 4):
+        raise ValueError(f"Expected a (slices, H, W) or (slices, H, W, C) stack, got shape {shape}.")
+    if fortran_order:
+        raise ValueError("Fortran-ordered arrays can't be streamed by slice. Save the stack in C order.")
+    if dtype.hasobject:
+        raise ValueError("Object arrays are not supported.")
+    # Numeric data only (bool, integers, floats) of at most 8 bytes per value
+    if dtype.kind not in "biuf" or dtype.itemsize > 8:
+        raise UploadRejected(f"Unsupported volume dtype {dtype}; use a numeric dtype of at most 8 bytes.", 422)
+    _check_slice_count(shape[0])
+    check_dimensions(shape[2], shape[1])
+    if len(shape) == 4 and shape[3] not in VOLUME_CHANNELS:
+        raise UploadRejected(
+            f"Slices have {shape[3]} channels; accepted are {', '.join(map(str, VOLUME_CHANNELS))} (grayscale, RGB, RGBA).",
+            422
+        )
+
+    # Checked from the header, before anything is inflated or read
+    slice_shape = shape[1:]
+    slice_bytes = int(np.prod(slice_shape)) * dtype.itemsize
+    if slice_bytes > MAX_VOLUME_SLICE_BYTES:
+        raise UploadRejected(
+            f"Slices of shape {slice_shape} ({dtype}) take {slice_bytes} bytes; at most {MAX_VOLUME_SLICE_BYTES} are accepted.",
+            422
+        )
+    for _ in range(shape[0]):
+        yield np.frombuffer(_read_exactly(stream, slice_bytes), dtype=dtype).reshape(slice_shape)
+
+
+def _iter_npz(fileobj: BinaryIO) -> Iterator[np.ndarray]:
+    """Streams the first array of an .npz archive (compressed members are inflated incrementally)."""
+    with zipfile.ZipFile(fileobj) as archive:
+        members = [name for name in archive.namelist() if name.endswith(".npy")]
+        if not members:
+            raise ValueError("The .npz archive contains no arrays.")
+        with archive.open(members[0]) as member:
+            yield from _iter_npy_stream(member)
+
+
+def _iter_tiff(fileobj: BinaryIO) -> Iterator[np.ndarray]:
+    """Yields the frames of a (multi-frame) TIFF one at a time; PIL only decodes the frame it seeks to."""
+    with Image.open(fileobj) as img:
+        frames = getattr(img, "n_frames", 1)
+        _check_slice_count(frames)
+        for frame in range(frames):
+            img.seek(frame)
+            check_dimensions(*img.size)
+            yield np.array(img)
+
+
+def iter_volume_slices(fileobj: BinaryIO, filename: str) -> Iterator[np.ndarray]:
+    """
+    Lazily iterates the 2D slices of an uploaded study (multi-frame TIFF, .npy or .npz stack).
+    `fileobj` must be a seekable binary file; at most one decoded slice is alive at a time.
+    """
+    suffix = Path(filename or "").suffix.lower()
+    if suffix in (".tif", ".tiff"):
+        return _iter_tiff(fileobj)
+    if suffix == ".npy":
+        return _iter_npy_stream(fileobj)
+    if suffix == ".npz":
+        return _iter_npz(fileobj)
+    raise ValueError(f"Unsupported volume format '{suffix}'. Use one of: {', '.join(sorted(VOLUME_EXTENSIONS))}.")
+
+
+def slice_to_image(slice_: np.ndarray) -> Image.Image:
+    """
+    Converts a raw slice (any numeric dtype, grayscale, RGB or RGBA) to an 8-bit RGB PIL image,
+    min-max scaling intensities that are not already uint8. A grayscale + alpha frame (from a TIFF)
+    keeps its intensity channel.
+    """
+    arr = np.squeeze(slice_)
+    if arr.ndim == 3 and arr.shape[-1] == 2:
+        arr = arr[..., 0]
+    if arr.dtype != np.uint8:
+        arr = arr.astype(np.float32)
+        lo, hi = float(arr.min()), float(arr.max())
+        arr = (arr - lo) / (hi - lo) * 255.0 if hi > lo else np.zeros_like(arr)
+        arr = arr.astype(np.uint8)
+    return Image.fromarray(arr).convert("RGB")
+
+
+def batched(items: Iterable, batch_size: int) -> Iterator[List]:
+    """Groups an iterator into lists of at most batch_size items without reading ahead."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class StudyAggregator:
+    """
+    Running study-level summary over per-slice results: class vote, mean probabilities and the
+    most suspicious slices. Memory stays constant in the number of slices.
+    """
+
+    def __init__(self, class_labels: List[str], healthy_label: str = "No Tumor", top_k: int = 5):
+        self.class_labels = class_labels
+        self.healthy_index = class_labels.index(healthy_label) if healthy_label in class_labels else None
+        self.top_k = top_k
+        self.votes = Counter()
+        self.prob_sum = np.zeros(len(class_labels), dtype=np.float64)
+        self.count = 0
+        self._suspicious = []  # min-heap of (score, index, class)
+
+    def add(self, index: int, result: Dict[str, Any]):
+        probs = np.array([c["confidence"] for c in result["all_classes"]], dtype=np.float64)
+        self.votes[result["class"]] += 1
+        self.prob_sum[:len(probs)] += probs
+        self.count += 1
+
+        # Suspicion: probability of any tumor class (or the top confidence if there is no healthy class)
+        score = 1.0 - probs[self.healthy_index] if self.healthy_index is not None else float(probs.max())
+        entry = (float(score), index, result["class"])
+        if len(self._suspicious) < self.top_k:
+            heapq.heappush(self._suspicious, entry)
+        else:
+            heapq.heappushpop(self._suspicious, entry)
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.count:
+            raise ValueError("The volume contains no slices.")
+        mean_probs = self.prob_sum / self.count
+        winner, _ = self.votes.most_common(1)[0]
+        return {
+            "type": "study",
+            "slices": self.count,
+            "class": winner,
+            "votes": dict(self.votes),
+            "mean_probabilities": [
+                {"label": label, "confidence": float(mean_probs[i])} for i, label in enumerate(self.class_labels)
+            ],
+            "suspicious_slices": [
+                {"index": index, "tumor_score": score, "class": label}
+                for score, index, label in sorted(self._suspicious, reverse=True)
+            ],
+        }
@@ -0,0 +1,193 @@
+import contextvars
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, List, Optional
+
+# Opt-in: the /debug/memory_profile endpoint only exists when NPX_MEMORY_PROFILING=1
+MEMORY_PROFILING_ENABLED = os.environ.get("NPX_MEMORY_PROFILING") == "1"
+
+# RSS sampling period of the background sampler
+RSS_SAMPLE_INTERVAL_SECONDS = 0.002
+
+_MB = 1024 * 1024
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# Profiler attached to the current request (None outside profiled calls)
+_ACTIVE: contextvars.ContextVar[Optional["MemoryProfiler"]] = contextvars.ContextVar("memory_profiler", default=None)
+
+# tracemalloc is process-wide, so profiled runs are serialized
+_PROFILE_LOCK = threading.Lock()
+
+
+def _rss_bytes() -> Optional[int]:
+    """Current resident set size from /proc (Linux); None where it is not available."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def profile_stage(name: str):
+    """
+    Attributes the memory allocated inside the block to `name` when a MemoryProfiler is active
+    for the current call; a no-op otherwise.
+    """
+    profiler = _ACTIVE.get()
+    return profiler.stage(name) if profiler is not None else nullcontext()
+
+
+class MemoryProfiler:
+    """
+    Per-stage peak memory of a call: Python/NumPy allocations via tracemalloc (peak above the
+    stage's starting point, and what the stage left allocated), plus process RSS sampled in a
+    background thread, which also covers native allocations (TensorFlow, OpenCV) tracemalloc
+    can't see. Stages may nest; a parent's peak includes its children's.
+
+        with MemoryProfiler() as profiler:
+            classifier.predict_with_gradcam(data)
+        profiler.report()
+    """
+
+    def __init__(self, sample_interval: float = RSS_SAMPLE_INTERVAL_SECONDS):
+        self.sample_interval = sample_interval
+        self.stages: List[Dict[str, Any]] = []
+        self._stack: List[Dict[str, Any]] = []
+        self._rss_peak = 0
+        self._stop = threading.Event()
+        self._sampler = None
+        self._token = None
+        self._started_tracing = False
+
+    # --- Lifecycle ---
+    def __enter__(self):
+        _PROFILE_LOCK.acquire()
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        self._base_traced = tracemalloc.get_traced_memory()[0]
+        self._traced_peak = self._base_traced
+        tracemalloc.reset_peak()
+        self._base_rss = _rss_bytes()
+        self._rss_peak = self._base_rss or 0
+        self._started = time.perf_counter()
+
+        if self._base_rss is not None:
+            self._sampler = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+            self._sampler.start()
+        self._token = _ACTIVE.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _ACTIVE.reset(self._token)
+        self._fold_peak()
+        self._total_peak = self._traced_peak
+        self._total_seconds = time.perf_counter() - self._started
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self._sample_once()
+        if self._started_tracing:
+            tracemalloc.stop()
+        _PROFILE_LOCK.release()
+        return False
+
+    def _sample_once(self):
+        rss = _rss_bytes()
+        if rss is not None and rss > self._rss_peak:
+            self._rss_peak = rss
+        for frame in self._stack:
+            if rss is not None and rss > frame["_rss_peak"]:
+                frame["_rss_peak"] = rss
+
+    def _sample(self):
+        while not self._stop.wait(self.sample_interval):
+            self._sample_once()
+
+    def _fold_peak(self):
+        """
+        Folds the tracemalloc peak reached so far into the call and every open stage. Runs before each
+        reset_peak(), so a peak a parent reached before a nested stage started is never lost.
+        """
+        peak = tracemalloc.get_traced_memory()[1]
+        self._traced_peak = max(self._traced_peak, peak)
+        for frame in self._stack:
+            frame["_peak"] = max(frame["_peak"], peak)
+
+    # --- Stages ---
+    @contextmanager
+    def stage(self, name: str):
+        self._fold_peak()
+        start_traced = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        rss = _rss_bytes()
+        frame = {"_peak": start_traced, "_rss_peak": rss or 0}
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self._sample_once()
+            # Also reaches the open parents, so their peak includes this stage's
+            self._fold_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            abs_peak = frame["_peak"]
+            self._stack.pop()
+            if self._stack:
+                parent = self._stack[-1]
+                parent["_rss_peak"] = max(parent["_rss_peak"], frame["_rss_peak"])
+
+            self.stages.append({
+                "stage": name,
+                "depth": len(self._stack),
+                "seconds": seconds,
+                "python_peak_mb": (abs_peak - start_traced) / _MB,
+                "python_retained_mb": (current - start_traced) / _MB,
+                "rss_start_mb": rss / _MB if rss is not None else None,
+                "rss_peak_delta_mb": (frame["_rss_peak"] - rss) / _MB if rss is not None else None,
+            })
+
+    # --- Results ---
+    def report(self) -> Dict[str, Any]:
+        """Stages in completion order plus call totals, in MB."""
+        return {
+            "stages": [{k: v for k, v in s.items() if not k.startswith("_")} for s in self.stages],
+            "total": {
+                "seconds": self._total_seconds,
+                "python_peak_mb": (self._total_peak - self._base_traced) / _MB,
+                "rss_start_mb": self._base_rss / _MB if self._base_rss is not None else None,
+                "rss_peak_mb": self._rss_peak / _MB if self._base_rss is not None else None,
+                "rss_peak_delta_mb": (self._rss_peak - self._base_rss) / _MB if self._base_rss is not None else None,
+            },
+        }
+
+
+def profile_prediction(classifier, file_bytes: bytes, tta: bool = False) -> Dict[str, Any]:
+    """
+    Runs the /mri_prediction path plus report rendering for one upload under a MemoryProfiler:
+    predict_with_gradcam, get_preprocessed_image_bytes and generate_pdf_report, each with its sub-stages.
+    """
+    import base64
+    from backend.models.report.report_generator import generate_pdf_report
+
+    # Load the model outside the measurement (only per-request memory is of interest),
+    # and start from a cold decode so the upload is measured as a new request would see it
+    classifier._load_model()
+    classifier.preprocessor.clear()
+
+    with MemoryProfiler() as profiler:
+        with profile_stage("predict_with_gradcam"):
+            result = classifier.predict_with_gradcam(file_bytes, tta=tta)
+        with profile_stage("get_preprocessed_image_bytes"):
+            result["preprocessed_b64"] = base64.b64encode(classifier.get_preprocessed_image_bytes(file_bytes)).decode("utf-8")
+        with profile_stage("generate_pdf_report"):
+            generate_pdf_report(result)
+
+    report = profiler.report()
+    report["class"] = result["class"]
+    report["model_version"] = result.get("model_version")
+    return report
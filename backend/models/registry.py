@@ -0,0 +1,335 @@
+import gc
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.models.classification import KerasClassifier
+from backend.models.classification.config import CLASS_LABELS
+from backend.models.classification.keras_classifier import _resolve_model_path
+from backend.models.classification.preprocessing import preprocessor_stats
+from backend.models.classification.samples import warm_up_images
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_CONFIG = Path(__file__).parent / "model_registry.json"
+
+# Number of inputs pushed through a freshly loaded model before it starts serving.
+WARM_UP_IMAGES = 2
+
+# Model types that can be declared in model_registry.json, mapped to their factory.
+MODEL_TYPES: Dict[str, Callable[..., Any]] = {
+    # An optional "screener" ({"model_path", "image_size"}) turns the classifier into a screening cascade
+    "keras_classifier": lambda spec: KerasClassifier(
+        model_path=spec.get("model_path"),
+        image_size=spec.get("image_size"),
+        class_labels=spec.get("class_labels"),
+        screener=KerasClassifier(
+            model_path=spec["screener"].get("model_path"),
+            image_size=spec["screener"].get("image_size"),
+            class_labels=spec.get("class_labels"),
+        ) if spec.get("screener") else None,
+        cascade_threshold=spec.get("cascade_threshold"),
+    ),
+}
+
+
+class ModelRegistry:
+    """
+    Loads models lazily by (name, version) and keeps them resident under a memory budget,
+    unloading the least recently used ones when a new load would exceed it.
+
+    Eviction only drops the registry's reference: a request still holding the model finishes
+    normally and the weights are freed once it lets go.
+    """
+
+    def __init__(self, memory_budget_bytes: int):
+        self.memory_budget_bytes = memory_budget_bytes
+        self._specs: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._defaults: Dict[str, str] = {}
+        self._resident: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._stats: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        self._load_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._reloads: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def from_config(cls, config_path: Path = REGISTRY_CONFIG) -> "ModelRegistry":
+        """Builds the registry from model_registry.json (budget overridable with NPX_MODEL_MEMORY_BUDGET_MB)."""
+        with open(config_path, "r") as f:
+            config = json.load(f)
+
+        budget_mb = float(os.environ.get("NPX_MODEL_MEMORY_BUDGET_MB", config.get("memory_budget_mb", 2048)))
+        registry = cls(int(budget_mb * 1024 * 1024))
+        for spec in config.get("models", []):
+            registry.register(spec)
+        return registry
+
+    # --- Registration ---
+    def register(self, spec: Dict[str, Any]):
+        """Declares a model. Nothing is loaded until the first get()."""
+        if spec.get("type") not in MODEL_TYPES:
+            raise ValueError(f"Unknown model type '{spec.get('type')}'. Available: {sorted(MODEL_TYPES)}")
+
+        key = (spec["name"], spec["version"])
+        with self._lock:
+            self._specs[key] = spec
+            self._load_locks.setdefault(key, threading.Lock())
+            self._stats.setdefault(key, {
+                "loads": 0, "hits": 0, "misses": 0, "evictions": 0,
+                "load_seconds": None, "memory_bytes": 0, "last_used": None,
+            })
+            if spec.get("default") or spec["name"] not in self._defaults:
+                self._defaults[spec["name"]] = spec["version"]
+
+    def _resolve_key(self, name: str, version: Optional[str]) -> Tuple[str, str]:
+        version = version or self._defaults.get(name)
+        key = (name, version)
+        if key not in self._specs:
+            raise KeyError(f"Model '{name}' (version {version}) is not registered.")
+        return key
+
+    # --- Access ---
+    def get(self, name: str, version: str = None):
+        """Returns the loaded model, loading it (and evicting others) if it is not resident."""
+        key = self._resolve_key(name, version)
+        model = self._touch(key)
+        if model is not None:
+            return model
+
+        # Per-model lock: concurrent requests for the same cold model share a single load
+        with self._load_locks[key]:
+            model = self._touch(key)
+            if model is not None:
+                return model
+            with self._lock:
+                self._stats[key]["misses"] += 1
+            return self._load(key)
+
+    def _touch(self, key: Tuple[str, str]):
+        """Returns the resident model for `key` (marking it most recently used), or None."""
+        with self._lock:
+            model = self._resident.get(key)
+            if model is not None:
+                self._resident.move_to_end(key)
+                self._stats[key]["hits"] += 1
+                self._stats[key]["last_used"] = time.time()
+            return model
+
+    def _load(self, key: Tuple[str, str]):
+        spec = self._specs[key]
+
+        # Make room up front using the artifact size as an estimate of the weights' footprint
+        artifact = _resolve_model_path(spec.get("model_path", "")) if spec.get("model_path") else None
+        estimate = os.path.getsize(artifact) if artifact and os.path.isfile(artifact) else 0
+        self._evict_for(estimate, keep=key)
+
+        model, load_seconds = self._build(spec)
+        self._admit(key, model, load_seconds)
+        return model
+
+    def _build(self, spec: Dict[str, Any]):
+        """Instantiates, loads and warms up a model (output shape and labels are validated)."""
+        start = time.perf_counter()
+        model = MODEL_TYPES[spec["type"]](spec)
+        model.warm_up(warm_up_images(WARM_UP_IMAGES), expected_labels=spec.get("class_labels") or CLASS_LABELS)
+        return model, time.perf_counter() - start
+
+    def _admit(self, key: Tuple[str, str], model, load_seconds: float):
+        """Makes a loaded model resident and records its load statistics."""
+        memory = model.memory_bytes()
+        with self._lock:
+            self._resident[key] = model
+            self._resident.move_to_end(key)
+            stats = self._stats[key]
+            stats["loads"] += 1
+            stats["load_seconds"] = load_seconds
+            stats["memory_bytes"] = memory
+            stats["last_used"] = time.time()
+        logger.info(f"Model {key[0]}:{key[1]} loaded in {load_seconds:.2f}s ({memory / 1e6:.1f} MB)")
+
+        # The real footprint may be larger than the estimate
+        self._evict_for(0, keep=key)
+
+    # --- Hot swap ---
+    def reload(self, name: str, model_path: str = None, version: str = None) -> Dict[str, Any]:
+        """
+        Loads a new artifact for `name` (the current one again if model_path is None), warms it up
+        and validates it, then atomically makes it the default version. Requests that already resolved
+        the previous model finish on it; new requests get the new one. Nothing changes on failure.
+        """
+        current = self._specs[self._resolve_key(name, None)]
+        spec = dict(current)
+        if model_path:
+            spec["model_path"] = model_path
+
+        model, load_seconds = self._build(spec)
+        spec["version"] = model.model_version = version or model.model_version
+        key = (name, spec["version"])
+
+        with self._lock:
+            previous = (name, self._defaults[name])
+            self.register(spec)
+            self._defaults[name] = spec["version"]
+            self._admit(key, model, load_seconds)
+            # The previous default is no longer routable; in-flight requests keep their reference
+            if previous != key and self._resident.pop(previous, None) is not None:
+                self._stats[previous]["evictions"] += 1
+
+        logger.info(f"Model {name} swapped: {previous[1]} -> {spec['version']}")
+        return {"name": name, "previous_version": previous[1], "version": spec["version"],
+                "load_seconds": load_seconds}
+
+    def reload_async(self, name: str, model_path: str = None, version: str = None) -> Dict[str, Any]:
+        """Runs reload() in a background thread. Only one reload per model name runs at a time."""
+        self._resolve_key(name, None)
+        with self._lock:
+            status = self._reloads.get(name)
+            if status and status["state"] == "loading":
+                return dict(status)
+            status = {"state": "loading", "model_path": model_path, "started_at": time.time(),
+                      "result": None, "error": None}
+            self._reloads[name] = status
+
+        def _run():
+            try:
+                status["result"] = self.reload(name, model_path, version)
+                status["state"] = "succeeded"
+            except Exception as e:
+                logger.exception(f"Reload of model {name} failed")
+                status["error"] = str(e)
+                status["state"] = "failed"
+
+        threading.Thread(target=_run, name=f"reload-{name}", daemon=True).start()
+        return dict(status)
+
+    def reload_status(self, name: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._reloads.get(name, {"state": "idle"}))
+
+    def artifact_path(self, name: str) -> Optional[str]:
+        """Resolved artifact path of the default version of `name`."""
+        spec = self._specs[self._resolve_key(name, None)]
+        return _resolve_model_path(spec["model_path"]) if spec.get("model_path") else None
+
+    def _evict_for(self, incoming_bytes: int, keep: Tuple[str, str] = None):
+        """Unloads least recently used models until `incoming_bytes` more fits in the budget."""
+        with self._lock:
+            evicted = False
+            while self._resident_bytes() + incoming_bytes > self.memory_budget_bytes:
+                candidates = [k for k in self._resident if k != keep]
+                if not candidates:
+                    break
+                victim = candidates[0]
+                del self._resident[victim]
+                self._stats[victim]["evictions"] += 1
+                evicted = True
+                logger.info(f"Model {victim[0]}:{victim[1]} unloaded (memory budget)")
+        if evicted:
+            gc.collect()
+
+    def _resident_bytes(self) -> int:
+        return sum(self._stats[k]["memory_bytes"] for k in self._resident)
+
+    def unload(self, name: str, version: str = None):
+        key = self._resolve_key(name, version)
+        with self._lock:
+            if self._resident.pop(key, None) is not None:
+                self._stats[key]["evictions"] += 1
+        gc.collect()
+
+    def is_resident(self, name: str, version: str = None) -> bool:
+        try:
+            key = self._resolve_key(name, version)
+        except KeyError:
+            return False
+        with self._lock:
+            return key in self._resident
+
+    def has(self, name: str) -> bool:
+        return name in self._defaults
+
+    # --- Introspection ---
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            models: List[Dict[str, Any]] = []
+            for key, spec in self._specs.items():
+                stats = self._stats[key]
+                entry = {
+                    "name": key[0],
+                    "version": key[1],
+                    "type": spec["type"],
+                    "default": self._defaults.get(key[0]) == key[1],
+                    "resident": key in self._resident,
+                    **stats,
+                    "memory_mb": stats["memory_bytes"] / (1024 * 1024),
+                }
+                # Screening cascade: how many requests each stage answered
+                model = self._resident.get(key)
+                if getattr(model, "screener", None) is not None:
+                    entry["cascade"] = {"threshold": model.cascade_threshold, **model.cascade_stats}
+                models.append(entry)
+            return {
+                "memory_budget_mb": self.memory_budget_bytes / (1024 * 1024),
+                "resident_mb": self._resident_bytes() / (1024 * 1024),
+                "models": models,
+                "preprocessors": preprocessor_stats(),
+            }
+
+
+class ArtifactWatcher:
+    """
+    Polls the default artifact of a model and triggers a background reload when it changes.
+    A change is acted upon once the file's size and mtime are stable across two polls,
+    so a partially copied artifact is never loaded.
+    """
+
+    def __init__(self, registry: ModelRegistry, name: str, interval_seconds: float):
+        self.registry = registry
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"watch-{name}", daemon=True)
+
+    @staticmethod
+    def _signature(path: Optional[str]):
+        try:
+            st = os.stat(path)
+            return st.st_mtime, st.st_size
+        except (OSError, TypeError):
+            return None
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        seen = self._signature(self.registry.artifact_path(self.name))
+        pending = None
+        while not self._stop.wait(self.interval_seconds):
+            seen, pending = self._poll(seen, pending)
+
+    def _poll(self, seen, pending):
+        """One poll. Takes and returns (signature last reloaded, signature waiting to settle)."""
+        current = self._signature(self.registry.artifact_path(self.name))
+        if current is None or current == seen:
+            return seen, None
+        if current != pending:
+            # Changed since the last poll: wait for it to settle
+            return seen, current
+
+        requested_at = time.time()
+        status = self.registry.reload_async(self.name)
+        if status["started_at"] < requested_at:
+            # A reload was already running (it may be loading an older copy): retry on the next poll
+            logger.info(f"Artifact of model {self.name} changed during a reload; retrying")
+            return seen, pending
+        logger.info(f"Artifact of model {self.name} changed; reloading")
+        return current, None
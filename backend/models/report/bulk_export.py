@@ -0,0 +1,188 @@
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Worker processes used for bulk rendering (NPX_REPORT_WORKERS, defaults to the core count)
+REPORT_WORKERS = int(os.environ.get("NPX_REPORT_WORKERS", "0")) or os.cpu_count() or 1
+
+# Reports rendered ahead of the zip writer per worker: bounds memory to a few PDFs per process
+REPORTS_IN_FLIGHT_PER_WORKER = 2
+
+# Largest batch-prediction result file accepted by POST /report/bulk/upload
+MAX_BATCH_RESULTS_BYTES = 64 * 1024 * 1024
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+# --- Worker side ---
+def _init_worker():
+    """
+    Runs once per worker process: selects the non-interactive Matplotlib backend and renders a
+    throwaway chart so the theme, clinical config and font cache are loaded before the first report.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+
+    from backend.models.report.report_generator import _create_probability_chart
+    _create_probability_chart({"all_classes": [{"label": "warm-up", "confidence": 0.5}]}, "warm-up")
+
+
+def _render(name: str, result: Dict[str, Any]) -> Tuple[str, Optional[bytes], Optional[str]]:
+    from backend.models.report.report_generator import generate_pdf_report
+    try:
+        return name, bytes(generate_pdf_report(result)), None
+    except Exception as e:
+        return name, None, str(e)
+
+
+# --- Parent side ---
+def get_report_pool(workers: int = None) -> ProcessPoolExecutor:
+    """
+    Shared rendering pool, created on first use and kept for the lifetime of the process so the
+    per-worker setup is paid once. Workers are spawned rather than forked: the server process
+    holds TensorFlow threads that must not be duplicated.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None:
+            _pool_workers = workers or REPORT_WORKERS
+            _pool = ProcessPoolExecutor(
+                max_workers=_pool_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return _pool
+
+
+def shutdown_report_pool():
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+            _pool_workers = 0
+
+
+def report_filename(name: str) -> str:
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in str(name))
+    return f"NeuroPathX_Report_{safe}.pdf"
+
+
+def _unique_filename(name: str, used: set) -> str:
+    """report_filename(), suffixed _2, _3, ... when an earlier entry (same or sanitized-equal name) took it."""
+    filename = report_filename(name)
+    stem, n = filename[:-len(".pdf")], 1
+    while filename in used:
+        n += 1
+        filename = f"{stem}_{n}.pdf"
+    used.add(filename)
+    return filename
+
+
+def iter_rendered_reports(items: Iterable[Tuple[str, Dict[str, Any]]], pool: ProcessPoolExecutor = None,
+                          workers: int = None) -> Iterator[Tuple[str, Optional[bytes], Optional[str]]]:
+    """
+    Renders (name, result) pairs in the process pool and yields (name, pdf_bytes, error) in input order.
+    Submission is windowed, so at most a couple of reports per worker are pending at any time.
+    A caller-supplied pool is assumed to have `workers` (default REPORT_WORKERS) processes.
+    """
+    if pool is None:
+        pool = get_report_pool(workers)
+        workers = _pool_workers
+    window = (workers or REPORT_WORKERS) * REPORTS_IN_FLIGHT_PER_WORKER
+    pending = deque()
+    for name, result in items:
+        pending.append(pool.submit(_render, name, result))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable sink: ZipFile then streams entries with data descriptors."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_report_zip(items: Iterable[Tuple[str, Dict[str, Any]]], pool: ProcessPoolExecutor = None,
+                    workers: int = None) -> Iterator[bytes]:
+    """
+    Streams a zip archive of PDF reports as they are rendered. PDFs are stored uncompressed
+    (their content streams are already compressed). Reports that fail to render are listed in
+    errors.csv; manifest.json summarizes the export. Duplicate names get a numbered suffix.
+    """
+    sink = _ChunkSink()
+    errors = []
+    used = set()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        count = 0
+        for name, pdf_bytes, error in iter_rendered_reports(items, pool, workers):
+            if error is not None:
+                logger.error(f"Report for {name} failed: {error}")
+                errors.append((name, error))
+                continue
+            archive.writestr(_unique_filename(name, used), pdf_bytes)
+            count += 1
+            yield sink.drain()
+
+        if errors:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(["session_id", "error"])
+            writer.writerows(errors)
+            archive.writestr("errors.csv", buffer.getvalue())
+        archive.writestr("manifest.json", json.dumps({"reports": count, "failed": len(errors)}, indent=2))
+    yield sink.drain()
+
+
+def load_batch_results(path: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Reads prediction results from a batch file and returns (name, result) pairs.
+    Accepts a JSON list, a JSON object keyed by session ID, or NDJSON such as the
+    /mri_volume_prediction stream (only per-slice lines are kept).
+    Results are named by their session_id, falling back to their slice index or position.
+    """
+    with open(path, "r") as f:
+        text = f.read()
+
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    if isinstance(data, dict):
+        return [(str(key), value) for key, value in data.items()]
+
+    items = []
+    for position, result in enumerate(data):
+        if result.get("type", "slice") != "slice" or "all_classes" not in result:
+            continue
+        name = result.get("session_id") or (f"slice_{result['index']:04d}" if "index" in result else f"{position:05d}")
+        items.append((str(name), result))
+    return items
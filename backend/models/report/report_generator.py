@@ -7,6 +7,8 @@ import matplotlib.pyplot as plt
 import numpy as np
 from PIL import Image
 
+from backend.models.profiling import profile_stage
+
 
 # --- Configuration Loading ---
 def _load_config(filename):
@@ -33,6 +35,8 @@ def _create_probability_chart(result: dict, predicted_class: str) -> io.BytesIO:
     """Generates a Matplotlib bar chart of class probabilities."""
     labels = [item['label'] for item in result['all_classes']]
     probs = [item['confidence'] for item in result['all_classes']]
+    # Per-class spread across test-time augmentation views (only present in TTA mode)
+    stds = [item.get('std') for item in result['all_classes']]
 
     # Define colors, highlighting the predicted class
     colors = [
@@ -43,7 +47,7 @@ def _create_probability_chart(result: dict, predicted_class: str) -> io.BytesIO:
 
     fig, ax = plt.subplots(figsize=(6, 2.5))
     y_pos = np.arange(len(labels))
-    ax.barh(y_pos, probs, color=colors)
+    ax.barh(y_pos, probs, color=colors, xerr=stds if all(s is not None for s in stds) else None, ecolor='#555555')
     ax.set_yticks(y_pos)
     # Use theme font sizes
     ax.set_yticklabels(labels, fontsize=THEME.get("FONT_BODY_SIZE", 10) * 0.8)
@@ -54,7 +58,8 @@ def _create_probability_chart(result: dict, predicted_class: str) -> io.BytesIO:
 
     # Add confidence text next to bars
     for i, prob in enumerate(probs):
-        ax.text(prob + 0.01, i, f'{prob * 100:.2f}%', va='center', fontsize=7, color='black' if prob < 0.9 else 'white',
+        label_text = f'{prob * 100:.2f}%' if stds[i] is None else f'{prob * 100:.2f}% \u00b1 {stds[i] * 100:.2f}'
+        ax.text(prob + 0.01, i, label_text, va='center', fontsize=7, color='black' if prob < 0.9 else 'white',
                 bbox=dict(facecolor='white', alpha=0.5, edgecolor='none') if prob < 0.9 else None)
 
     ax.set_title("Model Output Scores", fontsize=THEME.get("FONT_BODY_SIZE", 10))
@@ -128,13 +133,21 @@ def generate_pdf_report(result: dict) -> bytes:
 
     # Generate and add the Bar Chart
     try:
-        chart_buffer = _create_probability_chart(result, predicted_class)
-        pdf.image(chart_buffer, x=MARGIN + 5, w=170)
+        with profile_stage("report.chart"):
+            chart_buffer = _create_probability_chart(result, predicted_class)
+            pdf.image(chart_buffer, x=MARGIN + 5, w=170)
     except Exception as e:
         pdf.set_text_color(255, 0, 0)
         pdf.cell(0, 10, f"Error generating chart: {e}", ln=1)
         pdf.set_text_color(*THEME.get("COLOR_TEXT_DEFAULT", [0, 0, 0]))
 
+    # Test-time augmentation summary (only when the prediction ran in TTA mode)
+    tta = result.get('tta')
+    if tta:
+        pdf.set_font("Arial", "", THEME.get("FONT_BODY_SIZE", 10))
+        pdf.cell(0, 5, f"Test-time augmentation: {tta['views']} views | view agreement {tta['agreement'] * 100:.0f}% | "
+                       f"max class spread {tta['max_std'] * 100:.2f}%", ln=1)
+
     # --- 3. Visual Evidence (Section 3) ---
     pdf.ln(5)
     pdf.set_font("Arial", "B", THEME.get("FONT_SECTION_SIZE", 14))
@@ -152,9 +165,10 @@ def generate_pdf_report(result: dict) -> bytes:
             pdf.cell(0, 5, "Model Input (Resized & Normalized)", border=0, ln=1)
             pdf.ln(1)
 
-            preprocessed_bytes = base64.b64decode(result['preprocessed_b64'])
-            with io.BytesIO(preprocessed_bytes) as buffer:
-                pdf.image(buffer, x=MARGIN + 5, w=IMAGE_WIDTH)
+            with profile_stage("report.image"):
+                preprocessed_bytes = base64.b64decode(result['preprocessed_b64'])
+                with io.BytesIO(preprocessed_bytes) as buffer:
+                    pdf.image(buffer, x=MARGIN + 5, w=IMAGE_WIDTH)
 
             # CRITICAL FIX: Manually advance the Y position past the image's height.
             pdf.set_y(image_y_start + IMAGE_WIDTH + IMAGE_PADDING)
@@ -201,4 +215,5 @@ def generate_pdf_report(result: dict) -> bytes:
     pdf.set_font("Arial", "I", THEME.get("FONT_FOOTER_SIZE", 8))
     pdf.cell(0, 5, f"Report Generated by NeuroPathX AI on {result.get('timestamp', 'N/A')}. Case ID: {result.get('session_id', 'N/A')}", border='T', ln=1, align='C')
 
-    return pdf.output(dest='B')
+    with profile_stage("report.render"):
+        return pdf.output(dest='B')
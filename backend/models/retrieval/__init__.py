@@ -0,0 +1,3 @@
+from .similar_cases import SimilarCaseIndex, build_index
+
+__all__ = ["SimilarCaseIndex", "build_index"]
@@ -0,0 +1,10 @@
+# Directory holding the precomputed reference-set embeddings (embeddings.npy) and their manifest (index.json).
+SIMILAR_CASES_INDEX_DIR = "artifacts/retrieval/samples_index"
+
+# Number of matches returned by /similar_cases when the client doesn't ask for a specific k.
+DEFAULT_TOP_K = 5
+# Largest k a client may ask for: matches are returned in one JSON response.
+MAX_TOP_K = 100
+
+# Rows scored per block. Bounds the working set of a query regardless of the reference-set size.
+QUERY_BLOCK_ROWS = 65536
@@ -0,0 +1,149 @@
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+from PIL import Image
+
+from backend.models.classification.keras_classifier import _resolve_model_path
+from backend.models.classification.samples import list_labelled_images
+from .config import SIMILAR_CASES_INDEX_DIR, QUERY_BLOCK_ROWS
+
+logger = logging.getLogger(__name__)
+
+EMBEDDINGS_FILE = "embeddings.npy"
+MANIFEST_FILE = "index.json"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalizes rows so that a dot product is the cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def build_index(classifier, samples_dir: str = None, index_dir: str = None, batch_size: int = 32) -> Dict[str, Any]:
+    """
+    Embeds every image of a class-folder reference set (frontend/assets/samples by default) and stores
+    the L2-normalized embeddings as a memory-mappable float32 .npy matrix, plus a JSON manifest
+    describing each row. Embeddings are written batch by batch, so the set never has to fit in RAM.
+    """
+    index_path = Path(_resolve_model_path(index_dir or SIMILAR_CASES_INDEX_DIR))
+    index_path.mkdir(parents=True, exist_ok=True)
+
+    items = list_labelled_images(samples_dir)
+    if not items:
+        raise RuntimeError("No reference images found to index.")
+
+    repo_root = Path(_resolve_model_path("."))
+    matrix = None
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        images = [Image.open(path).convert("RGB") for path, _ in batch]
+        embeddings, _ = classifier.embed_images(images)
+
+        if matrix is None:
+            # Allocate the on-disk matrix once the embedding width is known
+            matrix = np.lib.format.open_memmap(
+                index_path / EMBEDDINGS_FILE, mode="w+", dtype=np.float32, shape=(len(items), embeddings.shape[-1])
+            )
+        matrix[start:start + len(batch)] = _normalize(embeddings)
+        logger.info(f"Indexed {min(start + batch_size, len(items))}/{len(items)} reference images")
+
+    matrix.flush()
+    dim = int(matrix.shape[1])
+    del matrix
+
+    manifest = {
+        "model_path": classifier.model_path,
+        "model_version": classifier.model_version,
+        "image_size": classifier.image_size,
+        "embedding_dim": dim,
+        "count": len(items),
+        "built_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "entries": [{"path": _entry_path(path, repo_root), "label": label} for path, label in items],
+    }
+    with open(index_path / MANIFEST_FILE, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    return {k: v for k, v in manifest.items() if k != "entries"}
+
+
+def _entry_path(path: str, repo_root: Path) -> str:
+    """Repository-relative path of a reference image; absolute when the samples live outside the repository."""
+    resolved = Path(path).resolve()
+    try:
+        return resolved.relative_to(repo_root).as_posix()
+    except ValueError:
+        return resolved.as_posix()
+
+
+class SimilarCaseIndex:
+    """
+    Read-only nearest-neighbour index over precomputed reference embeddings.
+    The matrix is memory-mapped, so only the blocks being scored are paged in.
+    """
+
+    def __init__(self, index_dir: str = None):
+        self.index_dir = Path(_resolve_model_path(index_dir or SIMILAR_CASES_INDEX_DIR))
+        manifest_path = self.index_dir / MANIFEST_FILE
+        if not manifest_path.exists():
+            raise FileNotFoundError(f"Similar-case index not found at: {self.index_dir}. Run 'python -m backend.cli build-index'.")
+
+        with open(manifest_path, "r") as f:
+            self.manifest = json.load(f)
+        self.entries = self.manifest["entries"]
+        self.embeddings = np.load(self.index_dir / EMBEDDINGS_FILE, mmap_mode="r")
+
+        if self.embeddings.shape[0] != len(self.entries):
+            raise ValueError("Similar-case index is inconsistent: embeddings and manifest sizes differ.")
+        logger.info(f"Similar-case index loaded: {len(self.entries)} references, dim={self.embeddings.shape[1]}")
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def model_version(self):
+        """Version of the model whose embedding space the index was built in (None for older indexes)."""
+        return self.manifest.get("model_version")
+
+    def search(self, queries: np.ndarray, k: int = 5, block_rows: int = QUERY_BLOCK_ROWS):
+        """
+        Top-k cosine search for a batch of queries (Q, D).
+        The reference matrix is scored block by block with one matrix product per block, keeping a
+        running top-k per query. Returns (scores (Q, k), indices (Q, k)) sorted by decreasing score.
+        """
+        queries = _normalize(np.atleast_2d(queries))
+        n = self.embeddings.shape[0]
+        k = min(k, n)
+
+        best_scores = np.full((queries.shape[0], 0), -np.inf, dtype=np.float32)
+        best_indices = np.zeros((queries.shape[0], 0), dtype=np.int64)
+
+        for start in range(0, n, block_rows):
+            block = np.asarray(self.embeddings[start:start + block_rows])
+            scores = queries @ block.T  # (Q, block)
+
+            # Keep only this block's top-k before merging with the running best
+            kk = min(k, scores.shape[1])
+            part = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+            part_scores = np.take_along_axis(scores, part, axis=1)
+
+            merged_scores = np.concatenate([best_scores, part_scores], axis=1)
+            merged_indices = np.concatenate([best_indices, part + start], axis=1)
+            keep = np.argpartition(-merged_scores, min(k, merged_scores.shape[1]) - 1, axis=1)[:, :k]
+            best_scores = np.take_along_axis(merged_scores, keep, axis=1)
+            best_indices = np.take_along_axis(merged_indices, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        return np.take_along_axis(best_scores, order, axis=1), np.take_along_axis(best_indices, order, axis=1)
+
+    def query(self, embedding: np.ndarray, k: int = 5) -> List[Dict[str, Any]]:
+        """Top-k most similar reference cases for a single embedding."""
+        scores, indices = self.search(embedding, k)
+        return [
+            {**self.entries[int(i)], "similarity": float(score)}
+            for score, i in zip(scores[0], indices[0])
+        ]
@@ -0,0 +1,59 @@
+import json
+import logging
+import os
+import sys
+from typing import Any, Dict, Optional
+
+from backend.models.classification.keras_classifier import _resolve_model_path
+
+logger = logging.getLogger(__name__)
+
+# Host profile written by `python -m backend.cli autotune` (NPX_RUNTIME_PROFILE overrides the path)
+RUNTIME_PROFILE_PATH = "artifacts/runtime_profile.json"
+
+
+def load_runtime_profile(path: str = None) -> Optional[Dict[str, Any]]:
+    """Reads the host profile, or returns None if there is none."""
+    path = _resolve_model_path(path or os.environ.get("NPX_RUNTIME_PROFILE", RUNTIME_PROFILE_PATH))
+    if not os.path.isfile(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def apply_runtime_profile(profile: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+    """
+    Applies the thread settings of a profile (the host profile file by default) to this process.
+    Must run before TensorFlow executes its first op: thread pools are fixed when the runtime
+    initializes. Environment variables already set by the operator take precedence.
+    Returns the profile that was applied, or None.
+    """
+    profile = profile if profile is not None else load_runtime_profile()
+    if not profile:
+        return None
+
+    intra = profile.get("intra_op_threads")
+    inter = profile.get("inter_op_threads")
+    if intra:
+        os.environ.setdefault("TF_NUM_INTRAOP_THREADS", str(intra))
+        os.environ.setdefault("OMP_NUM_THREADS", str(intra))
+    if inter:
+        os.environ.setdefault("TF_NUM_INTEROP_THREADS", str(inter))
+
+    # TensorFlow only reads the variables when it is imported by a fresh process, so set them explicitly too
+    if "tensorflow" in sys.modules:
+        import tensorflow as tf
+        try:
+            if intra:
+                tf.config.threading.set_intra_op_parallelism_threads(int(os.environ["TF_NUM_INTRAOP_THREADS"]))
+            if inter:
+                tf.config.threading.set_inter_op_parallelism_threads(int(os.environ["TF_NUM_INTEROP_THREADS"]))
+        except RuntimeError as e:
+            logger.warning(f"Runtime profile not applied to TensorFlow (already initialized): {e}")
+            return None
+
+    logger.info(
+        f"Runtime profile applied: intra_op_threads={intra} inter_op_threads={inter} "
+        f"batch_size={profile.get('batch_size')} (tuned for {profile.get('workers')} worker(s))"
+    )
+    return profile
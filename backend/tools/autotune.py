@@ -0,0 +1,213 @@
+"""
+Host autotuner: benchmarks KerasClassifier on the sample images over a grid of TensorFlow
+intra/inter-op threads, concurrent worker processes and batch sizes.
+
+Every configuration runs in fresh processes (thread pools are fixed once TensorFlow initializes),
+with `workers` processes predicting at the same time the way uvicorn workers share a host.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+
+from backend.models.runtime_profile import RUNTIME_PROFILE_PATH, apply_runtime_profile
+from backend.models.classification.keras_classifier import _resolve_model_path
+
+# Per-configuration measurements, kept next to the profile
+RESULTS_FILE = "autotune_results.csv"
+
+
+def default_grid() -> Dict[str, List[int]]:
+    """A small grid around this host's core count."""
+    cores = os.cpu_count() or 1
+    workers = sorted({1, 2, max(1, cores // 2)})
+    return {
+        "intra_op_threads": sorted({1, 2, max(1, cores // 2), cores}),
+        "inter_op_threads": [1, 2],
+        "workers": workers,
+        "batch_size": [1, 4, 8],
+    }
+
+
+# --- Trial (runs in a subprocess) ---
+def _trial_main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model_path", default=None)
+    parser.add_argument("--samples_dir", default=None)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--intra_op_threads", type=int, required=True)
+    parser.add_argument("--inter_op_threads", type=int, required=True)
+    parser.add_argument("--batch_size", type=int, required=True)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    # Same code path as the server startup, before TensorFlow is initialized
+    apply_runtime_profile({"intra_op_threads": args.intra_op_threads, "inter_op_threads": args.inter_op_threads})
+
+    from PIL import Image
+    from backend.models.classification import KerasClassifier
+    from backend.models.classification.samples import list_labelled_images
+
+    classifier = KerasClassifier(model_path=args.model_path)
+    images = [Image.open(path).convert("RGB") for path, _ in list_labelled_images(args.samples_dir, args.limit)]
+    if not images:
+        raise RuntimeError("No sample images found.")
+    batches = [images[i:i + args.batch_size] for i in range(0, len(images), args.batch_size)]
+
+    # Warm-up: loading and tracing for this batch shape don't count
+    classifier._load_model()
+    classifier.predict_images(batches[0])
+
+    # Wait until every worker of the configuration is ready, so they are measured concurrently
+    print("READY", flush=True)
+    sys.stdin.readline()
+
+    latencies, count = [], 0
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        for batch in batches:
+            t = time.perf_counter()
+            classifier.predict_images(batch)
+            latencies.append(time.perf_counter() - t)
+            count += len(batch)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"images": count, "seconds": elapsed, "latencies": latencies}), flush=True)
+
+
+def _run_configuration(config: Dict[str, int], model_path, samples_dir, limit, repeats) -> Dict[str, Any]:
+    """Starts config['workers'] trial processes, releases them together and aggregates their measurements."""
+    cmd = [
+        sys.executable, "-m", "backend.tools.autotune",
+        f"--intra_op_threads={config['intra_op_threads']}",
+        f"--inter_op_threads={config['inter_op_threads']}",
+        f"--batch_size={config['batch_size']}",
+        f"--repeats={repeats}",
+    ]
+    if model_path:
+        cmd.append(f"--model_path={model_path}")
+    if samples_dir:
+        cmd.append(f"--samples_dir={samples_dir}")
+    if limit:
+        cmd.append(f"--limit={limit}")
+
+    env = dict(os.environ)
+    env.pop("TF_NUM_INTRAOP_THREADS", None)
+    env.pop("TF_NUM_INTEROP_THREADS", None)
+    env.pop("OMP_NUM_THREADS", None)
+    env["TF_CPP_MIN_LOG_LEVEL"] = "2"
+
+    # Workers are started one after the other: concurrent Keras loads of the same .keras file
+    # collide on the weights file it extracts next to the archive
+    processes = []
+    try:
+        for _ in range(config["workers"]):
+            p = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                 text=True, env=env, cwd=_resolve_model_path("."))
+            processes.append(p)
+            # Skip any log lines a library prints on stdout before the handshake
+            line = p.stdout.readline()
+            while line and line.strip() != "READY":
+                line = p.stdout.readline()
+            if not line:
+                raise RuntimeError(f"Trial process exited during warm-up (exit code {p.wait()}).")
+
+        wall_start = time.perf_counter()
+        for p in processes:
+            p.stdin.write("GO\n")
+            p.stdin.flush()
+        outputs = [json.loads(p.stdout.readline()) for p in processes]
+        wall = time.perf_counter() - wall_start
+    finally:
+        # Trials are done once they have reported; stragglers (or a failed handshake) are killed
+        for p in processes:
+            if p.poll() is None:
+                p.kill()
+            p.wait()
+
+    latencies = np.concatenate([o["latencies"] for o in outputs]) * 1000.0
+    images = sum(o["images"] for o in outputs)
+    return {
+        **config,
+        "images": images,
+        "throughput_ips": images / wall,
+        "batch_p50_ms": float(np.percentile(latencies, 50)),
+        "batch_p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+def run_autotune(model_path: str = None, samples_dir: str = None, limit: int = None, repeats: int = 3,
+                 grid: Dict[str, List[int]] = None, max_p99_ms: float = None,
+                 profile_path: str = None) -> Dict[str, Any]:
+    """
+    Measures every configuration of the grid and writes the best one to the runtime profile
+    (highest throughput among those whose batch p99 stays within max_p99_ms, if given). When no
+    configuration meets max_p99_ms, the existing profile is left untouched and the returned profile
+    (the lowest-p99 configuration) has budget_met False.
+    All measurements are written to autotune_results.csv next to the profile.
+    """
+    grid = grid or default_grid()
+    keys = ["intra_op_threads", "inter_op_threads", "workers", "batch_size"]
+    configurations = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    profile_path = _resolve_model_path(profile_path or RUNTIME_PROFILE_PATH)
+    os.makedirs(os.path.dirname(profile_path), exist_ok=True)
+
+    results = []
+    for i, config in enumerate(configurations, 1):
+        try:
+            result = _run_configuration(config, model_path, samples_dir, limit, repeats)
+        except Exception as e:
+            print(f"[{i}/{len(configurations)}] {config} failed: {e}")
+            continue
+        results.append(result)
+        print(f"[{i}/{len(configurations)}] intra={config['intra_op_threads']} inter={config['inter_op_threads']} "
+              f"workers={config['workers']} batch={config['batch_size']} | {result['throughput_ips']:.1f} img/s | "
+              f"batch p99 {result['batch_p99_ms']:.1f} ms")
+    if not results:
+        raise RuntimeError("No configuration could be measured.")
+
+    results_path = os.path.join(os.path.dirname(profile_path), RESULTS_FILE)
+    with open(results_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+
+    eligible = [r for r in results if max_p99_ms is None or r["batch_p99_ms"] <= max_p99_ms]
+    budget_met = bool(eligible)
+    # Nothing meets the budget: report the configuration closest to it, but don't install it
+    best = max(eligible, key=lambda r: r["throughput_ips"]) if budget_met else min(results, key=lambda r: r["batch_p99_ms"])
+    profile = {
+        **{k: best[k] for k in keys},
+        "throughput_ips": best["throughput_ips"],
+        "batch_p99_ms": best["batch_p99_ms"],
+        "max_p99_ms": max_p99_ms,
+        "budget_met": budget_met,
+        "model_path": model_path,
+        "host": {"cpu_count": os.cpu_count(), "machine": platform.machine(), "node": platform.node()},
+        "tuned_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "results_file": RESULTS_FILE,
+    }
+    if not budget_met:
+        print(f"Warning: no configuration keeps batch p99 within {max_p99_ms:.1f} ms (lowest: "
+              f"{best['batch_p99_ms']:.1f} ms with intra={best['intra_op_threads']} inter={best['inter_op_threads']} "
+              f"workers={best['workers']} batch={best['batch_size']}). Profile not written; measurements in {results_path}")
+        return profile
+    with open(profile_path, "w") as f:
+        json.dump(profile, f, indent=2)
+
+    print(f"Best: intra={best['intra_op_threads']} inter={best['inter_op_threads']} workers={best['workers']} "
+          f"batch={best['batch_size']} | {best['throughput_ips']:.1f} img/s | batch p99 {best['batch_p99_ms']:.1f} ms")
+    print(f"Profile written to {profile_path}; measurements in {results_path}")
+    return profile
+
+
+if __name__ == "__main__":
+    _trial_main()
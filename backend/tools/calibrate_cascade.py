@@ -0,0 +1,140 @@
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from backend.models.classification import KerasClassifier
+from backend.models.classification.config import CASCADE_SAFETY_LABEL, CASCADE_SAFETY_THRESHOLD
+from backend.models.classification.keras_classifier import cascade_escalation_reason, resolve_label_index
+from backend.tools.common import latency_summary, load_sample_bytes
+
+# Screener thresholds evaluated by the calibration
+CANDIDATE_THRESHOLDS = [round(t, 3) for t in np.arange(0.5, 1.0, 0.01)] + [0.995, 0.999]
+
+
+def _answer_path(classifier: KerasClassifier, samples):
+    """
+    Runs what a stage does when it answers a request (decode, forward pass, Grad-CAM) on every sample.
+    Returns (probabilities (N, C), per-image seconds).
+    """
+    classifier._load_model()
+    # Warm-up: tracing of the forward pass and Grad-CAM should not count towards latency
+    _, x = classifier.preprocessor.from_bytes(samples[0][1], use_cache=False)
+    classifier._predict_image(x)
+
+    probs, latencies = [], []
+    for _, data in samples:
+        start = time.perf_counter()
+        # Uncached: every measured answer pays its own decode
+        _, x = classifier.preprocessor.from_bytes(data, use_cache=False)
+        results, _ = classifier._predict_image(x)
+        p = [c["confidence"] for c in results["all_classes"]]
+        try:
+            classifier._get_gradcam_heatmap(x, classifier.gradcam_layer, pred_index=int(np.argmax(p)))
+        except Exception:
+            pass
+        latencies.append(time.perf_counter() - start)
+        probs.append(p)
+    return np.asarray(probs), latencies
+
+
+def _sweep_thresholds(screener_probs, full_probs, truth, screener_ms: float, full_ms: float,
+                      safety_index: int, safety_threshold: float) -> List[Dict[str, Any]]:
+    """Cascade outcome on the sample set for every candidate threshold."""
+    screener_top = screener_probs.argmax(axis=1)
+    full_top = full_probs.argmax(axis=1)
+    rows = []
+    for threshold in CANDIDATE_THRESHOLDS:
+        accepted = np.array([cascade_escalation_reason(p, threshold, safety_index, safety_threshold) is None
+                             for p in screener_probs])
+        # Escalated requests are answered by the full model, so they agree by construction
+        final_top = np.where(accepted, screener_top, full_top)
+        screened = float(accepted.mean())
+        # Every request pays the screener; escalated ones pay the full model on top
+        mean_ms = screener_ms + (1.0 - screened) * full_ms
+        rows.append({
+            "threshold": threshold,
+            "screened_fraction": screened,
+            "agreement": float(np.mean(final_top == full_top)),
+            "screened_agreement": float(np.mean(screener_top[accepted] == full_top[accepted])) if accepted.any() else None,
+            "accuracy": float(np.mean(final_top == truth)),
+            "mean_ms": mean_ms,
+            "saved_ms": full_ms - mean_ms,
+            "saved_fraction": (full_ms - mean_ms) / full_ms if full_ms else 0.0,
+        })
+    return rows
+
+
+def run_calibrate_cascade(screener_path: str, model_path: str = None, samples_dir: str = None, limit: int = None,
+                          min_agreement: float = 0.99, output: str = None, write: bool = False) -> Dict[str, Any]:
+    """
+    Picks the screener threshold of the cascade on the labelled sample set: the one that lets the
+    screener answer the most requests while the cascade answers still agree with the full model on at
+    least `min_agreement` of the images, keeping the configured "No Tumor" safety rule. Reports the
+    screened fraction and the average latency saved per request; no threshold is picked when the
+    cascade would not save time.
+    With write=True the threshold is stored as "cascade_threshold" in the screener's metadata sidecar,
+    where KerasClassifier picks it up.
+    """
+    full = KerasClassifier(model_path=model_path)
+    screener = KerasClassifier(model_path=screener_path)
+    if list(screener.class_labels) != list(full.class_labels):
+        raise ValueError(f"Screener labels {screener.class_labels} do not match the model's {full.class_labels}.")
+    labels = list(full.class_labels)
+    safety_index = resolve_label_index(labels, CASCADE_SAFETY_LABEL)
+    if safety_index is None:
+        raise ValueError(f"Cascade safety label '{CASCADE_SAFETY_LABEL}' is not one of the labels {labels}.")
+
+    samples = load_sample_bytes(full, samples_dir, limit)
+    truth = np.asarray([labels.index(label) if label in labels else -1 for label, _ in samples])
+    full_probs, full_latencies = _answer_path(full, samples)
+    screener_probs, screener_latencies = _answer_path(screener, samples)
+    full_latency, screener_latency = latency_summary(full_latencies), latency_summary(screener_latencies)
+
+    rows = _sweep_thresholds(screener_probs, full_probs, truth, screener_latency["mean_ms"],
+                             full_latency["mean_ms"], safety_index, CASCADE_SAFETY_THRESHOLD)
+    # Most requests answered by the screener; among equal coverage the highest (most conservative) threshold
+    eligible = [r for r in rows if r["agreement"] >= min_agreement]
+    best = max(eligible, key=lambda r: (r["screened_fraction"], r["threshold"])) if eligible else None
+    if best is not None and best["saved_ms"] <= 0:
+        best = None
+
+    report = {
+        "images": len(samples),
+        "model_path": full.model_path,
+        "screener_path": screener.model_path,
+        "min_agreement": min_agreement,
+        "safety_label": labels[safety_index],
+        "safety_threshold": CASCADE_SAFETY_THRESHOLD,
+        "full": {"image_size": full.image_size, "accuracy": float(np.mean(full_probs.argmax(axis=1) == truth)), **full_latency},
+        "screener": {"image_size": screener.image_size, "accuracy": float(np.mean(screener_probs.argmax(axis=1) == truth)),
+                     **screener_latency},
+        "threshold": best["threshold"] if best else None,
+        "selected": best,
+        "thresholds": rows,
+    }
+
+    print(f"Images: {len(samples)} | full model {full_latency['mean_ms']:.1f} ms | screener "
+          f"{screener_latency['mean_ms']:.1f} ms per answer")
+    if best is None:
+        print(f"No threshold reaches {min_agreement * 100:.1f}% agreement with the full model while saving time; "
+              f"the screener should not answer on its own.")
+    else:
+        print(f"Threshold {best['threshold']}: {best['screened_fraction'] * 100:.1f}% answered by the screener | "
+              f"agreement {best['agreement'] * 100:.1f}% | accuracy {best['accuracy'] * 100:.1f}% | "
+              f"saves {best['saved_ms']:.1f} ms ({best['saved_fraction'] * 100:.1f}%) per request on average")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if write and best is not None:
+        sidecar = Path(screener.model_path).with_suffix(".json")
+        metadata = dict(screener.metadata)
+        metadata["cascade_threshold"] = best["threshold"]
+        with open(sidecar, "w") as f:
+            json.dump(metadata, f, indent=2)
+        print(f"Threshold written to {sidecar}")
+    return report
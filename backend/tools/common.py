@@ -0,0 +1,38 @@
+import logging
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from backend.models.classification.samples import list_labelled_images
+
+logger = logging.getLogger(__name__)
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    """Mean / p50 / p95 / p99 of a list of durations in seconds, reported in milliseconds."""
+    ms = np.asarray(latencies) * 1000.0
+    return {
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+
+
+def load_sample_bytes(classifier, samples_dir: str = None, limit: int = None) -> List[Tuple[str, bytes]]:
+    """
+    Reads the labelled sample images as raw bytes, skipping those rejected by the MRI validation.
+    Returns (label, bytes) pairs.
+    """
+    samples = []
+    for path, label in list_labelled_images(samples_dir, limit):
+        data = path.read_bytes()
+        try:
+            classifier.validate_is_mri(data)
+        except ValueError:
+            logger.warning(f"Skipping {path}: rejected by MRI validation")
+            continue
+        samples.append((label, data))
+    if not samples:
+        raise RuntimeError("No usable sample images found.")
+    return samples
@@ -0,0 +1,80 @@
+import json
+import time
+from typing import Any, Dict
+
+import numpy as np
+
+from backend.models.classification import KerasClassifier
+from backend.tools.common import latency_summary, load_sample_bytes
+
+
+def _run(classifier: KerasClassifier, samples) -> Dict[str, Any]:
+    """Predicts every sample with `classifier`, returning top-1 indices and per-image latency."""
+    start = time.perf_counter()
+    classifier._load_model()
+    load_seconds = time.perf_counter() - start
+
+    # Warm-up: the first call pays graph tracing and should not count towards latency
+    classifier.predict_from_bytes(samples[0][1])
+
+    top_indices, latencies = [], []
+    for _, data in samples:
+        start = time.perf_counter()
+        result = classifier.predict_from_bytes(data)
+        latencies.append(time.perf_counter() - start)
+        top_indices.append(classifier.class_labels.index(result["class"]))
+
+    return {"load_seconds": load_seconds, "top_indices": top_indices, "latency": latency_summary(latencies)}
+
+
+def run_compare(student_path: str, teacher_path: str = None, samples_dir: str = None,
+                limit: int = None, output: str = None) -> Dict[str, Any]:
+    """
+    Compares a distilled student against the teacher (the served Xception model by default) on the
+    labelled sample set: per-image latency, top-1 agreement with the teacher and accuracy.
+    Class indices are compared, so the student may carry its own label names.
+    """
+    teacher = KerasClassifier(model_path=teacher_path)
+    student = KerasClassifier(model_path=student_path)
+
+    samples = load_sample_bytes(teacher, samples_dir, limit)
+
+    teacher_run = _run(teacher, samples)
+    student_run = _run(student, samples)
+
+    truth = [teacher.class_labels.index(label) if label in teacher.class_labels else -1 for label, _ in samples]
+    teacher_top = np.asarray(teacher_run["top_indices"])
+    student_top = np.asarray(student_run["top_indices"])
+    truth = np.asarray(truth)
+
+    report = {
+        "images": len(samples),
+        "agreement": float(np.mean(teacher_top == student_top)),
+        "teacher": {
+            "model_path": teacher.model_path,
+            "image_size": teacher.image_size,
+            "load_seconds": teacher_run["load_seconds"],
+            "accuracy": float(np.mean(teacher_top == truth)),
+            **teacher_run["latency"],
+        },
+        "student": {
+            "model_path": student.model_path,
+            "image_size": student.image_size,
+            "load_seconds": student_run["load_seconds"],
+            "accuracy": float(np.mean(student_top == truth)),
+            **student_run["latency"],
+        },
+    }
+    report["speedup"] = report["teacher"]["mean_ms"] / report["student"]["mean_ms"]
+
+    print(f"Images: {report['images']} | agreement with teacher: {report['agreement'] * 100:.1f}%")
+    for name in ("teacher", "student"):
+        r = report[name]
+        print(f"{name:>8}: {r['image_size']}px | load {r['load_seconds']:.2f}s | "
+              f"mean {r['mean_ms']:.1f} ms | p95 {r['p95_ms']:.1f} ms | accuracy {r['accuracy'] * 100:.1f}%")
+    print(f"Student speedup: {report['speedup']:.2f}x")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
@@ -0,0 +1,196 @@
+import csv
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from backend.models.classification import KerasClassifier
+from backend.models.classification.samples import list_labelled_images
+
+logger = logging.getLogger(__name__)
+
+# Images compared between the training loader and the serving preprocessing
+DRIFT_SAMPLES = 32
+
+
+def _decode(classifier: KerasClassifier, path) -> Tuple[np.ndarray, float]:
+    """Serving preprocessing of one file (same code path as the upload endpoints). Returns ((H, W, C), seconds)."""
+    start = time.perf_counter()
+    # Every file is seen once: skip the per-upload cache (and hashing the bytes)
+    x = classifier.preprocessor.to_array(path.read_bytes(), use_cache=False)
+    return x[0], time.perf_counter() - start
+
+
+def _iter_decoded(classifier: KerasClassifier, items, workers: int, window: int) -> Iterator[Tuple[Any, Any]]:
+    """
+    Decodes images in a thread pool (PIL releases the GIL while decoding and resizing) and yields
+    (item, (array, seconds) or exception) in input order, with at most `window` images in flight.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append((item, pool.submit(_decode, classifier, item[0])))
+            if len(pending) >= window:
+                yield _resolved(*pending.popleft())
+        while pending:
+            yield _resolved(*pending.popleft())
+
+
+def _resolved(item, future):
+    try:
+        return item, future.result()
+    except Exception as e:
+        return item, e
+
+
+def _per_class_metrics(confusion: np.ndarray, labels: List[str]) -> Dict[str, Dict[str, float]]:
+    metrics = {}
+    for i, label in enumerate(labels):
+        tp = float(confusion[i, i])
+        predicted = float(confusion[:, i].sum())
+        support = float(confusion[i, :].sum())
+        precision = tp / predicted if predicted else 0.0
+        recall = tp / support if support else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        metrics[label] = {"precision": precision, "recall": recall, "f1": f1, "support": int(support)}
+    return metrics
+
+
+def check_preprocessing_drift(classifier: KerasClassifier, paths, max_images: int = DRIFT_SAMPLES) -> Dict[str, Any]:
+    """
+    Compares the serving preprocessing with the training loader (ImageDataGenerator.flow_from_directory:
+    load_img with nearest-neighbour resize, then rescale=1./255) on the same files, both as input
+    pixels and as model outputs.
+    """
+    from keras.utils import img_to_array, load_img
+
+    paths = list(paths)[:max_images]
+    if not paths:
+        return {}
+    size = (classifier.image_size, classifier.image_size)
+    serving = np.stack([classifier.preprocessor.to_array(p.read_bytes(), use_cache=False)[0] for p in paths])
+    training = np.stack([img_to_array(load_img(p, target_size=size, interpolation="nearest")) / 255.0 for p in paths])
+
+    serving_preds, _ = classifier._predict_array(serving)
+    training_preds, _ = classifier._predict_array(training.astype(np.float32))
+    pixel_diff = np.abs(serving - training)
+    prob_delta = np.abs(serving_preds - training_preds).max(axis=1)
+
+    return {
+        "images": len(paths),
+        "mean_abs_pixel_diff": float(pixel_diff.mean()),
+        "max_abs_pixel_diff": float(pixel_diff.max()),
+        "top1_agreement": float(np.mean(serving_preds.argmax(axis=1) == training_preds.argmax(axis=1))),
+        "mean_max_prob_delta": float(prob_delta.mean()),
+        "max_prob_delta": float(prob_delta.max()),
+    }
+
+
+def run_evaluate(model_path: str = None, data_dir: str = None, output_dir: str = "evaluation",
+                 batch_size: int = 32, workers: int = None, limit: int = None,
+                 drift_samples: int = DRIFT_SAMPLES) -> Dict[str, Any]:
+    """
+    Scores the classifier on a class-folder directory with the serving preprocessing and batched
+    inference. Writes predictions.csv (one row per image), confusion_matrix.csv and metrics.json
+    (accuracy, per-class precision/recall/F1, throughput, preprocessing drift) to output_dir.
+    """
+    classifier = KerasClassifier(model_path=model_path)
+    labels = classifier.class_labels
+    items = list_labelled_images(data_dir, limit)
+    if not items:
+        raise RuntimeError("No images found.")
+    workers = workers or min(8, os.cpu_count() or 1)
+    os.makedirs(output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    classifier._load_model()
+    load_seconds = time.perf_counter() - start
+
+    confusion = np.zeros((len(labels), len(labels)), dtype=np.int64)
+    decode_seconds, inference_seconds, skipped = 0.0, 0.0, []
+    predictions_path = os.path.join(output_dir, "predictions.csv")
+
+    start = time.perf_counter()
+    with open(predictions_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["path", "label", "predicted", "confidence", "correct", *[f"p_{label}" for label in labels]])
+
+        def _flush(batch):
+            nonlocal inference_seconds
+            t = time.perf_counter()
+            preds, _ = classifier._predict_array(np.stack([x for _, x in batch]))
+            inference_seconds += time.perf_counter() - t
+            for (path, label), p in zip((item for item, _ in batch), preds):
+                top = int(np.argmax(p))
+                if label in labels:
+                    confusion[labels.index(label), top] += 1
+                writer.writerow([path.as_posix(), label, labels[top], f"{p[top]:.6f}", int(labels[top] == label),
+                                 *[f"{v:.6f}" for v in p]])
+
+        batch = []
+        for item, decoded in _iter_decoded(classifier, items, workers, window=2 * batch_size):
+            if isinstance(decoded, Exception):
+                logger.warning(f"Skipping {item[0]}: {decoded}")
+                skipped.append(item[0].as_posix())
+                continue
+            x, seconds = decoded
+            decode_seconds += seconds
+            batch.append((item, x))
+            if len(batch) == batch_size:
+                _flush(batch)
+                batch = []
+        if batch:
+            _flush(batch)
+    elapsed = time.perf_counter() - start
+
+    evaluated = int(confusion.sum())
+    unknown = len(items) - len(skipped) - evaluated
+    metrics = {
+        "model_path": classifier.model_path,
+        "model_version": classifier.model_version,
+        "data_dir": data_dir,
+        "class_labels": labels,
+        "images": len(items),
+        "evaluated": evaluated,
+        "skipped": skipped,
+        "unknown_label_images": unknown,
+        "accuracy": float(np.trace(confusion) / evaluated) if evaluated else None,
+        "per_class": _per_class_metrics(confusion, labels),
+        "confusion_matrix": confusion.tolist(),
+        "throughput": {
+            "batch_size": batch_size,
+            "decode_workers": workers,
+            "load_seconds": load_seconds,
+            "wall_seconds": elapsed,
+            "images_per_sec": (len(items) - len(skipped)) / elapsed,
+            "decode_seconds": decode_seconds,
+            "inference_seconds": inference_seconds,
+        },
+    }
+    if drift_samples:
+        metrics["preprocessing_drift"] = check_preprocessing_drift(classifier, (p for p, _ in items), drift_samples)
+
+    with open(os.path.join(output_dir, "confusion_matrix.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["label \\ predicted", *labels])
+        for label, row in zip(labels, confusion):
+            writer.writerow([label, *row.tolist()])
+    with open(os.path.join(output_dir, "metrics.json"), "w") as f:
+        json.dump(metrics, f, indent=2)
+
+    print(f"Images: {evaluated} evaluated, {len(skipped)} skipped | accuracy "
+          f"{metrics['accuracy'] * 100 if evaluated else float('nan'):.1f}% | "
+          f"{metrics['throughput']['images_per_sec']:.1f} images/sec")
+    for label, m in metrics["per_class"].items():
+        print(f"{label:>18}: precision {m['precision'] * 100:.1f}% | recall {m['recall'] * 100:.1f}% | support {m['support']}")
+    drift = metrics.get("preprocessing_drift")
+    if drift:
+        print(f"Preprocessing drift vs. training loader: mean |dpixel| {drift['mean_abs_pixel_diff']:.4f} | "
+              f"top-1 agreement {drift['top1_agreement'] * 100:.1f}% | max |dprob| {drift['max_prob_delta']:.4f}")
+    print(f"Results written to {output_dir}")
+    return metrics
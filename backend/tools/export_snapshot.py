@@ -0,0 +1,100 @@
+"""
+Exports the precompiled serving snapshot of a model and reports cold-start load times of the
+.keras archive and of the snapshot, each measured in a fresh process.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict
+
+from backend.models.classification import KerasClassifier
+from backend.models.classification.keras_classifier import _resolve_model_path
+from backend.models.classification.snapshot import export_snapshot, snapshot_dir_for
+
+# Written into the snapshot directory next to its manifest
+LOAD_TIMES_FILE = "load_times.json"
+
+
+def _measure_main(argv=None):
+    """Runs in a subprocess: times TensorFlow import, model load and first prediction for one load path."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model_path", default=None)
+    parser.add_argument("--use_snapshot", type=int, required=True)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    import tensorflow  # noqa: F401
+    import_seconds = time.perf_counter() - start
+
+    from backend.models.classification.samples import warm_up_images
+    classifier = KerasClassifier(model_path=args.model_path, use_snapshot=bool(args.use_snapshot))
+    image = warm_up_images(1)[0]
+
+    start = time.perf_counter()
+    classifier._load_model()
+    load_seconds = time.perf_counter() - start
+
+    # First call: pays graph tracing on the .keras path, runs the traced endpoint on the snapshot
+    x = classifier._preprocess(image)
+    start = time.perf_counter()
+    classifier._predict_array(x, with_embedding=True)
+    first_predict_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    classifier._get_gradcam_heatmap(x, classifier.gradcam_layer)
+    first_gradcam_seconds = time.perf_counter() - start
+
+    print(json.dumps({
+        "load_source": classifier.load_source,
+        "tensorflow_import_seconds": import_seconds,
+        "load_seconds": load_seconds,
+        "first_predict_seconds": first_predict_seconds,
+        "first_gradcam_seconds": first_gradcam_seconds,
+        "time_to_first_prediction_seconds": load_seconds + first_predict_seconds,
+    }))
+
+
+def _measure(model_path: str, use_snapshot: bool) -> Dict[str, Any]:
+    cmd = [sys.executable, "-m", "backend.tools.export_snapshot", f"--use_snapshot={int(use_snapshot)}"]
+    if model_path:
+        cmd.append(f"--model_path={model_path}")
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="2")
+    out = subprocess.run(cmd, capture_output=True, text=True, env=env, cwd=_resolve_model_path("."), check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run_export_snapshot(model_path: str = None, snapshot_dir: str = None, measure: bool = True) -> Dict[str, Any]:
+    """Exports <model>.snapshot/ next to the artifact and (optionally) compares cold-start load times."""
+    classifier = KerasClassifier(model_path=model_path, use_snapshot=False)
+    classifier._load_model()
+    snapshot_dir = snapshot_dir or snapshot_dir_for(classifier.model_path)
+
+    start = time.perf_counter()
+    manifest = export_snapshot(classifier, snapshot_dir)
+    print(f"Snapshot written to {snapshot_dir} in {time.perf_counter() - start:.1f}s "
+          f"(source sha256 {manifest['source_sha256'][:12]})")
+
+    report = {"snapshot_dir": snapshot_dir, "manifest": manifest}
+    if measure and snapshot_dir == snapshot_dir_for(classifier.model_path):
+        report["keras"] = _measure(model_path, use_snapshot=False)
+        report["snapshot"] = _measure(model_path, use_snapshot=True)
+        if report["snapshot"]["load_source"] != "snapshot":
+            raise RuntimeError("The exported snapshot was not picked up by KerasClassifier.")
+        for name in ("keras", "snapshot"):
+            r = report[name]
+            print(f"{name:>8}: load {r['load_seconds']:.2f}s | first prediction {r['first_predict_seconds']:.2f}s | "
+                  f"first Grad-CAM {r['first_gradcam_seconds']:.2f}s | to first prediction "
+                  f"{r['time_to_first_prediction_seconds']:.2f}s")
+        speedup = report["keras"]["time_to_first_prediction_seconds"] / report["snapshot"]["time_to_first_prediction_seconds"]
+        report["time_to_first_prediction_speedup"] = speedup
+        print(f"Snapshot speedup to first prediction: {speedup:.2f}x")
+
+        with open(os.path.join(snapshot_dir, LOAD_TIMES_FILE), "w") as f:
+            json.dump({k: report[k] for k in ("keras", "snapshot", "time_to_first_prediction_speedup")}, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    _measure_main()
@@ -0,0 +1,60 @@
+import json
+import time
+from typing import Any, Dict
+
+import numpy as np
+
+from backend.models.classification import KerasClassifier
+from backend.tools.common import latency_summary, load_sample_bytes
+
+
+def run_tta_benchmark(model_path: str = None, samples_dir: str = None, limit: int = None,
+                      repeats: int = 3, output: str = None) -> Dict[str, Any]:
+    """
+    Measures predict_from_bytes latency with and without test-time augmentation on the sample set,
+    and how often TTA changes the top-1 class.
+    """
+    classifier = KerasClassifier(model_path=model_path)
+    samples = load_sample_bytes(classifier, samples_dir, limit)
+
+    # Warm-up both paths: batch shapes differ, so each pays its own tracing cost once
+    classifier.predict_from_bytes(samples[0][1])
+    classifier.predict_from_bytes(samples[0][1], tta=True)
+
+    latencies = {"default": [], "tta": []}
+    changed, agreement = 0, []
+    for _ in range(repeats):
+        for _, data in samples:
+            start = time.perf_counter()
+            default = classifier.predict_from_bytes(data)
+            latencies["default"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            tta = classifier.predict_from_bytes(data, tta=True)
+            latencies["tta"].append(time.perf_counter() - start)
+
+            changed += int(default["class"] != tta["class"])
+            agreement.append(tta["tta"]["agreement"])
+
+    report = {
+        "images": len(samples),
+        "repeats": repeats,
+        "views": tta["tta"]["views"],
+        "default": latency_summary(latencies["default"]),
+        "tta": latency_summary(latencies["tta"]),
+        "top1_changed_rate": changed / (len(samples) * repeats),
+        "mean_view_agreement": float(np.mean(agreement)),
+    }
+    report["overhead"] = report["tta"]["mean_ms"] / report["default"]["mean_ms"]
+
+    print(f"Images: {report['images']} x {repeats} | TTA views: {report['views']}")
+    for name in ("default", "tta"):
+        r = report[name]
+        print(f"{name:>8}: mean {r['mean_ms']:.1f} ms | p50 {r['p50_ms']:.1f} ms | p95 {r['p95_ms']:.1f} ms")
+    print(f"TTA latency overhead: {report['overhead']:.2f}x "
+          f"(vs {report['views']}x for sequential calls) | top-1 changed on {report['top1_changed_rate'] * 100:.1f}%")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
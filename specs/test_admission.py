@@ -0,0 +1,115 @@
+import asyncio
+import io
+
+import numpy as np
+import pytest
+from fastapi import UploadFile
+from PIL import Image
+
+from backend.models.classification.admission import UploadRejected, check_image_header, copy_upload, read_upload
+from backend.models.classification.config import MAX_IMAGE_SIDE, MAX_VOLUME_SLICE_BYTES
+from backend.models.classification.volume import iter_volume_slices
+
+
+def _image_bytes(size, fmt="PNG", frames=None):
+    buffer = io.BytesIO()
+    img = Image.new("L", size)
+    if frames:
+        img.save(buffer, format=fmt, save_all=True, append_images=[Image.new("L", s) for s in frames])
+    else:
+        img.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def _upload(data, size=None):
+    return UploadFile(io.BytesIO(data), size=size)
+
+
+# --- Byte caps ---
+def test_read_upload_within_cap():
+    assert asyncio.run(read_upload(_upload(b"x" * 100), max_bytes=100, chunk_size=16)) == b"x" * 100
+
+
+def test_read_upload_rejects_once_cap_is_crossed():
+    # No declared size: refused while reading
+    with pytest.raises(UploadRejected) as e:
+        asyncio.run(read_upload(_upload(b"x" * 101), max_bytes=100, chunk_size=16))
+    assert e.value.status_code == 413
+
+
+def test_read_upload_rejects_declared_size_before_reading():
+    upload = _upload(b"x" * 10, size=1000)
+    with pytest.raises(UploadRejected) as e:
+        asyncio.run(read_upload(upload, max_bytes=100))
+    assert e.value.status_code == 413
+    assert upload.file.tell() == 0
+
+
+def test_copy_upload():
+    destination = io.BytesIO()
+    assert copy_upload(io.BytesIO(b"x" * 100), destination, max_bytes=100, chunk_size=16) == 100
+    assert destination.getvalue() == b"x" * 100
+
+    with pytest.raises(UploadRejected) as e:
+        copy_upload(io.BytesIO(b"x" * 101), io.BytesIO(), max_bytes=100, chunk_size=16)
+    assert e.value.status_code == 413
+
+
+# --- Header-only dimension checks ---
+def test_check_image_header_accepts_normal_image():
+    assert check_image_header(_image_bytes((64, 48))) == ("PNG", (64, 48))
+
+
+def test_check_image_header_rejects_oversized_frame():
+    with pytest.raises(UploadRejected) as e:
+        check_image_header(_image_bytes((MAX_IMAGE_SIDE + 1, 1)))
+    assert e.value.status_code == 422
+
+
+def test_check_image_header_rejects_oversized_later_tiff_frame():
+    # A small first frame must not hide a larger one behind it
+    data = _image_bytes((8, 8), fmt="TIFF", frames=[(8, 8), (MAX_IMAGE_SIDE + 1, 1)])
+    with pytest.raises(UploadRejected) as e:
+        check_image_header(data)
+    assert e.value.status_code == 422
+
+
+def test_check_image_header_garbage_is_a_plain_value_error():
+    with pytest.raises(ValueError) as e:
+        check_image_header(b"definitely not an image")
+    assert not isinstance(e.value, UploadRejected)
+
+
+# --- .npy volume headers (checked before any slice is read) ---
+def _npy_header(shape, descr="|u1", fortran_order=False):
+    buffer = io.BytesIO()
+    np.lib.format.write_array_header_1_0(buffer, {"descr": descr, "fortran_order": fortran_order, "shape": shape})
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.mark.parametrize("descr", ["<c16", "<U4", "|V16"])
+def test_npy_header_rejects_non_numeric_dtypes(descr):
+    with pytest.raises(UploadRejected) as e:
+        next(iter_volume_slices(_npy_header((2, 8, 8), descr), "v.npy"))
+    assert e.value.status_code == 422
+
+
+def test_npy_header_rejects_fortran_order():
+    with pytest.raises(ValueError, match="Fortran"):
+        next(iter_volume_slices(_npy_header((2, 8, 8), fortran_order=True), "v.npy"))
+
+
+@pytest.mark.parametrize("channels", [2, 5, 1000000])
+def test_npy_header_rejects_channel_counts(channels):
+    with pytest.raises(UploadRejected) as e:
+        next(iter_volume_slices(_npy_header((2, 8, 8, channels)), "v.npy"))
+    assert e.value.status_code == 422
+
+
+def test_npy_header_rejects_oversized_slices():
+    # Within the side and pixel limits, but over the per-slice byte budget as float64 RGBA
+    side = int((MAX_VOLUME_SLICE_BYTES / 32) ** 0.5) + 1
+    with pytest.raises(UploadRejected) as e:
+        next(iter_volume_slices(_npy_header((1, side, side, 4), "<f8"), "v.npy"))
+    assert e.value.status_code == 422
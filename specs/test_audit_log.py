@@ -0,0 +1,91 @@
+import json
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.models import audit_log as audit_module
+from backend.models.audit_log import AuditLog, read_audit_records
+
+FORMATS = [
+    pytest.param(False, id="jsonl"),
+    pytest.param(True, id="parquet", marks=pytest.mark.skipif(not audit_module.PARQUET_AVAILABLE, reason="pyarrow not installed")),
+]
+
+
+# Recorded shortly before the files are written, as in production (a record is never newer than its file)
+START = datetime.now() - timedelta(minutes=5)
+
+
+def _timestamp(i):
+    return (START + timedelta(seconds=i)).isoformat()
+
+
+def _record(i, version="v1", status="ok"):
+    result = status == "ok"
+    return {"timestamp": _timestamp(i), "session_id": f"s{i}", "status": status,
+            "model_version": version, "confidence": 0.9 if result else None,
+            "class_labels": ["a", "b"] if result else [], "probabilities": [0.9, 0.1] if result else []}
+
+
+@pytest.mark.parametrize("use_parquet", FORMATS)
+def test_records_round_trip_newest_first(tmp_path, use_parquet):
+    log = AuditLog(directory=str(tmp_path), use_parquet=use_parquet, flush_seconds=60)
+    # Several flushes: several Parquet files / gzip members
+    for i in range(9):
+        log.record(_record(i, version="v2" if i % 3 == 0 else "v1", status="ok" if i % 2 else "rejected"))
+        if i % 4 == 3:
+            assert log.flush()
+    log.close()
+    assert log.stats()["written"] == 9 and log.stats()["dropped"] == 0
+
+    records = read_audit_records(str(tmp_path), limit=100)
+    assert [r["session_id"] for r in records] == [f"s{i}" for i in reversed(range(9))]
+    # Lists stay lists, missing values come back as None, and everything is JSON-serializable
+    ok, rejected = records[1], records[0]
+    assert ok["probabilities"] == [0.9, 0.1] and ok["class_labels"] == ["a", "b"]
+    assert rejected["confidence"] is None and rejected["probabilities"] == []
+    json.dumps(records)
+
+    assert [r["session_id"] for r in read_audit_records(str(tmp_path), limit=3)] == ["s8", "s7", "s6"]
+    assert [r["session_id"] for r in read_audit_records(str(tmp_path), since=_timestamp(6))] == ["s8", "s7", "s6"]
+    assert [r["session_id"] for r in read_audit_records(str(tmp_path), model_version="v2")] == ["s6", "s3", "s0"]
+
+
+def test_read_stops_before_older_files(tmp_path, monkeypatch):
+    log = AuditLog(directory=str(tmp_path), use_parquet=False, flush_seconds=60, rotate_bytes=1)
+    for i in range(6):
+        log.record({**_record(i), "timestamp": f"2999-01-01T00:00:{i:02d}"})
+        log.flush()
+    log.close()
+
+    read = []
+    tail_rows = audit_module._tail_rows
+    monkeypatch.setattr(audit_module, "_tail_rows", lambda path, keep, limit: read.append(path) or tail_rows(path, keep, limit))
+    # Timestamps in the future are newer than any file's mtime, so the newest file alone satisfies limit=1
+    assert [r["session_id"] for r in read_audit_records(str(tmp_path), limit=1)] == ["s5"]
+    assert len(read) == 1
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    entered, release = threading.Event(), threading.Event()
+
+    class StalledAuditLog(AuditLog):
+        def _write(self, batch):
+            entered.set()
+            release.wait(10)
+            super()._write(batch)
+
+    log = StalledAuditLog(directory=str(tmp_path), use_parquet=False, queue_size=2, flush_records=1)
+    assert log.record(_record(0))
+    assert entered.wait(10)
+    # The writer is stuck on the first record: two fit in the queue, the rest are dropped
+    results = [log.record(_record(i)) for i in range(1, 5)]
+    assert results == [True, True, False, False]
+    assert log.stats()["dropped"] == 2
+
+    release.set()
+    assert log.flush()
+    log.close()
+    assert log.stats()["written"] == 3
+    assert len(read_audit_records(str(tmp_path))) == 3
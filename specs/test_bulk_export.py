@@ -0,0 +1,27 @@
+import io
+import json
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.models.report import bulk_export
+
+
+def _fake_render(name, result):
+    return name, f"%PDF-{name}".encode(), None
+
+
+def test_report_zip_keeps_reports_with_duplicate_names(monkeypatch):
+    # Same session twice, plus a name that only collides once sanitized ("a/b" -> "a_b")
+    monkeypatch.setattr(bulk_export, "_render", _fake_render)
+    items = [("case", {}), ("case", {}), ("a_b", {}), ("a/b", {})]
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        data = b"".join(bulk_export.iter_report_zip(items, pool=pool, workers=1))
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        names = archive.namelist()
+        assert names[:4] == [
+            "NeuroPathX_Report_case.pdf", "NeuroPathX_Report_case_2.pdf",
+            "NeuroPathX_Report_a_b.pdf", "NeuroPathX_Report_a_b_2.pdf",
+        ]
+        assert archive.read("NeuroPathX_Report_a_b_2.pdf") == b"%PDF-a/b"
+        assert json.loads(archive.read("manifest.json")) == {"reports": 4, "failed": 0}
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from backend.models.classification.keras_classifier import cascade_escalation_reason, resolve_label_index
+from backend.tools.calibrate_cascade import _sweep_thresholds
+
+LABELS = ["Glioma Tumor", "Meningioma Tumor", "No Tumor", "Pituitary Tumor"]
+NO_TUMOR = 2
+
+
+@pytest.mark.parametrize("label", ["No Tumor", "notumor", "no_tumor"])
+def test_safety_label_resolves_across_spellings(label):
+    assert resolve_label_index(LABELS, label) == NO_TUMOR
+    assert resolve_label_index(["glioma", "meningioma", "notumor", "pituitary"], label) == NO_TUMOR
+
+
+def test_safety_label_missing_from_labels():
+    assert resolve_label_index(["benign", "malignant"], "No Tumor") is None
+
+
+@pytest.mark.parametrize("probs, expected", [
+    ([0.95, 0.03, 0.01, 0.01], None),                 # confident tumor answer stands
+    ([0.6, 0.3, 0.05, 0.05], "low_confidence"),       # below the screener threshold
+    ([0.01, 0.02, 0.95, 0.02], "safety_rule"),        # "No Tumor" needs the stricter threshold
+    ([0.0, 0.005, 0.99, 0.005], None),                # ... which it reaches here
+])
+def test_cascade_escalation_reason(probs, expected):
+    assert cascade_escalation_reason(np.array(probs), 0.9, NO_TUMOR, safety_threshold=0.98) == expected
+
+
+def test_sweep_thresholds_trades_coverage_for_agreement():
+    # Screener: confident and right, confident and wrong, unsure, and a borderline "No Tumor"
+    screener = np.array([
+        [0.97, 0.01, 0.01, 0.01],
+        [0.02, 0.93, 0.03, 0.02],
+        [0.55, 0.40, 0.03, 0.02],
+        [0.01, 0.01, 0.96, 0.02],
+    ])
+    full = np.eye(4)[[0, 3, 0, 0]]
+    truth = np.array([0, 3, 0, 0])
+    rows = {r["threshold"]: r for r in _sweep_thresholds(screener, full, truth, screener_ms=10.0, full_ms=100.0,
+                                                         safety_index=NO_TUMOR, safety_threshold=0.98)}
+
+    # 0.9: the two confident tumor answers are screened (one of them wrong); "No Tumor" escalates
+    low = rows[0.9]
+    assert low["screened_fraction"] == 0.5
+    assert low["agreement"] == 0.75 and low["accuracy"] == 0.75
+    assert low["mean_ms"] == pytest.approx(10.0 + 0.5 * 100.0)
+    assert low["saved_ms"] == pytest.approx(40.0)
+
+    # 0.95: only the right answer is screened, so the cascade agrees with the full model everywhere
+    high = rows[0.95]
+    assert high["screened_fraction"] == 0.25
+    assert high["agreement"] == 1.0 and high["screened_agreement"] == 1.0
+
+    # Nothing is screened at the top of the range: every request pays for both models
+    top = rows[0.999]
+    assert top["screened_fraction"] == 0.0 and top["screened_agreement"] is None
+    assert top["saved_ms"] == pytest.approx(-10.0)
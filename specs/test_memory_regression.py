@@ -0,0 +1,80 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from backend.models.classification import KerasClassifier
+from backend.models.profiling import profile_prediction
+
+# Stored peak Python/NumPy memory (tracemalloc) of the standard sample prediction, per stage.
+# Regenerate after an intended change with: NPX_UPDATE_MEMORY_BASELINE=1 python -m pytest specs/test_memory_regression.py
+BASELINE_PATH = Path(__file__).parent / "memory_baseline.json"
+REPO_ROOT = Path(__file__).parents[1]
+SAMPLE_IMAGE_PATH = REPO_ROOT / "frontend/assets/samples/Glioma Tumor/NPX-001.jpg"
+
+# Allowed growth over the baseline: relative, plus an absolute slack for the small stages
+TOLERANCE = 0.15
+SLACK_MB = 0.5
+
+STAGES = ["predict_with_gradcam", "get_preprocessed_image_bytes", "generate_pdf_report"]
+
+
+@pytest.fixture(scope="module")
+def classifier(tmp_path_factory):
+    """
+    Small stand-in with the served model's layout (Sequential around a nested 'xception' backbone).
+    Per-request memory is driven by the upload, the decoded copies, the Grad-CAM overlay and the
+    report, not by the weights, so the baseline doesn't depend on the model artifact.
+    """
+    import tensorflow as tf
+
+    size = 299
+    inputs = tf.keras.Input((size, size, 3))
+    features = tf.keras.layers.Conv2D(8, 3, strides=4, activation="relu")(inputs)
+    features = tf.keras.layers.GlobalMaxPooling2D()(features)
+    backbone = tf.keras.Model(inputs, features, name="xception")
+    model = tf.keras.Sequential([
+        tf.keras.Input((size, size, 3)), backbone, tf.keras.layers.Flatten(), tf.keras.layers.Dropout(0.3),
+        tf.keras.layers.Dense(128, activation="relu"), tf.keras.layers.Dropout(0.25),
+        tf.keras.layers.Dense(4, activation="softmax"),
+    ])
+    model_path = tmp_path_factory.mktemp("memory") / "model.keras"
+    model.save(model_path)
+    return KerasClassifier(model_path=str(model_path))
+
+
+def _peaks(report):
+    peaks = {s["stage"]: s["python_peak_mb"] for s in report["stages"] if s["depth"] == 0}
+    peaks["total"] = report["total"]["python_peak_mb"]
+    return peaks
+
+
+def test_prediction_peak_memory_within_baseline(classifier):
+    if not SAMPLE_IMAGE_PATH.exists():
+        pytest.skip(f"Sample image not found at {SAMPLE_IMAGE_PATH.as_posix()}.")
+    data = SAMPLE_IMAGE_PATH.read_bytes()
+
+    # First run pays one-off costs (tracing, Matplotlib setup); measure the steady state
+    profile_prediction(classifier, data)
+    peaks = _peaks(profile_prediction(classifier, data))
+    assert set(STAGES) <= set(peaks)
+
+    if os.environ.get("NPX_UPDATE_MEMORY_BASELINE") == "1":
+        sample = SAMPLE_IMAGE_PATH.relative_to(REPO_ROOT).as_posix()
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({"sample": sample, "python_peak_mb": {k: round(v, 2) for k, v in peaks.items()}}, f, indent=2)
+        pytest.skip(f"Memory baseline written to {BASELINE_PATH.name}.")
+    if not BASELINE_PATH.exists():
+        pytest.fail(f"Memory baseline {BASELINE_PATH.name} is missing; "
+                    f"generate it with NPX_UPDATE_MEMORY_BASELINE=1.")
+
+    with open(BASELINE_PATH, "r") as f:
+        baseline = json.load(f)["python_peak_mb"]
+
+    regressions = {
+        stage: (round(peaks[stage], 2), round(limit, 2))
+        for stage, limit in ((s, baseline[s] * (1 + TOLERANCE) + SLACK_MB) for s in baseline)
+        if stage in peaks and peaks[stage] > limit
+    }
+    assert not regressions, f"Peak memory above baseline (measured MB, limit MB): {regressions}"
@@ -0,0 +1,117 @@
+import os
+import time
+
+import pytest
+
+from backend.models import registry as registry_module
+from backend.models.registry import ArtifactWatcher, ModelRegistry
+
+
+class FakeModel:
+    """Stand-in for a classifier: warm-up fails for artifacts named 'broken'."""
+
+    def __init__(self, spec):
+        self.model_path = spec["model_path"]
+        self.model_version = os.path.basename(self.model_path)
+
+    def warm_up(self, images, expected_labels=None):
+        if "broken" in self.model_path:
+            raise ValueError("Unexpected output shape")
+        return {"model_version": self.model_version}
+
+    def memory_bytes(self):
+        return 0
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setitem(registry_module.MODEL_TYPES, "fake", FakeModel)
+    monkeypatch.setattr(registry_module, "warm_up_images", lambda count: [])
+    registry = ModelRegistry(memory_budget_bytes=1024)
+    registry.register({"name": "classification", "version": "v1", "type": "fake", "model_path": "good.keras"})
+    return registry
+
+
+def test_reload_swaps_in_a_validated_model(registry):
+    old = registry.get("classification")
+    result = registry.reload("classification", model_path="new.keras", version="v2")
+    assert result["previous_version"] == "v1" and result["version"] == "v2"
+    assert registry.get("classification") is not old
+    assert registry.get("classification").model_path == "new.keras"
+
+
+def test_reload_keeps_the_old_model_when_validation_fails(registry):
+    old = registry.get("classification")
+    with pytest.raises(ValueError):
+        registry.reload("classification", model_path="broken.keras", version="v2")
+    assert registry.get("classification") is old
+    assert registry.stats()["models"][0]["version"] == "v1"
+
+
+class FakeWatchedRegistry:
+    def __init__(self, path):
+        self.path = path
+        self.reloads = []
+        self.running_since = None
+
+    def artifact_path(self, name):
+        return self.path
+
+    def reload_async(self, name):
+        # While a reload is in flight, its (older) status comes back unchanged
+        if self.running_since is not None:
+            return {"state": "loading", "started_at": self.running_since}
+        self.reloads.append(name)
+        return {"state": "loading", "started_at": time.time()}
+
+
+def _replace(path, content):
+    path.write_bytes(content)
+    stat = path.stat()
+    # Distinct mtimes even on coarse-grained file systems
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_watcher_reloads_once_the_artifact_is_stable(tmp_path):
+    artifact = tmp_path / "model.keras"
+    artifact.write_bytes(b"v1")
+    registry = FakeWatchedRegistry(str(artifact))
+    watcher = ArtifactWatcher(registry, "classification", interval_seconds=1)
+    seen = watcher._signature(str(artifact))
+
+    # Unchanged: nothing happens
+    assert watcher._poll(seen, None) == (seen, None)
+
+    _replace(artifact, b"v2-partial")
+    seen, pending = watcher._poll(seen, None)
+    assert pending is not None and registry.reloads == []
+
+    # Still changing: keep waiting
+    _replace(artifact, b"v2-complete")
+    seen, pending = watcher._poll(seen, pending)
+    assert registry.reloads == []
+
+    # Stable across two polls: reload
+    seen, pending = watcher._poll(seen, pending)
+    assert registry.reloads == ["classification"]
+    assert pending is None and seen == watcher._signature(str(artifact))
+
+
+def test_watcher_retries_a_change_made_during_a_reload(tmp_path):
+    artifact = tmp_path / "model.keras"
+    artifact.write_bytes(b"v1")
+    registry = FakeWatchedRegistry(str(artifact))
+    watcher = ArtifactWatcher(registry, "classification", interval_seconds=1)
+    seen = watcher._signature(str(artifact))
+
+    registry.running_since = time.time() - 60
+    _replace(artifact, b"v2")
+    seen, pending = watcher._poll(seen, None)
+    seen, pending = watcher._poll(seen, pending)
+    # The running reload didn't pick this artifact up: the change stays pending
+    assert registry.reloads == [] and pending is not None
+
+    registry.running_since = None
+    seen, pending = watcher._poll(seen, pending)
+    assert registry.reloads == ["classification"]
+    assert seen == watcher._signature(str(artifact))
@@ -0,0 +1,50 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from backend.models.classification.preprocessing import ImagePreprocessor
+
+
+def _png(value: int) -> bytes:
+    buf = io.BytesIO()
+    Image.new("L", (40, 30), color=value).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def test_cache_keeps_the_most_recent_inputs():
+    preprocessor = ImagePreprocessor(16, cache_size=4)
+    images = [_png(value) for value in (10, 60, 110, 160, 210)]
+
+    first = preprocessor.resized_from_bytes(images[0])
+    assert first.shape == (16, 16, 3) and first.dtype == np.uint8
+    for data in images[1:]:
+        preprocessor.resized_from_bytes(data)
+    assert preprocessor.stats() == {"image_size": 16, "cached": 4, "hits": 0, "misses": 5}
+
+    # The four newest are served from the cache; the first was evicted and is decoded again
+    for data in images[1:]:
+        preprocessor.resized_from_bytes(data)
+    assert preprocessor.stats()["hits"] == 4
+    again = preprocessor.resized_from_bytes(images[0])
+    assert preprocessor.stats() == {"image_size": 16, "cached": 4, "hits": 4, "misses": 6}
+    assert np.array_equal(again, first)
+
+    batch = preprocessor.to_array(images[0])
+    assert batch.shape == (1, 16, 16, 3) and batch.dtype == np.float32
+    assert np.allclose(batch[0], first / 255.0)
+    assert preprocessor.stats()["hits"] == 5
+
+
+def test_use_cache_false_bypasses_the_cache():
+    preprocessor = ImagePreprocessor(16, cache_size=4)
+    data = _png(90)
+
+    preprocessor.to_array(data, use_cache=False)
+    img, batch = preprocessor.from_bytes(data, use_cache=False)
+    assert img.size == (40, 30) and batch.shape == (1, 16, 16, 3)
+    assert preprocessor.stats() == {"image_size": 16, "cached": 0, "hits": 0, "misses": 0}
+
+    preprocessor.to_array(data)
+    preprocessor.clear()
+    assert preprocessor.stats()["cached"] == 0
@@ -0,0 +1,23 @@
+from fastapi.testclient import TestClient
+
+import backend.main as main
+
+client = TestClient(main.app)
+
+
+def test_session_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(main, "MAX_CACHED_SESSIONS", 2)
+    monkeypatch.setattr(main, "SESSION_CACHE", main.OrderedDict())
+    for session_id in ("a", "b"):
+        main._cache_session(session_id, {"class": session_id}, ("v1", [0.0]))
+    # Reading "a" makes "b" the least recently used
+    assert main._cached_prediction("a") == {"class": "a"}
+    main._cache_session("c", {"class": "c"}, ("v1", [1.0]))
+
+    assert list(main.SESSION_CACHE) == ["a", "c"]
+    assert main._cached_session("b") is None
+
+    # Evicted sessions are unknown to the report endpoints, embedding included
+    r = client.post("/report/bulk", json={"session_ids": ["a", "b"]})
+    assert r.status_code == 404 and "b" in r.json()["detail"]
+    assert client.get("/similar_cases?session_id=b").status_code == 404
@@ -0,0 +1,44 @@
+import json
+
+import numpy as np
+import pytest
+
+from backend.models.retrieval.similar_cases import EMBEDDINGS_FILE, MANIFEST_FILE, SimilarCaseIndex, _normalize
+
+
+@pytest.fixture
+def index(tmp_path):
+    rng = np.random.default_rng(0)
+    embeddings = _normalize(rng.normal(size=(103, 8)))
+    np.save(tmp_path / EMBEDDINGS_FILE, embeddings)
+    manifest = {"model_version": "v1", "entries": [{"path": f"ref/{i}.png", "label": "glioma"} for i in range(103)]}
+    (tmp_path / MANIFEST_FILE).write_text(json.dumps(manifest))
+    return SimilarCaseIndex(str(tmp_path)), embeddings, rng
+
+
+@pytest.mark.parametrize("k, block_rows", [(7, 10), (7, 3), (1, 64), (5, 1000)])
+def test_blockwise_search_matches_brute_force(index, k, block_rows):
+    index, embeddings, rng = index
+    queries = rng.normal(size=(6, 8))
+
+    scores, indices = index.search(queries, k=k, block_rows=block_rows)
+
+    expected_scores = _normalize(queries) @ embeddings.T
+    expected_indices = np.argsort(-expected_scores, axis=1)[:, :k]
+    assert np.array_equal(indices, expected_indices)
+    assert np.allclose(scores, np.take_along_axis(expected_scores, expected_indices, axis=1), atol=1e-6)
+
+
+def test_k_larger_than_the_index_returns_every_reference(index):
+    index, embeddings, rng = index
+    scores, indices = index.search(rng.normal(size=8), k=500, block_rows=10)
+    assert indices.shape == (1, 103)
+    assert sorted(indices[0].tolist()) == list(range(103))
+    assert np.all(np.diff(scores[0]) <= 0)
+
+
+def test_query_returns_entries_with_similarity(index):
+    index, embeddings, _ = index
+    results = index.query(embeddings[42] * 3.0, k=3)
+    assert results[0] == {"path": "ref/42.png", "label": "glioma", "similarity": pytest.approx(1.0, abs=1e-5)}
+    assert len(results) == 3 and index.model_version == "v1"
@@ -0,0 +1,57 @@
+import json
+import os
+
+import pytest
+
+from backend.models.classification import snapshot
+from backend.models.classification.snapshot import MANIFEST_FILE, _matches_source
+
+
+@pytest.fixture
+def artifact(tmp_path, monkeypatch):
+    source = tmp_path / "model.keras"
+    source.write_bytes(b"weights-v1")
+    snapshot_dir = tmp_path / "model.snapshot"
+    snapshot_dir.mkdir()
+    manifest = {"source_sha256": snapshot._file_digest(str(source)), **snapshot._source_stat(str(source))}
+    (snapshot_dir / MANIFEST_FILE).write_text(json.dumps(manifest))
+
+    hashed = []
+    file_digest = snapshot._file_digest
+    monkeypatch.setattr(snapshot, "_file_digest", lambda path: hashed.append(path) or file_digest(path))
+    return source, str(snapshot_dir), manifest, hashed
+
+
+def test_unchanged_stat_skips_the_hash(artifact):
+    source, snapshot_dir, manifest, hashed = artifact
+    assert _matches_source(snapshot_dir, dict(manifest), str(source))
+    assert hashed == []
+
+
+def test_touched_artifact_is_hashed_once_and_manifest_refreshed(artifact):
+    source, snapshot_dir, manifest, hashed = artifact
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert _matches_source(snapshot_dir, dict(manifest), str(source))
+    assert len(hashed) == 1
+    stored = json.loads(open(os.path.join(snapshot_dir, MANIFEST_FILE)).read())
+    assert stored["source_mtime_ns"] == stat.st_mtime_ns + 10**9
+
+    # The refreshed manifest lets the next load skip the hash again
+    assert _matches_source(snapshot_dir, stored, str(source))
+    assert len(hashed) == 1
+
+
+def test_different_artifact_is_rejected(artifact):
+    source, snapshot_dir, manifest, hashed = artifact
+    source.write_bytes(b"weights-v2!")
+    assert not _matches_source(snapshot_dir, dict(manifest), str(source))
+    assert len(hashed) == 1
+
+
+def test_missing_artifact_is_rejected(artifact):
+    source, snapshot_dir, manifest, hashed = artifact
+    source.unlink()
+    assert not _matches_source(snapshot_dir, dict(manifest), str(source))
+    assert hashed == []
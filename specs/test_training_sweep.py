@@ -0,0 +1,106 @@
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from PIL import Image
+
+# The training pipeline is a separate project next to the backend
+sys.path.insert(0, str(Path(__file__).parents[1] / "training_pipeline"))
+
+from tumor_classification.sweep import DEFAULT_PARAMS, grid_trials, random_trials, rank_trials  # noqa: E402
+
+
+def test_grid_trials_cover_every_combination():
+    trials = grid_trials({"learning_rate": [0.001, 0.01], "dense_units": [64, 128, 256]})
+    assert len(trials) == 6
+    assert {(t["learning_rate"], t["dense_units"]) for t in trials} == {
+        (lr, units) for lr in (0.001, 0.01) for units in (64, 128, 256)
+    }
+    # Parameters outside the space keep their defaults
+    assert all(t["dropout"] == DEFAULT_PARAMS["dropout"] for t in trials)
+
+
+def test_grid_trials_reject_ranges():
+    with pytest.raises(ValueError):
+        grid_trials({"learning_rate": {"min": 1e-4, "max": 1e-2}})
+
+
+def test_random_trials_sample_within_the_space():
+    space = {"learning_rate": {"min": 1e-4, "max": 1e-2, "log": True}, "dense_units": {"min": 64, "max": 256},
+             "batch_size": [16, 32]}
+    trials = random_trials(space, 20, seed=7)
+    assert len(trials) == 20
+    assert trials == random_trials(space, 20, seed=7)
+    for t in trials:
+        assert 1e-4 <= t["learning_rate"] <= 1e-2
+        assert isinstance(t["dense_units"], int) and 64 <= t["dense_units"] <= 256
+        assert t["batch_size"] in (16, 32)
+
+
+def test_rank_trials_orders_by_status_then_loss():
+    rows = [
+        {"trial": 0, "status": "failed"},
+        {"trial": 1, "status": "pruned", "best_val_loss": 0.1},
+        {"trial": 2, "status": "completed", "best_val_loss": 0.5},
+        {"trial": 3, "status": "completed", "best_val_loss": 0.3},
+    ]
+    ranked = rank_trials(rows)
+    assert [r["trial"] for r in ranked] == [3, 2, 1, 0]
+    assert [r["rank"] for r in ranked] == [1, 2, 3, 4]
+
+
+def _run_pruner(losses, history, **kwargs):
+    from tumor_classification.callbacks import MedianPruner
+
+    pruner = MedianPruner("me", history, **kwargs)
+    pruner.set_model(SimpleNamespace(stop_training=False))
+    for epoch, loss in enumerate(losses):
+        pruner.on_epoch_end(epoch, {"val_loss": loss})
+        if pruner.model.stop_training:
+            break
+    return pruner
+
+
+def test_median_pruner_compares_best_losses_so_far():
+    # The other trials had a noisy third epoch (1.4), but their best-so-far is still 0.5
+    history = {i: [0.9, 0.5, 1.4] for i in range(3)}
+    assert _run_pruner([1.0, 0.9, 0.8], history, warmup_epochs=3, min_trials=3).pruned_at == 2
+
+    history = {i: [0.9, 0.5, 1.4] for i in range(3)}
+    assert _run_pruner([1.0, 0.4, 0.45], history, warmup_epochs=2, min_trials=3).pruned_at is None
+
+
+def test_median_pruner_waits_for_warmup_and_enough_trials():
+    history = {i: [0.1, 0.1, 0.1] for i in range(2)}
+    assert _run_pruner([1.0, 1.0, 1.0], history, warmup_epochs=2, min_trials=3).pruned_at is None
+    history = {i: [0.1, 0.1, 0.1] for i in range(3)}
+    assert _run_pruner([1.0, 1.0], history, warmup_epochs=3, min_trials=3).pruned_at is None
+
+
+def test_preprocessed_cache_is_rebuilt_when_files_change(tmp_path):
+    from tumor_classification.data import cache_preprocessed_data
+
+    data_dir = tmp_path / "data"
+    for label in ("a", "b"):
+        (data_dir / label).mkdir(parents=True)
+        for i in range(3):
+            Image.fromarray(np.full((8, 8, 3), i * 40, dtype=np.uint8)).save(data_dir / label / f"{i}.png")
+    cache_dir = tmp_path / "cache"
+    manifest = cache_dir / "cache_manifest.json"
+
+    cache_preprocessed_data(str(data_dir), str(cache_dir), img_size=(8, 8), validation_split=0.34)
+    built = json.loads(manifest.read_text())
+
+    # Same files: reused as is
+    cache_preprocessed_data(str(data_dir), str(cache_dir), img_size=(8, 8), validation_split=0.34)
+    assert json.loads(manifest.read_text()) == built
+
+    # A new image invalidates the cache
+    Image.fromarray(np.zeros((8, 8, 3), dtype=np.uint8)).save(data_dir / "a" / "3.png")
+    cache_preprocessed_data(str(data_dir), str(cache_dir), img_size=(8, 8), validation_split=0.34)
+    rebuilt = json.loads(manifest.read_text())
+    assert rebuilt["settings"]["files"] != built["settings"]["files"]
+    assert sum(rebuilt["counts"].values()) == sum(built["counts"].values()) + 1
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from backend.models.classification import keras_classifier
+from backend.models.classification.keras_classifier import KerasClassifier
+
+LABELS = ["Glioma Tumor", "Meningioma Tumor", "No Tumor", "Pituitary Tumor"]
+# One row per view: {original, flipped} x brightness (1.0, 0.5); the darker flipped view disagrees
+VIEW_PREDS = np.array([
+    [0.70, 0.10, 0.10, 0.10],
+    [0.60, 0.20, 0.10, 0.10],
+    [0.80, 0.10, 0.05, 0.05],
+    [0.20, 0.60, 0.10, 0.10],
+], dtype=np.float32)
+
+
+class StandInModel:
+    """Returns a fixed row per input view and remembers the batches it was given."""
+
+    def __init__(self, with_embedding=False):
+        self.with_embedding = with_embedding
+        self.batches = []
+
+    def predict(self, x, verbose=0):
+        self.batches.append(x)
+        preds = VIEW_PREDS[:len(x)]
+        return [x.reshape(len(x), -1).mean(axis=1, keepdims=True), preds] if self.with_embedding else preds
+
+
+@pytest.fixture
+def classifier(tmp_path, monkeypatch):
+    monkeypatch.setattr(keras_classifier, "TTA_BRIGHTNESS_FACTORS", (1.0, 0.5))
+    clf = KerasClassifier(model_path=str(tmp_path / "model.keras"), image_size=8, class_labels=LABELS)
+    clf._model, clf._embedding_model = StandInModel(), StandInModel(with_embedding=True)
+    clf._loaded, clf.load_source = True, "keras"
+    return clf
+
+
+def _image():
+    return np.random.default_rng(0).uniform(0.2, 0.9, size=(1, 8, 8, 3)).astype(np.float32)
+
+
+def test_tta_views_are_batched_in_one_forward_pass(classifier):
+    x = _image()
+    classifier._predict_image(x, tta=True)
+
+    (batch,) = classifier._model.batches
+    assert batch.shape == (4, 8, 8, 3) and batch.dtype == np.float32
+    assert np.array_equal(batch[0], x[0])
+    assert np.allclose(batch[1], x[0] * 0.5)
+    assert np.array_equal(batch[2], x[0][:, ::-1, :])
+    assert np.allclose(batch[3], x[0][:, ::-1, :] * 0.5)
+
+
+def test_tta_aggregates_mean_std_and_agreement(classifier):
+    results, embedding = classifier._predict_image(_image(), tta=True)
+
+    mean, std = VIEW_PREDS.mean(axis=0), VIEW_PREDS.std(axis=0)
+    assert results["class"] == "Glioma Tumor"
+    assert results["confidence"] == pytest.approx(float(mean[0]))
+    assert [c["confidence"] for c in results["all_classes"]] == pytest.approx(mean.tolist())
+    assert [c["std"] for c in results["all_classes"]] == pytest.approx(std.tolist())
+    assert results["tta"] == {"views": 4, "agreement": 0.75, "disagreement": 0.25,
+                              "max_std": pytest.approx(float(std.max()))}
+    assert embedding is None
+
+
+def test_tta_embedding_is_the_unaugmented_view(classifier):
+    x = _image()
+    results, embedding = classifier._predict_image(x, with_embedding=True, tta=True)
+    assert results["tta"]["views"] == 4
+    assert embedding == pytest.approx([float(x.mean())])
+
+
+def test_without_tta_a_single_view_is_predicted(classifier):
+    results, _ = classifier._predict_image(_image())
+    assert classifier._model.batches[0].shape == (1, 8, 8, 3)
+    assert "tta" not in results and "std" not in results["all_classes"][0]
+    assert results["confidence"] == pytest.approx(0.7)
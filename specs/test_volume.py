@@ -0,0 +1,78 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.models.classification.admission import UploadRejected
+from backend.models.classification.config import MAX_VOLUME_SLICES
+from backend.models.classification.volume import StudyAggregator, batched, iter_volume_slices, slice_to_image
+
+LABELS = ["Glioma Tumor", "Meningioma Tumor", "No Tumor", "Pituitary Tumor"]
+
+
+def _result(probs):
+    top = int(np.argmax(probs))
+    return {"class": LABELS[top], "confidence": probs[top],
+            "all_classes": [{"label": label, "confidence": p} for label, p in zip(LABELS, probs)]}
+
+
+@pytest.mark.parametrize("suffix", [".npy", ".npz"])
+def test_stack_round_trips_slice_by_slice(suffix):
+    volume = np.arange(3 * 8 * 8 * 3, dtype=np.uint16).reshape(3, 8, 8, 3)
+    buffer = io.BytesIO()
+    (np.save if suffix == ".npy" else np.savez_compressed)(buffer, volume)
+    buffer.seek(0)
+    slices = list(iter_volume_slices(buffer, f"study{suffix}"))
+    assert len(slices) == 3
+    assert all(np.array_equal(s, v) for s, v in zip(slices, volume))
+    assert slice_to_image(slices[0]).mode == "RGB"
+
+
+def test_stack_over_the_slice_limit_is_rejected_from_the_header():
+    buffer = io.BytesIO()
+    np.lib.format.write_array_header_1_0(buffer, {"descr": "|u1", "fortran_order": False,
+                                                  "shape": (MAX_VOLUME_SLICES + 1, 8, 8)})
+    buffer.seek(0)
+    with pytest.raises(UploadRejected) as e:
+        next(iter_volume_slices(buffer, "study.npy"))
+    assert e.value.status_code == 422
+
+
+def test_tiff_frames_and_gray_alpha_slices():
+    buffer = io.BytesIO()
+    Image.new("LA", (8, 8), (200, 255)).save(buffer, format="TIFF", save_all=True,
+                                             append_images=[Image.new("LA", (8, 8), (50, 255))])
+    buffer.seek(0)
+    images = [slice_to_image(s) for s in iter_volume_slices(buffer, "study.tif")]
+    assert [img.getpixel((0, 0)) for img in images] == [(200, 200, 200), (50, 50, 50)]
+
+
+def test_batched_keeps_order_and_remainder():
+    assert list(batched(iter(range(7)), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_study_aggregator_votes_means_and_top_slices():
+    aggregator = StudyAggregator(LABELS, top_k=2)
+    slices = [
+        [0.1, 0.1, 0.7, 0.1],   # healthy
+        [0.8, 0.1, 0.05, 0.05],  # glioma, tumor score 0.95
+        [0.6, 0.2, 0.1, 0.1],   # glioma, tumor score 0.9
+        [0.1, 0.1, 0.2, 0.6],   # pituitary, tumor score 0.8
+    ]
+    for index, probs in enumerate(slices):
+        aggregator.add(index, _result(probs))
+
+    summary = aggregator.summary()
+    assert summary["slices"] == 4
+    assert summary["class"] == "Glioma Tumor"
+    assert summary["votes"] == {"No Tumor": 1, "Glioma Tumor": 2, "Pituitary Tumor": 1}
+    means = [c["confidence"] for c in summary["mean_probabilities"]]
+    assert means == pytest.approx(np.mean(slices, axis=0))
+    assert [(s["index"], s["class"]) for s in summary["suspicious_slices"]] == [(1, "Glioma Tumor"), (2, "Glioma Tumor")]
+    assert summary["suspicious_slices"][0]["tumor_score"] == pytest.approx(0.95)
+
+
+def test_study_aggregator_without_slices():
+    with pytest.raises(ValueError):
+        StudyAggregator(LABELS).summary()
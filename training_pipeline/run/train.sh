@@ -25,3 +25,18 @@ python scripts/training.py fit \
   --data.num_workers=12 \
   --trainer.max_epochs=1000 \
   --trainer.accelerator=gpu
+
+# CPU-only nodes: data-parallel training across local processes (see scripts/launch_local.py)
+# python scripts/launch_local.py --num_workers 4 --baseline -- \
+#   --data.batch_size=32 \
+#   --trainer.max_epochs=10 \
+#   --trainer.accelerator=cpu
+
+# Hyperparameter sweep: concurrent trials sharing the reserved CPUs (e.g. 6 trials x 4 threads),
+# ranked into sweeps/leaderboard.csv (see tumor_classification/sweep.py for the search space)
+# python scripts/training.py sweep \
+#   --sweep.mode=random \
+#   --sweep.num_trials=24 \
+#   --sweep.parallel=6 \
+#   --sweep.threads_per_trial=4 \
+#   --trainer.max_epochs=30
@@ -1,47 +1,176 @@
 import sys
 import os
+import json
 
 # Add root directory to path to allow importing tumor_classification
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from tumor_classification import get_model, get_data_generators, Trainer
+from tumor_classification import get_model, get_data_generators, get_distributed_datasets, Trainer
+from tumor_classification.distributed import configure_devices, get_strategy, is_chief
+from tumor_classification.distillation import Distiller, load_teacher, write_model_metadata
+from tumor_classification.models import get_backbone_size, get_gradcam_layer
 from tumor_classification.utils import parse_args
 
+def _resolve_data_dir(args):
+    # Assuming data is in 'data/classification_samples' relative to project root
+    return args.data_dir or os.path.join(os.path.dirname(__file__), '../../data/classification_samples')
+
+def run_sweep_command(args):
+    """Hyperparameter sweep: concurrent trials over shared preprocessed data, ranked into a leaderboard."""
+    from tumor_classification.data import cache_preprocessed_data
+    from tumor_classification.sweep import grid_trials, load_search_space, random_trials, run_sweep
+
+    data_dir = _resolve_data_dir(args)
+    if not os.path.exists(data_dir):
+        print(f"Error: Data directory not found at {data_dir}")
+        return
+
+    image_size = args.model_image_size or get_backbone_size(args.model_backbone)
+    space = load_search_space(args.sweep_space)
+    if args.sweep_mode == "grid":
+        trials = grid_trials(space)
+    else:
+        trials = random_trials(space, args.sweep_num_trials, seed=args.sweep_seed)
+
+    # Decoded once here; every trial memory-maps the same read-only arrays
+    cache_dir = os.path.join(args.sweep_output_dir, f"data_{image_size}")
+    cache_preprocessed_data(data_dir, cache_dir, img_size=(image_size, image_size), seed=args.sweep_seed)
+    with open(os.path.join(cache_dir, 'cache_manifest.json')) as f:
+        num_classes = json.load(f)['num_classes']
+
+    config = {
+        'backbone': args.model_backbone,
+        'weights': None if args.model_weights.lower() == "none" else args.model_weights,
+        'image_size': image_size,
+        'num_classes': num_classes,
+        'max_epochs': args.trainer_max_epochs,
+        'patience': args.sweep_patience,
+        'prune_warmup_epochs': args.sweep_prune_warmup_epochs,
+        'prune_min_trials': args.sweep_prune_min_trials,
+        'seed': args.sweep_seed,
+        'mode': args.sweep_mode,
+        'space': space,
+    }
+    run_sweep(trials, cache_dir, args.sweep_output_dir, config,
+              parallel=args.sweep_parallel, threads_per_trial=args.sweep_threads_per_trial)
+
 def main():
     args = parse_args()
 
-    if args.command == "fit":
+    if args.command == "sweep":
+        run_sweep_command(args)
+
+    elif args.command in ("fit", "distill"):
         print(f"Starting training with config: {vars(args)}")
 
+        # Device setup has to happen before TensorFlow creates any op
+        configure_devices(args.trainer_accelerator, args.trainer_devices)
+        strategy = get_strategy(args.trainer_strategy, args.trainer_accelerator)
+
+        # --data.batch_size is the per-replica batch; the global batch grows with the replica count
+        num_replicas = strategy.num_replicas_in_sync
+        global_batch_size = args.data_batch_size * num_replicas
+        print(f"Strategy: {args.trainer_strategy} | replicas: {num_replicas} | global batch size: {global_batch_size}")
+
+        # Input sizes: the student/model size, and the size the data is loaded at
+        # (distillation loads at the teacher's size and resizes for the student inside the model)
+        image_size = args.model_image_size or get_backbone_size(args.model_backbone)
+        data_size = args.distill_teacher_size if args.command == "distill" else image_size
+        weights = None if args.model_weights.lower() == "none" else args.model_weights
+
         # Path to the dataset
-        # Assuming data is in 'data/classification_samples' relative to project root
-        data_dir = os.path.join(os.path.dirname(__file__), '../../data/classification_samples')
+        data_dir = _resolve_data_dir(args)
         
         if not os.path.exists(data_dir):
             print(f"Error: Data directory not found at {data_dir}")
             return
 
+        config = {
+            'max_epochs': args.trainer_max_epochs,
+            'ckpt_path': args.ckpt_path,
+            'global_batch_size': global_batch_size,
+            'num_replicas': num_replicas,
+            'profile': args.trainer_profile,
+            'trace_dir': args.trainer_profile_trace_dir,
+            # A Distiller wraps the student and can't be serialized whole, so it checkpoints weights only
+            'save_weights_only': args.command == "distill"
+        }
+        if args.command == "distill":
+            config['ckpt_path'] = os.path.splitext(args.ckpt_path)[0] + '.weights.h5'
+        if args.trainer_profile_trace_steps:
+            start, stop = (int(s) for s in args.trainer_profile_trace_steps.split(','))
+            config['trace_steps'] = (start, stop)
+
         # Initialize Data Generators
-        train_gen, val_gen = get_data_generators(
-            data_dir=data_dir,
-            batch_size=args.data_batch_size,
-            img_size=(299, 299) # Fixed for Xception
-        )
+        if args.trainer_strategy == "none":
+            train_gen, val_gen = get_data_generators(
+                data_dir=data_dir,
+                batch_size=args.data_batch_size,
+                img_size=(data_size, data_size),
+                augment_strength=args.data_augment_strength
+            )
+        else:
+            # Sharded tf.data input: each worker only reads its own slice of the files
+            train_gen, val_gen, steps_per_epoch, validation_steps = get_distributed_datasets(
+                strategy,
+                data_dir=data_dir,
+                global_batch_size=global_batch_size,
+                img_size=(data_size, data_size),
+                augment_strength=args.data_augment_strength
+            )
+            config['steps_per_epoch'] = steps_per_epoch
+            config['validation_steps'] = validation_steps
 
-        # Initialize Model
-        model = get_model(
-            num_classes=args.model_nb_classes
-        )
+        # Initialize Model (variables must be created inside the strategy scope)
+        with strategy.scope():
+            model = get_model(
+                input_shape=(image_size, image_size, 3),
+                num_classes=args.model_nb_classes,
+                learning_rate=args.model_learning_rate,
+                backbone=args.model_backbone,
+                weights=weights,
+                dense_units=args.model_dense_units,
+                dropout=args.model_dropout,
+                head_dropout=args.model_head_dropout
+            )
+            student = model
+
+            if args.command == "distill":
+                # The existing Xception model provides the soft labels
+                teacher = load_teacher(args.distill_teacher_path)
+                model = Distiller(
+                    student, teacher,
+                    student_size=image_size,
+                    temperature=args.distill_temperature,
+                    alpha=args.distill_alpha
+                )
+                model.compile(optimizer=student.optimizer, metrics=['accuracy'])
 
         # Start Training
-        config = {
-            'max_epochs': args.trainer_max_epochs,
-            'ckpt_path': args.ckpt_path
-        }
-        
         trainer = Trainer(model, train_gen, val_gen, config)
         history = trainer.fit()
-        print("Training completed.")
+        print(f"Training completed. Throughput: {trainer.run_stats['images_per_sec']:.1f} images/sec")
+
+        if is_chief():
+            if args.command == "distill":
+                # EarlyStopping restored the best weights; export the student on its own for serving
+                student.save(args.ckpt_path)
+
+            # Serving metadata read by the backend KerasClassifier
+            if args.model_class_labels:
+                class_labels = [label.strip() for label in args.model_class_labels.split(',')]
+            else:
+                class_labels = sorted(d for d in os.listdir(data_dir) if os.path.isdir(os.path.join(data_dir, d)))
+            write_model_metadata(args.ckpt_path, {
+                'backbone': args.model_backbone,
+                'image_size': image_size,
+                'class_labels': class_labels,
+                'gradcam_layer': get_gradcam_layer(student)
+            })
+
+            if args.trainer_stats_path:
+                with open(args.trainer_stats_path, 'w') as f:
+                    json.dump(trainer.run_stats, f, indent=2)
 
 if __name__ == "__main__":
     main()
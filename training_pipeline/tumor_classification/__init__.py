@@ -1,4 +1,4 @@
 from .models import get_model
-from .data import get_data_generators
+from .data import get_data_generators, get_distributed_datasets
 from .trainer import Trainer
 from .utils import parse_args
@@ -0,0 +1,253 @@
+import csv
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+import tensorflow as tf
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return peak / divisor
+
+
+class TimedInput(tf.keras.utils.PyDataset):
+    """
+    Wraps a Sequence-style generator (e.g. the ImageDataGenerator iterators) and accumulates the time
+    spent producing batches. With the default single worker this is time the training step waits on input;
+    with prefetching workers it is the fetch time of the background threads.
+    """
+
+    def __init__(self, inner):
+        super().__init__(
+            workers=getattr(inner, 'workers', 1),
+            use_multiprocessing=getattr(inner, 'use_multiprocessing', False),
+            max_queue_size=getattr(inner, 'max_queue_size', 10)
+        )
+        self.inner = inner
+        self._elapsed = 0.0
+
+    def __len__(self):
+        return len(self.inner)
+
+    def __getitem__(self, index):
+        start = time.perf_counter()
+        batch = self.inner[index]
+        self._elapsed += time.perf_counter() - start
+        return batch
+
+    def on_epoch_end(self):
+        if hasattr(self.inner, 'on_epoch_end'):
+            self.inner.on_epoch_end()
+
+    def pop_elapsed(self):
+        """Returns the input time accumulated since the previous call."""
+        elapsed, self._elapsed = self._elapsed, 0.0
+        return elapsed
+
+
+class TimedModelCheckpoint(tf.keras.callbacks.ModelCheckpoint):
+    """ModelCheckpoint that records how long each epoch-end save took."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.last_save = None
+
+    def on_epoch_end(self, epoch, logs=None):
+        before = os.path.getmtime(self.filepath) if os.path.exists(self.filepath) else None
+        start = time.perf_counter()
+        super().on_epoch_end(epoch, logs)
+        elapsed = time.perf_counter() - start
+        after = os.path.getmtime(self.filepath) if os.path.exists(self.filepath) else None
+        self.last_save = {'seconds': elapsed, 'saved': after is not None and after != before}
+
+
+class ThroughputProfiler(tf.keras.callbacks.Callback):
+    """
+    Records per-step and per-epoch wall time, images/sec, input wait vs compute time, peak RSS and
+    checkpoint write time, and writes them as a run report next to the checkpoint:
+      - run_report.json        (summary + per-epoch rows)
+      - run_report_epochs.csv
+      - run_report_steps.csv
+    Optionally captures a TensorBoard profiler trace for the global steps [trace_steps[0], trace_steps[1]).
+    """
+
+    EPOCH_FIELDS = ['epoch', 'wall_seconds', 'train_seconds', 'images_per_sec', 'input_seconds',
+                    'compute_seconds', 'checkpoint_seconds', 'checkpoint_saved', 'peak_rss_mb',
+                    'loss', 'val_loss']
+    STEP_FIELDS = ['epoch', 'step', 'global_step', 'step_seconds', 'input_seconds', 'compute_seconds']
+
+    def __init__(self, report_dir, batch_size, input_timer=None, checkpoint=None,
+                 trace_steps=None, trace_dir='logs/profile'):
+        super().__init__()
+        self.report_dir = report_dir
+        self.batch_size = batch_size
+        self.input_timer = input_timer
+        self.checkpoint = checkpoint
+        self.trace_steps = trace_steps
+        self.trace_dir = trace_dir
+
+        self.epochs = []
+        self._global_step = 0
+        self._tracing = False
+        self._steps_file = None
+        self._steps_writer = None
+
+    # --- Helpers ---
+    def _report_path(self, name):
+        return os.path.join(self.report_dir, name)
+
+    def _write_report(self):
+        total_seconds = time.perf_counter() - self._train_start
+        images = sum(e['images'] for e in self.epochs)
+        summary = {
+            'epochs': len(self.epochs),
+            'global_steps': self._global_step,
+            'batch_size': self.batch_size,
+            'total_seconds': total_seconds,
+            'images_per_sec': images / total_seconds if total_seconds > 0 else 0.0,
+            'input_seconds': sum(e['input_seconds'] for e in self.epochs),
+            'compute_seconds': sum(e['compute_seconds'] for e in self.epochs),
+            'checkpoint_seconds': sum(e['checkpoint_seconds'] for e in self.epochs),
+            'peak_rss_mb': _peak_rss_mb(),
+        }
+        with open(self._report_path('run_report.json'), 'w') as f:
+            json.dump({'summary': summary, 'epochs': self.epochs}, f, indent=2)
+
+        with open(self._report_path('run_report_epochs.csv'), 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=self.EPOCH_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(self.epochs)
+
+    # --- Training ---
+    def on_train_begin(self, logs=None):
+        os.makedirs(self.report_dir, exist_ok=True)
+        self._train_start = time.perf_counter()
+        # Steps are streamed to disk, long runs would otherwise keep every row in memory
+        self._steps_file = open(self._report_path('run_report_steps.csv'), 'w', newline='')
+        self._steps_writer = csv.DictWriter(self._steps_file, fieldnames=self.STEP_FIELDS)
+        self._steps_writer.writeheader()
+
+    def on_train_end(self, logs=None):
+        if self._tracing:
+            tf.profiler.experimental.stop()
+            self._tracing = False
+        if self._steps_file:
+            self._steps_file.close()
+        self._write_report()
+
+    # --- Epochs ---
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch = epoch
+        self._epoch_start = time.perf_counter()
+        self._epoch_steps = 0
+        self._epoch_input = 0.0
+        self._epoch_compute = 0.0
+        self._last_batch_end = self._epoch_start
+        if self.input_timer is not None:
+            self.input_timer.pop_elapsed()
+
+    def on_epoch_end(self, epoch, logs=None):
+        logs = logs or {}
+        now = time.perf_counter()
+        train_seconds = self._last_batch_end - self._epoch_start
+        images = self._epoch_steps * self.batch_size
+        checkpoint = (self.checkpoint.last_save if self.checkpoint is not None else None) or {}
+
+        row = {
+            'epoch': epoch,
+            'wall_seconds': now - self._epoch_start,
+            'train_seconds': train_seconds,
+            'images': images,
+            'images_per_sec': images / train_seconds if train_seconds > 0 else 0.0,
+            'input_seconds': self._epoch_input,
+            'compute_seconds': self._epoch_compute,
+            'checkpoint_seconds': checkpoint.get('seconds', 0.0),
+            'checkpoint_saved': checkpoint.get('saved', False),
+            'peak_rss_mb': _peak_rss_mb(),
+            'loss': logs.get('loss'),
+            'val_loss': logs.get('val_loss'),
+        }
+        self.epochs.append(row)
+        self._steps_file.flush()
+        # Rewrite the report every epoch so that an interrupted run still leaves one behind
+        self._write_report()
+
+    # --- Steps ---
+    def on_train_batch_begin(self, batch, logs=None):
+        if self.trace_steps and not self._tracing and self._global_step == self.trace_steps[0]:
+            tf.profiler.experimental.start(self.trace_dir)
+            self._tracing = True
+        self._batch_start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        now = time.perf_counter()
+        step_seconds = now - self._batch_start
+
+        if self.input_timer is not None:
+            # Sequence input: batches are fetched inside the step
+            input_seconds = min(self.input_timer.pop_elapsed(), step_seconds)
+            compute_seconds = step_seconds - input_seconds
+        else:
+            # tf.data input: only the host-side gap between steps is attributable to input
+            input_seconds = self._batch_start - self._last_batch_end
+            compute_seconds = step_seconds
+
+        self._steps_writer.writerow({
+            'epoch': self._epoch,
+            'step': batch,
+            'global_step': self._global_step,
+            'step_seconds': step_seconds,
+            'input_seconds': input_seconds,
+            'compute_seconds': compute_seconds,
+        })
+
+        self._epoch_steps += 1
+        self._epoch_input += input_seconds
+        self._epoch_compute += compute_seconds
+        self._last_batch_end = now
+        self._global_step += 1
+
+        if self._tracing and self._global_step >= self.trace_steps[1]:
+            tf.profiler.experimental.stop()
+            self._tracing = False
+
+
+class MedianPruner(tf.keras.callbacks.Callback):
+    """
+    Stops a sweep trial early when its best val_loss so far is worse than the median of the other
+    trials' best val_loss up to the same epoch. `history` maps trial id -> list of per-epoch val_loss
+    and is shared between the trial processes (a multiprocessing.Manager dict).
+    Pruning starts after `warmup_epochs` epochs and once `min_trials` other trials reached that epoch.
+    """
+
+    def __init__(self, trial_id, history, warmup_epochs=2, min_trials=3):
+        super().__init__()
+        self.trial_id = trial_id
+        self.history = history
+        self.warmup_epochs = warmup_epochs
+        self.min_trials = min_trials
+        self.losses = []
+        self.pruned_at = None
+
+    def on_epoch_end(self, epoch, logs=None):
+        val_loss = (logs or {}).get('val_loss')
+        if val_loss is None:
+            return
+        self.losses.append(float(val_loss))
+        # Proxy dicts only see reassignments, not in-place updates of their values
+        self.history[self.trial_id] = list(self.losses)
+
+        if len(self.losses) < self.warmup_epochs:
+            return
+        epochs = len(self.losses)
+        # Best-so-far on both sides, so a trial isn't pruned for another one's noisy epoch
+        others = [min(losses[:epochs]) for trial, losses in self.history.items()
+                  if trial != self.trial_id and len(losses) >= epochs]
+        if len(others) >= self.min_trials and min(self.losses) > statistics.median(others):
+            self.pruned_at = epoch
+            self.model.stop_training = True
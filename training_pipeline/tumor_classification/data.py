@@ -1,16 +1,22 @@
+import hashlib
+import json
 import os
+import numpy as np
+import tensorflow as tf
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
 
-def get_data_generators(data_dir, batch_size=32, img_size=(299, 299), validation_split=0.2, seed=42):
+def get_data_generators(data_dir, batch_size=32, img_size=(299, 299), validation_split=0.2, seed=42,
+                        augment_strength=0.2):
     """
     Creates and returns train, validation, and test generators.
     Assumes data_dir contains subdirectories for classes.
+    Training images get a random brightness factor in [1 - augment_strength, 1 + augment_strength].
     """
     
     # Train Data Generator with Augmentation
     train_datagen = ImageDataGenerator(
         rescale=1./255,
-        brightness_range=(0.8, 1.2),
+        brightness_range=(1 - augment_strength, 1 + augment_strength) if augment_strength else None,
         validation_split=validation_split
     )
 
@@ -43,3 +49,171 @@ def get_data_generators(data_dir, batch_size=32, img_size=(299, 299), validation
     # For this implementation, we return train/val.
     
     return train_gen, val_gen
+
+
+def _list_subset(data_dir, img_size, subset, validation_split, seed):
+    """
+    Lists the (filepaths, class indices) of one subset using the same split as get_data_generators,
+    without loading any image.
+    """
+    iterator = ImageDataGenerator(validation_split=validation_split).flow_from_directory(
+        data_dir,
+        target_size=img_size,
+        class_mode='categorical',
+        subset=subset,
+        shuffle=False,
+        seed=seed
+    )
+    return iterator.filepaths, iterator.classes, iterator.num_classes
+
+
+def _make_dataset(paths, classes, num_classes, img_size, batch_size, augment, seed, num_shards, shard_index,
+                  augment_strength=0.2):
+    """
+    Builds a tf.data pipeline that mirrors the ImageDataGenerator preprocessing
+    (nearest resize, brightness_range=(1 - s, 1 + s) for training, rescale=1./255).
+    """
+    ds = tf.data.Dataset.from_tensor_slices((list(paths), list(classes)))
+
+    # Each input pipeline (one per worker) only reads its own slice of the files
+    if num_shards > 1:
+        ds = ds.shard(num_shards, shard_index)
+
+    if augment:
+        ds = ds.shuffle(len(paths), seed=seed, reshuffle_each_iteration=True)
+
+    def _load(path, label):
+        img = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+        img = tf.image.resize(img, img_size, method='nearest')
+        img = tf.cast(img, tf.float32)
+        if augment and augment_strength:
+            img = tf.clip_by_value(img * tf.random.uniform([], 1 - augment_strength, 1 + augment_strength), 0., 255.)
+        return img / 255., tf.one_hot(label, num_classes)
+
+    # Repeat so that uneven shards never leave a worker waiting at the end of an epoch;
+    # the epoch length is fixed through steps_per_epoch instead.
+    return (
+        ds.map(_load, num_parallel_calls=tf.data.AUTOTUNE)
+        .repeat()
+        .batch(batch_size, drop_remainder=True)
+        .prefetch(tf.data.AUTOTUNE)
+    )
+
+
+def get_distributed_datasets(strategy, data_dir, global_batch_size, img_size=(299, 299), validation_split=0.2, seed=42,
+                             augment_strength=0.2):
+    """
+    Creates train and validation datasets for a tf.distribute strategy.
+    Input is sharded by file across workers and each replica receives global_batch_size / num_replicas images.
+    Returns (train_ds, val_ds, steps_per_epoch, validation_steps).
+    """
+    train_paths, train_classes, num_classes = _list_subset(data_dir, img_size, 'training', validation_split, seed)
+    val_paths, val_classes, _ = _list_subset(data_dir, img_size, 'validation', validation_split, seed)
+
+    def _input_fn(paths, classes, augment):
+        def fn(input_context):
+            return _make_dataset(
+                paths, classes, num_classes, img_size,
+                batch_size=input_context.get_per_replica_batch_size(global_batch_size),
+                augment=augment,
+                seed=seed,
+                num_shards=input_context.num_input_pipelines,
+                shard_index=input_context.input_pipeline_id,
+                augment_strength=augment_strength
+            )
+        return fn
+
+    train_ds = strategy.distribute_datasets_from_function(_input_fn(train_paths, train_classes, True))
+    val_ds = strategy.distribute_datasets_from_function(_input_fn(val_paths, val_classes, False))
+
+    steps_per_epoch = max(1, len(train_paths) // global_batch_size)
+    validation_steps = max(1, len(val_paths) // global_batch_size)
+
+    return train_ds, val_ds, steps_per_epoch, validation_steps
+
+
+# --- Preprocessed, memory-mapped datasets (shared read-only between sweep trials) ---
+def _files_fingerprint(data_dir, paths):
+    """SHA-1 over the sorted (relative path, size, mtime) of the files: changes when any is added, removed or replaced."""
+    digest = hashlib.sha1()
+    for path in sorted(paths):
+        stat = os.stat(path)
+        digest.update(f"{os.path.relpath(path, data_dir)}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def cache_preprocessed_data(data_dir, cache_dir, img_size=(299, 299), validation_split=0.2, seed=42):
+    """
+    Decodes the train/validation split of get_data_generators once (nearest resize, no augmentation)
+    into uint8 .npy arrays under cache_dir: {train,val}_images.npy, {train,val}_labels.npy.
+    An existing cache built with the same settings and the same files (paths, sizes and modification
+    times) is reused. Returns cache_dir.
+    """
+    from tensorflow.keras.utils import img_to_array, load_img
+
+    subsets = {prefix: _list_subset(data_dir, img_size, subset, validation_split, seed)
+               for subset, prefix in (('training', 'train'), ('validation', 'val'))}
+    settings = {'data_dir': os.path.abspath(data_dir), 'img_size': list(img_size),
+                'validation_split': validation_split, 'seed': seed,
+                'files': _files_fingerprint(data_dir, [p for paths, _, _ in subsets.values() for p in paths])}
+    manifest_path = os.path.join(cache_dir, 'cache_manifest.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            if json.load(f).get('settings') == settings:
+                return cache_dir
+
+    os.makedirs(cache_dir, exist_ok=True)
+    counts = {}
+    for prefix, (paths, classes, num_classes) in subsets.items():
+        # Written through a memmap so the whole split never has to fit in memory
+        images = np.lib.format.open_memmap(os.path.join(cache_dir, f'{prefix}_images.npy'), mode='w+',
+                                           dtype=np.uint8, shape=(len(paths), *img_size, 3))
+        for i, path in enumerate(paths):
+            images[i] = img_to_array(load_img(path, target_size=img_size, interpolation='nearest'), dtype=np.uint8)
+        images.flush()
+        del images
+        np.save(os.path.join(cache_dir, f'{prefix}_labels.npy'), np.asarray(classes, dtype=np.int64))
+        counts[prefix] = len(paths)
+
+    with open(manifest_path, 'w') as f:
+        json.dump({'settings': settings, 'num_classes': num_classes, 'counts': counts}, f, indent=2)
+    return cache_dir
+
+
+class MemmapDataset(tf.keras.utils.PyDataset):
+    """
+    Batches from a cache_preprocessed_data array opened with mmap_mode='r', so concurrent processes
+    share the page cache instead of each decoding its own copy. Mirrors the ImageDataGenerator
+    training preprocessing: random brightness in [1 - s, 1 + s] on [0, 255], then rescale to [0, 1].
+    """
+
+    def __init__(self, cache_dir, subset, batch_size, num_classes, augment_strength=0.0, shuffle=False, seed=42):
+        super().__init__()
+        self.images = np.load(os.path.join(cache_dir, f'{subset}_images.npy'), mmap_mode='r')
+        self.labels = np.load(os.path.join(cache_dir, f'{subset}_labels.npy'))
+        self.batch_size = batch_size
+        self.num_classes = num_classes
+        self.augment_strength = augment_strength
+        self.shuffle = shuffle
+        self._rng = np.random.default_rng(seed)
+        self._order = np.arange(len(self.labels))
+        if shuffle:
+            self._rng.shuffle(self._order)
+
+    def __len__(self):
+        return int(np.ceil(len(self.labels) / self.batch_size))
+
+    def __getitem__(self, index):
+        # Sorted indices keep the memmap reads sequential within a batch
+        idx = np.sort(self._order[index * self.batch_size:(index + 1) * self.batch_size])
+        x = self.images[idx].astype(np.float32)
+        if self.augment_strength:
+            factors = self._rng.uniform(1 - self.augment_strength, 1 + self.augment_strength, size=(len(idx), 1, 1, 1))
+            x = np.clip(x * factors, 0., 255.)
+        x /= 255.
+        y = np.eye(self.num_classes, dtype=np.float32)[self.labels[idx]]
+        return x, y
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self._rng.shuffle(self._order)
@@ -0,0 +1,78 @@
+import json
+import os
+import tensorflow as tf
+
+
+def _patch_flatten():
+    """
+    Same compatibility shim as the backend's KerasClassifier._load_model: the saved Xception model
+    passes a single-element list to Flatten, which Keras 3 rejects.
+    """
+    from tensorflow.keras.layers import Flatten
+
+    if hasattr(Flatten, "_original_compute_output_spec"):
+        return
+
+    Flatten._original_compute_output_spec = Flatten.compute_output_spec
+    Flatten._original_call = Flatten.call
+
+    def _unwrap(inputs):
+        if isinstance(inputs, list) and len(inputs) == 1:
+            return inputs[0]
+        return inputs
+
+    Flatten.compute_output_spec = lambda self, inputs, **kwargs: self._original_compute_output_spec(_unwrap(inputs), **kwargs)
+    Flatten.call = lambda self, inputs, *args, **kwargs: self._original_call(_unwrap(inputs), *args, **kwargs)
+
+
+def load_teacher(model_path):
+    """Loads the served Xception model as a frozen teacher."""
+    _patch_flatten()
+    teacher = tf.keras.models.load_model(model_path, compile=False)
+    teacher.trainable = False
+    return teacher
+
+
+class Distiller(tf.keras.Model):
+    """
+    Knowledge distillation wrapper: the student learns from the hard labels and from the teacher's
+    temperature-softened class probabilities.
+    Batches arrive at the teacher's input size and are resized for the student inside the model.
+    """
+
+    def __init__(self, student, teacher, student_size, temperature=4.0, alpha=0.1):
+        super().__init__()
+        self.student = student
+        self.teacher = teacher
+        self.student_size = student_size
+        self.temperature = temperature
+        # Weight of the hard-label loss; (1 - alpha) goes to the distillation term
+        self.alpha = alpha
+        self.kl = tf.keras.losses.KLDivergence()
+        self.ce = tf.keras.losses.CategoricalCrossentropy()
+
+    def _soften(self, probs):
+        # Both models end in softmax, so temperature is applied to the log-probabilities
+        logits = tf.math.log(tf.clip_by_value(probs, 1e-7, 1.0))
+        return tf.nn.softmax(logits / self.temperature, axis=-1)
+
+    def call(self, x, training=False):
+        x = tf.image.resize(x, (self.student_size, self.student_size))
+        return self.student(x, training=training)
+
+    def compute_loss(self, x=None, y=None, y_pred=None, sample_weight=None, allow_empty=False):
+        teacher_pred = self.teacher(x, training=False)
+        student_loss = self.ce(y, y_pred)
+        distillation_loss = self.kl(self._soften(teacher_pred), self._soften(y_pred)) * (self.temperature ** 2)
+        return self.alpha * student_loss + (1 - self.alpha) * distillation_loss
+
+
+def write_model_metadata(model_path, metadata):
+    """
+    Writes the serving sidecar (<model>.json) read by the backend KerasClassifier:
+    image_size, class_labels, backbone and gradcam_layer.
+    """
+    sidecar = os.path.splitext(model_path)[0] + '.json'
+    with open(sidecar, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    return sidecar
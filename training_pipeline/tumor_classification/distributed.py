@@ -0,0 +1,68 @@
+import json
+import os
+import tensorflow as tf
+
+
+def configure_devices(accelerator="gpu", num_devices=1):
+    """
+    Applies the --trainer.accelerator / --trainer.devices options.
+    Must run before TensorFlow initializes its devices (i.e. before any op or model is created).
+    """
+    if accelerator == "cpu":
+        # Hide GPUs so every replica is placed on the host
+        tf.config.set_visible_devices([], "GPU")
+
+        # Split the host CPU into logical devices so MirroredStrategy has several local replicas
+        if num_devices > 1:
+            cpu = tf.config.list_physical_devices("CPU")[0]
+            tf.config.set_logical_device_configuration(
+                cpu, [tf.config.LogicalDeviceConfiguration() for _ in range(num_devices)]
+            )
+
+
+def get_worker_info():
+    """
+    Returns (num_workers, worker_index) as described by TF_CONFIG.
+    Falls back to a single worker when TF_CONFIG is not set.
+    """
+    tf_config = json.loads(os.environ.get("TF_CONFIG", "{}"))
+    workers = tf_config.get("cluster", {}).get("worker", [])
+    if not workers:
+        return 1, 0
+    return len(workers), int(tf_config.get("task", {}).get("index", 0))
+
+
+def is_chief():
+    """Worker 0 owns checkpoints and run reports."""
+    return get_worker_info()[1] == 0
+
+
+def get_strategy(name="none", accelerator="gpu"):
+    """
+    Builds the tf.distribute strategy selected by --trainer.strategy:
+      - none:         default single-device strategy
+      - mirrored:     synchronous data parallelism across the local devices
+      - multi_worker: synchronous data parallelism across processes, configured through TF_CONFIG
+    """
+    if name == "mirrored":
+        if accelerator == "cpu":
+            devices = [d.name for d in tf.config.list_logical_devices("CPU")]
+            return tf.distribute.MirroredStrategy(devices=devices)
+        return tf.distribute.MirroredStrategy()
+
+    if name == "multi_worker":
+        if "TF_CONFIG" not in os.environ:
+            raise ValueError("The multi_worker strategy requires TF_CONFIG to describe the cluster.")
+        # RING all-reduce is the CPU-friendly collective implementation
+        communication = (
+            tf.distribute.experimental.CommunicationImplementation.RING
+            if accelerator == "cpu" else
+            tf.distribute.experimental.CommunicationImplementation.AUTO
+        )
+        return tf.distribute.MultiWorkerMirroredStrategy(
+            communication_options=tf.distribute.experimental.CommunicationOptions(
+                implementation=communication
+            )
+        )
+
+    return tf.distribute.get_strategy()
@@ -1,34 +1,79 @@
 import tensorflow as tf
 from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense, Dropout, Flatten
-from tensorflow.keras.applications import Xception
+from tensorflow.keras.layers import Dense, Dropout, Flatten, Rescaling
+from tensorflow.keras.applications import Xception, MobileNetV3Small, MobileNetV3Large, EfficientNetB0
 from tensorflow.keras.optimizers import Adamax
 from tensorflow.keras.metrics import Precision, Recall
 
-def get_model(input_shape=(299, 299, 3), num_classes=4, learning_rate=0.001):
+# Backbone registry.
+# All models are fed images rescaled to [0, 1] (rescale=1./255, same as serving). Backbones that carry their
+# own preprocessing expect [0, 255] input, so they get a Rescaling(255) layer in front.
+BACKBONES = {
+    'xception': {
+        'builder': lambda **kw: Xception(**kw),
+        'default_size': 299,
+        'expects_255': False,
+    },
+    'mobilenet_v3_small': {
+        'builder': lambda **kw: MobileNetV3Small(include_preprocessing=True, **kw),
+        'default_size': 224,
+        'expects_255': True,
+    },
+    'mobilenet_v3_large': {
+        'builder': lambda **kw: MobileNetV3Large(include_preprocessing=True, **kw),
+        'default_size': 224,
+        'expects_255': True,
+    },
+    'efficientnet_b0': {
+        'builder': lambda **kw: EfficientNetB0(**kw),
+        'default_size': 224,
+        'expects_255': True,
+    },
+}
+
+
+def get_backbone_size(backbone):
+    """Default input size of a registered backbone."""
+    if backbone not in BACKBONES:
+        raise ValueError(f"Unknown backbone '{backbone}'. Available: {sorted(BACKBONES)}")
+    return BACKBONES[backbone]['default_size']
+
+
+def get_model(input_shape=(299, 299, 3), num_classes=4, learning_rate=0.001, backbone='xception', weights='imagenet',
+              dense_units=128, dropout=0.3, head_dropout=0.25):
     """
-    Builds and compiles the Xception-based model for tumor classification.
+    Builds and compiles the classification model for tumor classification.
+    `backbone` selects an entry of BACKBONES; `weights=None` trains the backbone from scratch (offline nodes).
+    The head is Dropout(dropout) -> Dense(dense_units) -> Dropout(head_dropout) -> softmax.
     """
-    # Load the Xception model, pre-trained on ImageNet
-    base_model = Xception(
+    if backbone not in BACKBONES:
+        raise ValueError(f"Unknown backbone '{backbone}'. Available: {sorted(BACKBONES)}")
+    spec = BACKBONES[backbone]
+
+    # Load the backbone (pre-trained on ImageNet unless weights=None)
+    base_model = spec['builder'](
         include_top=False,
-        weights='imagenet',
+        weights=weights,
         input_shape=input_shape,
         pooling='max'
     )
 
-    # Freeze the weights of the base model layers
-    base_model.trainable = False
+    # Freeze pre-trained backbones; a backbone trained from scratch has to learn its features
+    base_model.trainable = weights is None
 
     # Build the Sequential model
-    model = Sequential([
+    layers = [tf.keras.Input(shape=input_shape)]
+    if spec['expects_255']:
+        layers.append(Rescaling(255.0))
+    layers += [
         base_model,
         Flatten(),
-        Dropout(rate=0.3),
-        Dense(128, activation='relu'),
-        Dropout(rate=0.25),
+        Dropout(rate=dropout),
+        Dense(dense_units, activation='relu'),
+        Dropout(rate=head_dropout),
         Dense(num_classes, activation='softmax')
-    ])
+    ]
+    model = Sequential(layers)
 
     # Compile the model
     model.compile(
@@ -36,5 +81,13 @@ def get_model(input_shape=(299, 299, 3), num_classes=4, learning_rate=0.001):
         loss='categorical_crossentropy',
         metrics=['accuracy', Precision(), Recall()]
     )
-    
+
     return model
+
+
+def get_gradcam_layer(model):
+    """Name of the nested backbone, used by the backend as the Grad-CAM feature layer."""
+    for layer in model.layers:
+        if isinstance(layer, tf.keras.Model):
+            return layer.name
+    return None
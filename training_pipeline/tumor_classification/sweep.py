@@ -0,0 +1,205 @@
+import csv
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Hyperparameters a trial can vary; anything not in the search space keeps this value
+DEFAULT_PARAMS = {
+    'learning_rate': 0.001,
+    'dropout': 0.3,
+    'head_dropout': 0.25,
+    'dense_units': 128,
+    'batch_size': 32,
+    'augment_strength': 0.2,
+}
+
+# Default search space: a list is a set of choices (grid and random search);
+# {"min", "max", "log"} is a continuous range (random search only)
+DEFAULT_SPACE = {
+    'learning_rate': [0.0003, 0.001, 0.003],
+    'dropout': [0.3, 0.5],
+    'head_dropout': [0.25],
+    'dense_units': [128, 256],
+    'batch_size': [16, 32],
+    'augment_strength': [0.1, 0.2],
+}
+
+LEADERBOARD_FIELDS = ['rank', 'trial', 'status', 'best_val_loss', 'best_val_accuracy', 'best_epoch', 'epochs',
+                      'pruned_at', 'seconds', *DEFAULT_PARAMS]
+
+
+def load_search_space(path=None):
+    """Search space from a JSON file ({param: [choices] or {"min", "max", "log"}}), or DEFAULT_SPACE."""
+    if not path:
+        return dict(DEFAULT_SPACE)
+    with open(path) as f:
+        space = json.load(f)
+    unknown = set(space) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown hyperparameters in the search space: {sorted(unknown)}. Available: {sorted(DEFAULT_PARAMS)}")
+    return space
+
+
+def grid_trials(space):
+    """Every combination of the choices in the space."""
+    ranges = [name for name, values in space.items() if not isinstance(values, list)]
+    if ranges:
+        raise ValueError(f"Grid search needs a list of choices for every parameter, got ranges for {ranges}")
+    names = list(space)
+    return [{**DEFAULT_PARAMS, **dict(zip(names, values))} for values in itertools.product(*(space[n] for n in names))]
+
+
+def random_trials(space, num_trials, seed=42):
+    """num_trials independent samples: choices uniformly, ranges uniformly (log-uniformly with "log": true)."""
+    rng = random.Random(seed)
+    trials = []
+    for _ in range(num_trials):
+        params = dict(DEFAULT_PARAMS)
+        for name, values in space.items():
+            if isinstance(values, list):
+                params[name] = rng.choice(values)
+            elif values.get('log'):
+                params[name] = math.exp(rng.uniform(math.log(values['min']), math.log(values['max'])))
+            else:
+                params[name] = rng.uniform(values['min'], values['max'])
+            # Integer parameters stay integers when sampled from a range
+            if isinstance(DEFAULT_PARAMS[name], int):
+                params[name] = int(round(params[name]))
+        trials.append(params)
+    return trials
+
+
+# --- Trial (runs in a pool process) ---
+def _init_trial_process(threads_per_trial):
+    """
+    Caps the thread pools of a trial process, so that `parallel` trials share the host instead of
+    each sizing its pools to every core. Runs before the trial creates any TensorFlow op.
+    """
+    threads = str(threads_per_trial)
+    os.environ['TF_NUM_INTRAOP_THREADS'] = threads
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    os.environ['OMP_NUM_THREADS'] = threads
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads_per_trial)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    tf.config.set_visible_devices([], 'GPU')
+
+
+def run_trial(trial_id, params, cache_dir, config, history):
+    """Trains one configuration on the memory-mapped data and returns its summary row."""
+    import tensorflow as tf
+    from .callbacks import MedianPruner
+    from .data import MemmapDataset
+    from .models import get_model
+
+    start = time.perf_counter()
+    row = {'trial': trial_id, **params}
+    try:
+        tf.keras.utils.set_random_seed(config['seed'] + trial_id)
+        num_classes = config['num_classes']
+        train_data = MemmapDataset(cache_dir, 'train', params['batch_size'], num_classes,
+                                   augment_strength=params['augment_strength'], shuffle=True, seed=config['seed'] + trial_id)
+        val_data = MemmapDataset(cache_dir, 'val', params['batch_size'], num_classes)
+
+        size = config['image_size']
+        model = get_model(
+            input_shape=(size, size, 3),
+            num_classes=num_classes,
+            learning_rate=params['learning_rate'],
+            backbone=config['backbone'],
+            weights=config['weights'],
+            dense_units=params['dense_units'],
+            dropout=params['dropout'],
+            head_dropout=params['head_dropout']
+        )
+        pruner = MedianPruner(trial_id, history, warmup_epochs=config['prune_warmup_epochs'],
+                              min_trials=config['prune_min_trials'])
+        callbacks = [tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=config['patience']), pruner]
+        fit = model.fit(train_data, validation_data=val_data, epochs=config['max_epochs'], callbacks=callbacks, verbose=0)
+
+        val_loss = fit.history['val_loss']
+        best_epoch = min(range(len(val_loss)), key=val_loss.__getitem__)
+        row.update({
+            'status': 'pruned' if pruner.pruned_at is not None else 'completed',
+            'best_val_loss': val_loss[best_epoch],
+            'best_val_accuracy': fit.history['val_accuracy'][best_epoch],
+            'best_epoch': best_epoch,
+            'epochs': len(val_loss),
+            'pruned_at': pruner.pruned_at,
+        })
+    except Exception:
+        row.update({'status': 'failed', 'error': traceback.format_exc(limit=3)})
+    row['seconds'] = time.perf_counter() - start
+    return row
+
+
+# --- Leaderboard ---
+def rank_trials(rows):
+    """Completed trials first, then pruned ones, each by best val_loss; failed trials last."""
+    order = {'completed': 0, 'pruned': 1, 'failed': 2}
+    ranked = sorted(rows, key=lambda r: (order[r['status']], r.get('best_val_loss', math.inf)))
+    return [{**r, 'rank': i} for i, r in enumerate(ranked, 1)]
+
+
+def write_leaderboard(rows, output_dir, settings):
+    """leaderboard.csv (ranked) and leaderboard.json (ranked rows plus the sweep settings)."""
+    ranked = rank_trials(rows)
+    with open(os.path.join(output_dir, 'leaderboard.csv'), 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=LEADERBOARD_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(ranked)
+    with open(os.path.join(output_dir, 'leaderboard.json'), 'w') as f:
+        json.dump({'settings': settings, 'trials': ranked}, f, indent=2)
+    return ranked
+
+
+def run_sweep(trials, cache_dir, output_dir, config, parallel=None, threads_per_trial=None):
+    """
+    Runs the trials `parallel` at a time in a process pool, each limited to threads_per_trial threads
+    and reading the shared memory-mapped data in cache_dir. The leaderboard is rewritten after
+    every trial, so an interrupted sweep still leaves its results behind.
+    """
+    cpus = os.cpu_count() or 1
+    parallel = parallel or max(1, cpus // (threads_per_trial or 2))
+    threads_per_trial = threads_per_trial or max(1, cpus // parallel)
+    os.makedirs(output_dir, exist_ok=True)
+    settings = {**config, 'parallel': parallel, 'threads_per_trial': threads_per_trial, 'num_trials': len(trials)}
+    print(f"Sweep: {len(trials)} trials | {parallel} in parallel | {threads_per_trial} threads each")
+
+    rows = []
+    start = time.perf_counter()
+    # spawn: trial processes must not inherit an initialized TensorFlow runtime
+    context = multiprocessing.get_context('spawn')
+    with context.Manager() as manager:
+        history = manager.dict()
+        with ProcessPoolExecutor(max_workers=parallel, mp_context=context,
+                                 initializer=_init_trial_process, initargs=(threads_per_trial,)) as pool:
+            futures = [pool.submit(run_trial, i, params, cache_dir, config, history) for i, params in enumerate(trials)]
+            for future in as_completed(futures):
+                row = future.result()
+                rows.append(row)
+                write_leaderboard(rows, output_dir, settings)
+                loss = f"{row['best_val_loss']:.4f}" if 'best_val_loss' in row else '-'
+                print(f"[{len(rows)}/{len(trials)}] trial {row['trial']} {row['status']} | best val_loss {loss} | "
+                      f"{row['seconds']:.1f}s")
+
+    wall_seconds = time.perf_counter() - start
+    settings['wall_seconds'] = wall_seconds
+    ranked = write_leaderboard(rows, output_dir, settings)
+    trial_seconds = sum(r['seconds'] for r in rows)
+    print(f"Sweep finished in {wall_seconds:.1f}s ({trial_seconds:.1f}s of trial time, "
+          f"{trial_seconds / wall_seconds:.2f}x concurrency)")
+    if ranked and ranked[0]['status'] != 'failed':
+        best = ranked[0]
+        print(f"Best: trial {best['trial']} | val_loss {best['best_val_loss']:.4f} | "
+              + ", ".join(f"{k}={best[k]}" for k in DEFAULT_PARAMS))
+    print(f"Leaderboard written to {os.path.join(output_dir, 'leaderboard.csv')}")
+    return ranked
@@ -1,5 +1,10 @@
+import os
+import tempfile
+import time
 import tensorflow as tf
 from .models import get_model
+from .distributed import get_worker_info, is_chief
+from .callbacks import ThroughputProfiler, TimedInput, TimedModelCheckpoint
 
 class Trainer:
     def __init__(self, model, train_gen, val_gen, config):
@@ -7,17 +12,31 @@ class Trainer:
         self.train_gen = train_gen
         self.val_gen = val_gen
         self.config = config
+        self.run_stats = {}
+
+    def _checkpoint_path(self):
+        """
+        Only the chief writes the real checkpoint. In multi-worker runs every worker still has to
+        take part in saving, so the others write to a throwaway location.
+        """
+        ckpt_path = self.config.get('ckpt_path', 'checkpoints/model.keras')
+        if is_chief():
+            return ckpt_path
+        _, worker_index = get_worker_info()
+        return os.path.join(tempfile.gettempdir(), f"worker_{worker_index}", os.path.basename(ckpt_path))
 
     def fit(self):
         """
         Runs the model training.
         """
+        checkpoint = TimedModelCheckpoint(
+            filepath=self._checkpoint_path(),
+            save_best_only=True,
+            save_weights_only=self.config.get('save_weights_only', False),
+            monitor='val_loss'
+        )
         callbacks = [
-            tf.keras.callbacks.ModelCheckpoint(
-                filepath=self.config.get('ckpt_path', 'checkpoints/model.keras'),
-                save_best_only=True,
-                monitor='val_loss'
-            ),
+            checkpoint,
             tf.keras.callbacks.EarlyStopping(
                 monitor='val_loss',
                 patience=5,
@@ -25,11 +44,45 @@ class Trainer:
             )
         ]
 
+        train_data = self.train_gen
+        if self.config.get('profile') and is_chief():
+            # Sequence inputs can be timed directly; tf.data inputs fall back to the gap between steps
+            input_timer = None
+            if hasattr(train_data, '__getitem__') and hasattr(train_data, '__len__'):
+                input_timer = train_data = TimedInput(train_data)
+
+            # Profiler goes last so its epoch-end hook sees the checkpoint timing
+            callbacks.append(ThroughputProfiler(
+                report_dir=os.path.dirname(self.config.get('ckpt_path', 'checkpoints/model.keras')) or '.',
+                batch_size=self.config.get('global_batch_size', 0),
+                input_timer=input_timer,
+                checkpoint=checkpoint,
+                trace_steps=self.config.get('trace_steps'),
+                trace_dir=self.config.get('trace_dir', 'logs/profile')
+            ))
+
+        start = time.perf_counter()
         history = self.model.fit(
-            self.train_gen,
+            train_data,
             validation_data=self.val_gen,
             epochs=self.config.get('max_epochs', 10),
+            steps_per_epoch=self.config.get('steps_per_epoch'),
+            validation_steps=self.config.get('validation_steps'),
             callbacks=callbacks,
-            verbose=1
+            verbose=1 if is_chief() else 0
         )
+        fit_seconds = time.perf_counter() - start
+
+        # Throughput summary, used to compare single-process and distributed runs
+        epochs_run = len(history.history.get('loss', []))
+        steps_per_epoch = self.config.get('steps_per_epoch') or len(self.train_gen)
+        images_seen = epochs_run * steps_per_epoch * self.config.get('global_batch_size', 0)
+        self.run_stats = {
+            'fit_seconds': fit_seconds,
+            'epochs': epochs_run,
+            'images_seen': images_seen,
+            'images_per_sec': images_seen / fit_seconds if fit_seconds > 0 else 0.0,
+            'num_workers': get_worker_info()[0],
+            'num_replicas': self.config.get('num_replicas', 1),
+        }
         return history
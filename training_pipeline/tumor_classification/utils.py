@@ -2,20 +2,73 @@ import argparse
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Tumor Classification CLI")
-    parser.add_argument("command", choices=["fit"], help="Command to run (e.g., fit)")
+    parser.add_argument("command", choices=["fit", "distill", "sweep"], help="Command to run (e.g., fit)")
     
     # Data args
     parser.add_argument("--data.ndim", type=int, default=3, dest="data_ndim")
     parser.add_argument("--data.batch_size", type=int, default=32, dest="data_batch_size")
     parser.add_argument("--data.num_workers", type=int, default=4, dest="data_num_workers")
+    parser.add_argument("--data.dir", type=str, default=None, dest="data_dir",
+                        help="Class-folder dataset (defaults to data/classification_samples at the project root)")
+    parser.add_argument("--data.augment_strength", type=float, default=0.2, dest="data_augment_strength",
+                        help="Training brightness augmentation: factor drawn from [1 - s, 1 + s]")
     
     # Model args
     parser.add_argument("--model.ndim", type=int, default=3, dest="model_ndim")
     parser.add_argument("--model.nb_classes", type=int, default=4, dest="model_nb_classes")
+    parser.add_argument("--model.backbone", type=str, default="xception", dest="model_backbone",
+                        help="Backbone from tumor_classification.models.BACKBONES")
+    parser.add_argument("--model.image_size", type=int, default=None, dest="model_image_size",
+                        help="Input size (defaults to the backbone's default size)")
+    parser.add_argument("--model.weights", type=str, default="imagenet", dest="model_weights",
+                        help="'imagenet' or 'none' to train from scratch (offline nodes)")
+    parser.add_argument("--model.learning_rate", type=float, default=0.001, dest="model_learning_rate")
+    parser.add_argument("--model.dense_units", type=int, default=128, dest="model_dense_units")
+    parser.add_argument("--model.dropout", type=float, default=0.3, dest="model_dropout",
+                        help="Dropout between the backbone and the dense layer")
+    parser.add_argument("--model.head_dropout", type=float, default=0.25, dest="model_head_dropout",
+                        help="Dropout between the dense layer and the classifier")
+    parser.add_argument("--model.class_labels", type=str, default=None, dest="model_class_labels",
+                        help="Comma-separated display labels written to the serving metadata (defaults to folder names)")
+
+    # Distillation args
+    parser.add_argument("--distill.teacher_path", type=str,
+                        default="../artifacts/classification/brain_tumor_xception_model.keras", dest="distill_teacher_path")
+    parser.add_argument("--distill.teacher_size", type=int, default=299, dest="distill_teacher_size")
+    parser.add_argument("--distill.temperature", type=float, default=4.0, dest="distill_temperature")
+    parser.add_argument("--distill.alpha", type=float, default=0.1, dest="distill_alpha",
+                        help="Weight of the hard-label loss (1 - alpha goes to the teacher's soft labels)")
     
+    # Sweep args (model/data options above apply to every trial, the search space varies the rest)
+    parser.add_argument("--sweep.mode", type=str, default="grid", choices=["grid", "random"], dest="sweep_mode")
+    parser.add_argument("--sweep.space", type=str, default=None, dest="sweep_space",
+                        help="JSON search space {param: [choices] or {min, max, log}} (defaults to sweep.DEFAULT_SPACE)")
+    parser.add_argument("--sweep.num_trials", type=int, default=20, dest="sweep_num_trials",
+                        help="Number of sampled configurations in random mode")
+    parser.add_argument("--sweep.parallel", type=int, default=None, dest="sweep_parallel",
+                        help="Concurrent trials (defaults to cores / threads_per_trial)")
+    parser.add_argument("--sweep.threads_per_trial", type=int, default=None, dest="sweep_threads_per_trial",
+                        help="TensorFlow/OpenMP threads per trial (defaults to cores / parallel)")
+    parser.add_argument("--sweep.patience", type=int, default=5, dest="sweep_patience")
+    parser.add_argument("--sweep.prune_warmup_epochs", type=int, default=2, dest="sweep_prune_warmup_epochs")
+    parser.add_argument("--sweep.prune_min_trials", type=int, default=3, dest="sweep_prune_min_trials",
+                        help="Trials that must have reached an epoch before others are pruned against it")
+    parser.add_argument("--sweep.output_dir", type=str, default="sweeps", dest="sweep_output_dir")
+    parser.add_argument("--sweep.seed", type=int, default=42, dest="sweep_seed")
+
     # Trainer args
     parser.add_argument("--trainer.max_epochs", type=int, default=10, dest="trainer_max_epochs")
-    parser.add_argument("--trainer.accelerator", type=str, default="gpu", dest="trainer_accelerator")
+    parser.add_argument("--trainer.accelerator", type=str, default="gpu", choices=["gpu", "cpu"], dest="trainer_accelerator")
+    parser.add_argument("--trainer.strategy", type=str, default="none", choices=["none", "mirrored", "multi_worker"], dest="trainer_strategy")
+    parser.add_argument("--trainer.devices", type=int, default=1, dest="trainer_devices",
+                        help="Number of local replicas for the mirrored strategy on CPU")
+    parser.add_argument("--trainer.stats_path", type=str, default=None, dest="trainer_stats_path",
+                        help="Optional JSON file for the run throughput summary (written by the chief)")
+    parser.add_argument("--trainer.profile", action="store_true", dest="trainer_profile",
+                        help="Write a throughput run report (JSON/CSV) next to the checkpoint")
+    parser.add_argument("--trainer.profile_trace_steps", type=str, default=None, dest="trainer_profile_trace_steps",
+                        help="Capture a TensorBoard profiler trace for global steps START,STOP (e.g. 10,20)")
+    parser.add_argument("--trainer.profile_trace_dir", type=str, default="logs/profile", dest="trainer_profile_trace_dir")
     parser.add_argument("--ckpt_path", type=str, default="checkpoints/last.keras", dest="ckpt_path")
 
     # Allow partial parsing to ignore unknown args if needed, but strict is safer for now.